@@ -3,265 +3,184 @@
 Dashboard untuk monitoring dan analisis bot WhatsApp
 """
 
-import json
-import sqlite3
-from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from datetime import datetime
+import os
 import sys
+from interaction_log import iter_log_entries, iter_log_records
+from analytics_engine import AnalyticsEngine, load_checkpoint, save_checkpoint
 
-def load_message_logs():
-    """Load message logs"""
-    try:
-        with open('python_message_logs.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+# Kolom log yang dibutuhkan analisis (bot_response tidak perlu dibaca)
+LOG_COLUMNS = ['timestamp', 'phone_number', 'user_message', 'error']
 
-def load_session_debug():
-    """Load session debug logs"""
-    try:
-        with open('session_debug.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+# State untuk mode --incremental (akumulator + posisi log + id pesanan terakhir)
+CHECKPOINT_PATH = os.getenv('ANALYTICS_CHECKPOINT_PATH', 'analytics_checkpoint.json')
 
-def get_orders_from_db():
-    """Get orders from database"""
+def iter_message_logs():
+    """Stream message logs (JSON Lines, satu entri per kali)"""
+    return iter_log_entries('python_message_logs')
+
+def iter_orders_from_db(after_id=0):
+    """Stream orders from database"""
     try:
-        conn = sqlite3.connect('orders.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM orders ORDER BY order_date DESC")
-        orders = cursor.fetchall()
-        conn.close()
-        return orders
+        from database import iter_orders
+        yield from iter_orders(after_id)
     except Exception as e:
         print(f"Error reading orders: {e}")
-        return []
 
-def analyze_message_patterns():
+def analyze_message_patterns(patterns):
     """Analyze message patterns and user behavior"""
-    logs = load_message_logs()
+    total_messages = patterns.total_messages
     
-    if not logs:
+    if not total_messages:
         print("❌ No message logs found")
         return
     
     print("📊 MESSAGE PATTERN ANALYSIS")
     print("=" * 50)
     
-    # User activity analysis
-    user_activity = defaultdict(int)
-    message_types = Counter()
-    hourly_activity = defaultdict(int)
-    daily_activity = defaultdict(int)
-    
-    for log in logs:
-        phone = log['phone_number']
-        user_activity[phone] += 1
-        
-        # Analyze message content
-        message = log['user_message'].lower()
-        if message in ['halo', 'hi', 'hai', 'hello', 'menu']:
-            message_types['greeting'] += 1
-        elif message in ['1', '2', '3', '4']:
-            message_types['menu_selection'] += 1
-        elif any(product in message for product in ['kopi', 'teh', 'keripik', 'sambal', 'madu']):
-            message_types['product_query'] += 1
-        elif message.isdigit():
-            message_types['quantity'] += 1
-        else:
-            message_types['other'] += 1
-        
-        # Time analysis
-        try:
-            timestamp = datetime.fromisoformat(log['timestamp'])
-            hour = timestamp.hour
-            date = timestamp.date()
-            hourly_activity[hour] += 1
-            daily_activity[date] += 1
-        except:
-            pass
-    
     # Top active users
+    user_activity = patterns.user_activity
     print(f"📱 Total unique users: {len(user_activity)}")
-    print(f"💬 Total messages: {len(logs)}")
-    print(f"📈 Average messages per user: {len(logs) / max(len(user_activity), 1):.1f}")
+    print(f"💬 Total messages: {total_messages}")
+    print(f"📈 Average messages per user: {total_messages / max(len(user_activity), 1):.1f}")
     
     print("\n🔥 Top 5 Most Active Users:")
-    for phone, count in sorted(user_activity.items(), key=lambda x: x[1], reverse=True)[:5]:
+    for phone, count in user_activity.most_common(5):
         print(f"  {phone[-6:]}**: {count} messages")
     
     print("\n📋 Message Type Distribution:")
-    for msg_type, count in message_types.most_common():
-        percentage = (count / len(logs)) * 100
+    for msg_type, count in patterns.message_types.most_common():
+        percentage = (count / total_messages) * 100
         print(f"  {msg_type.title()}: {count} ({percentage:.1f}%)")
     
     print("\n🕐 Peak Activity Hours:")
-    for hour, count in sorted(hourly_activity.items(), key=lambda x: x[1], reverse=True)[:5]:
+    for hour, count in patterns.hourly_activity.most_common(5):
         print(f"  {hour:02d}:00 - {hour+1:02d}:00: {count} messages")
 
 def analyze_order_success():
     """Analyze order completion success rate"""
-    orders = get_orders_from_db()
-    sessions = load_session_debug()
-    
     print("\n\n💰 ORDER ANALYSIS")
     print("=" * 50)
     
-    if not orders:
+    # Statistik dibaca dari rollup daily_sales, bukan dari seluruh pesanan
+    try:
+        from database import get_order_summary, get_best_sellers, get_latest_orders
+        summary = get_order_summary()
+    except Exception as e:
+        print(f"Error reading orders: {e}")
+        return
+    
+    if not summary['total_orders']:
         print("❌ No orders found in database")
         return
     
     # Order statistics
-    total_orders = len(orders)
-    total_revenue = sum(order[6] for order in orders)  # total_amount column
-    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-    
-    print(f"🛒 Total orders: {total_orders}")
-    print(f"💰 Total revenue: Rp {total_revenue:,.0f}")
-    print(f"📊 Average order value: Rp {avg_order_value:,.0f}")
-    
-    # Product popularity
-    product_sales = Counter()
-    for order in orders:
-        product_name = order[3]
-        quantity = order[4]
-        product_sales[product_name] += quantity
+    print(f"🛒 Total orders: {summary['total_orders']}")
+    print(f"💰 Total revenue: Rp {summary['total_revenue']:,.0f}")
+    print(f"📊 Average order value: Rp {summary['avg_order']:,.0f}")
     
     print("\n🏆 Best Selling Products:")
-    for product, quantity in product_sales.most_common(5):
+    for product, quantity, _ in get_best_sellers(5):
         print(f"  {product}: {quantity} units sold")
     
     # Recent orders
     print("\n📅 Recent Orders (Last 5):")
-    for order in orders[:5]:
+    for order in get_latest_orders(5):
         order_id, customer, phone, product, qty, price, total, status, date, address = order
         print(f"  #{order_id}: {customer} - {product} x{qty} = Rp {total:,.0f} ({date})")
 
-def analyze_conversion_funnel():
+def analyze_conversion_funnel(funnel):
     """Analyze conversion funnel from greeting to order"""
-    logs = load_message_logs()
-    sessions = load_session_debug()
-    
     print("\n\n🔄 CONVERSION FUNNEL ANALYSIS")
     print("=" * 50)
     
-    # Track user journey stages
-    user_stages = defaultdict(set)
-    
-    for log in logs:
-        phone = log['phone_number']
-        message = log['user_message'].lower()
-        
-        if message in ['halo', 'hi', 'hai', 'hello', 'menu']:
-            user_stages['greeted'].add(phone)
-        elif message == '2':
-            user_stages['started_order'].add(phone)
-        elif any(product in message for product in ['kopi', 'teh', 'keripik', 'sambal', 'madu']):
-            user_stages['selected_product'].add(phone)
-    
-    # Count orders completed
-    orders = get_orders_from_db()
-    completed_orders = set(order[2] for order in orders)  # phone_number column
-    
-    total_greeted = len(user_stages['greeted'])
-    started_orders = len(user_stages['started_order'])
-    selected_products = len(user_stages['selected_product'])
-    completed = len(completed_orders)
+    total_greeted = len(funnel.greeted)
+    started_orders = len(funnel.started_order)
+    selected_products = len(funnel.selected_product)
+    completed = len(funnel.completed)
     
     print(f"👋 Users who greeted: {total_greeted}")
     print(f"🛒 Users who started ordering: {started_orders} ({started_orders/max(total_greeted,1)*100:.1f}%)")
     print(f"📦 Users who selected products: {selected_products} ({selected_products/max(started_orders,1)*100:.1f}%)")
     print(f"✅ Users who completed orders: {completed} ({completed/max(selected_products,1)*100:.1f}%)")
 
-def analyze_errors():
+def analyze_errors(errors):
     """Analyze errors and failed interactions"""
-    logs = load_message_logs()
-    
     print("\n\n🚨 ERROR ANALYSIS")
     print("=" * 50)
     
-    error_logs = [log for log in logs if log.get('error')]
-    total_errors = len(error_logs)
+    total_errors = errors.total_errors
     
     if total_errors == 0:
         print("✅ No errors found in logs")
         return
     
     print(f"❌ Total errors: {total_errors}")
-    print(f"📊 Error rate: {(total_errors/len(logs))*100:.2f}%")
-    
-    # Most common errors
-    error_types = Counter()
-    for log in error_logs:
-        error = log.get('error', '')
-        if 'Invalid input' in error:
-            error_types['Invalid Input'] += 1
-        elif 'timeout' in error.lower():
-            error_types['Timeout'] += 1
-        elif 'database' in error.lower():
-            error_types['Database Error'] += 1
-        else:
-            error_types['Other'] += 1
+    print(f"📊 Error rate: {(total_errors/errors.total_messages)*100:.2f}%")
     
     print("\n🔍 Error Types:")
-    for error_type, count in error_types.most_common():
+    for error_type, count in errors.error_types.most_common():
         print(f"  {error_type}: {count}")
 
-def generate_daily_report():
+def generate_daily_report(daily):
     """Generate daily summary report"""
-    today = datetime.now().date()
-    logs = load_message_logs()
-    orders = get_orders_from_db()
-    
     print("\n\n📅 TODAY'S SUMMARY REPORT")
     print("=" * 50)
     
-    # Today's logs
-    today_logs = []
-    for log in logs:
-        try:
-            log_date = datetime.fromisoformat(log['timestamp']).date()
-            if log_date == today:
-                today_logs.append(log)
-        except:
-            pass
-    
-    # Today's orders
-    today_orders = []
-    for order in orders:
-        try:
-            order_date = datetime.strptime(order[8], '%Y-%m-%d %H:%M:%S').date()
-            if order_date == today:
-                today_orders.append(order)
-        except:
-            pass
-    
-    unique_users_today = len(set(log['phone_number'] for log in today_logs))
-    total_messages_today = len(today_logs)
-    total_orders_today = len(today_orders)
-    revenue_today = sum(order[6] for order in today_orders)
+    unique_users_today = len(daily.users)
     
     print(f"📱 Active users today: {unique_users_today}")
-    print(f"💬 Messages today: {total_messages_today}")
-    print(f"🛒 Orders today: {total_orders_today}")
-    print(f"💰 Revenue today: Rp {revenue_today:,.0f}")
+    print(f"💬 Messages today: {daily.messages}")
+    print(f"🛒 Orders today: {daily.orders}")
+    print(f"💰 Revenue today: Rp {daily.revenue:,.0f}")
     
-    if total_orders_today > 0:
-        conversion_rate = (total_orders_today / unique_users_today) * 100 if unique_users_today > 0 else 0
+    if daily.orders > 0:
+        conversion_rate = (daily.orders / unique_users_today) * 100 if unique_users_today > 0 else 0
         print(f"📈 Conversion rate: {conversion_rate:.1f}%")
 
+def print_progress(engine):
+    """Hasil sementara selama log/pesanan masih diproses"""
+    print(f"⏳ {engine.logs_processed} messages, {engine.orders_processed} orders processed "
+          f"({engine.errors.total_errors} errors, {len(engine.patterns.user_activity)} users)",
+          file=sys.stderr)
+
 if __name__ == "__main__":
     print("🤖 WHATSAPP BOT ANALYTICS DASHBOARD")
     print("=" * 60)
     print(f"Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     try:
-        analyze_message_patterns()
+        on_progress = print_progress if '--progress' in sys.argv else None
+        
+        # Log dan pesanan dibaca tepat satu kali untuk semua analisis
+        if '--incremental' in sys.argv:
+            # Lanjutkan dari checkpoint: hanya log dan pesanan baru yang diproses
+            engine = load_checkpoint(CHECKPOINT_PATH)
+            logs_before, orders_before = engine.logs_processed, engine.orders_processed
+            engine.run_records(iter_log_records('python_message_logs', engine.log_position,
+                                                on_gap=engine.record_log_gap),
+                               iter_orders_from_db(engine.last_order_id), on_progress=on_progress)
+            save_checkpoint(engine, CHECKPOINT_PATH)
+            print(f"🔁 Incremental: {engine.logs_processed - logs_before} new messages, "
+                  f"{engine.orders_processed - orders_before} new orders")
+        elif '--vectorized' in sys.argv:
+            # Riwayat lengkap (arsip kolom + segmen aktif), hanya kolom yang
+            # dipakai, lalu dihitung secara vektor dengan NumPy/pandas
+            from log_archive import load_log_frame
+            from vectorized_analytics import build_engine, frame_to_log_columns
+            since = sys.argv[sys.argv.index('--since') + 1] if '--since' in sys.argv else None
+            frame = load_log_frame('python_message_logs', columns=LOG_COLUMNS, start=since)
+            engine = build_engine(frame_to_log_columns(frame))
+            engine.run([], iter_orders_from_db(), on_progress=on_progress)
+        else:
+            engine = AnalyticsEngine()
+            engine.run(iter_message_logs(), iter_orders_from_db(), on_progress=on_progress)
+        
+        analyze_message_patterns(engine.patterns)
         analyze_order_success()
-        analyze_conversion_funnel()
-        analyze_errors()
-        generate_daily_report()
+        analyze_conversion_funnel(engine.funnel)
+        analyze_errors(engine.errors)
+        generate_daily_report(engine.daily)
         
         print("\n\n✅ Analytics completed!")
         print("💡 Use this data to optimize bot performance and user experience.")
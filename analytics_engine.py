@@ -0,0 +1,323 @@
+"""
+Mesin analitik satu kali jalan (single pass) untuk log interaksi dan pesanan
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+
+CHECKPOINT_VERSION = 1
+
+GREETINGS = {'halo', 'hi', 'hai', 'hello', 'menu'}
+MENU_OPTIONS = {'1', '2', '3', '4'}
+PRODUCT_KEYWORDS = ('kopi', 'teh', 'keripik', 'sambal', 'madu')
+
+def classify_message(message):
+    """Jenis pesan pengguna (sudah lowercase)"""
+    if message in GREETINGS:
+        return 'greeting'
+    if message in MENU_OPTIONS:
+        return 'menu_selection'
+    if any(product in message for product in PRODUCT_KEYWORDS):
+        return 'product_query'
+    if message.isdigit():
+        return 'quantity'
+    return 'other'
+
+def _counter_state(counter):
+    # Pasangan [key, jumlah] agar key int (mis. jam) tetap int setelah JSON
+    return [[key, count] for key, count in counter.items()]
+
+def _load_counter(pairs):
+    return Counter({key: count for key, count in pairs})
+
+def parse_timestamp(value):
+    """Parse timestamp ISO dari log; None jika tidak valid"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+class Accumulator:
+    """Dasar akumulator: menerima entri log dan pesanan satu per satu.
+
+    ``add_log`` menerima entri log, jenis pesan, dan timestamp yang sudah
+    di-parse oleh engine sehingga tidak ada analyzer yang mem-parse ulang.
+    """
+
+    def add_log(self, log, message_type, timestamp):
+        pass
+
+    def add_order(self, order):
+        pass
+
+    def get_state(self):
+        """State akumulator yang bisa disimpan sebagai JSON"""
+        return {}
+
+    def load_state(self, state):
+        """Memulihkan state dari get_state()"""
+
+class MessagePatterns(Accumulator):
+    """Aktivitas pengguna, jenis pesan, dan jam sibuk"""
+
+    def __init__(self):
+        self.total_messages = 0
+        self.user_activity = Counter()
+        self.message_types = Counter()
+        self.hourly_activity = Counter()
+        self.daily_activity = Counter()
+
+    def add_log(self, log, message_type, timestamp):
+        self.total_messages += 1
+        self.user_activity[log['phone_number']] += 1
+        self.message_types[message_type] += 1
+        if timestamp is not None:
+            self.hourly_activity[timestamp.hour] += 1
+            self.daily_activity[timestamp.date().isoformat()] += 1
+
+    def get_state(self):
+        return {
+            'total_messages': self.total_messages,
+            'user_activity': _counter_state(self.user_activity),
+            'message_types': _counter_state(self.message_types),
+            'hourly_activity': _counter_state(self.hourly_activity),
+            'daily_activity': _counter_state(self.daily_activity),
+        }
+
+    def load_state(self, state):
+        self.total_messages = state['total_messages']
+        self.user_activity = _load_counter(state['user_activity'])
+        self.message_types = _load_counter(state['message_types'])
+        self.hourly_activity = _load_counter(state['hourly_activity'])
+        self.daily_activity = _load_counter(state['daily_activity'])
+
+class ConversionFunnel(Accumulator):
+    """Tahapan pengguna dari sapaan sampai menyelesaikan pesanan"""
+
+    def __init__(self):
+        self.greeted = set()
+        self.started_order = set()
+        self.selected_product = set()
+        self.completed = set()
+
+    def add_log(self, log, message_type, timestamp):
+        phone = log['phone_number']
+        if message_type == 'greeting':
+            self.greeted.add(phone)
+        elif log.get('user_message') == '2':
+            self.started_order.add(phone)
+        elif message_type == 'product_query':
+            self.selected_product.add(phone)
+
+    def add_order(self, order):
+        self.completed.add(order[2])  # phone_number
+
+    def get_state(self):
+        return {
+            'greeted': sorted(self.greeted),
+            'started_order': sorted(self.started_order),
+            'selected_product': sorted(self.selected_product),
+            'completed': sorted(self.completed),
+        }
+
+    def load_state(self, state):
+        self.greeted = set(state['greeted'])
+        self.started_order = set(state['started_order'])
+        self.selected_product = set(state['selected_product'])
+        self.completed = set(state['completed'])
+
+class ErrorStats(Accumulator):
+    """Jumlah dan jenis error di log"""
+
+    def __init__(self):
+        self.total_messages = 0
+        self.total_errors = 0
+        self.error_types = Counter()
+
+    def add_log(self, log, message_type, timestamp):
+        self.total_messages += 1
+        error = log.get('error')
+        if not error:
+            return
+
+        self.total_errors += 1
+        if 'Invalid input' in error:
+            self.error_types['Invalid Input'] += 1
+        elif 'timeout' in error.lower():
+            self.error_types['Timeout'] += 1
+        elif 'database' in error.lower():
+            self.error_types['Database Error'] += 1
+        else:
+            self.error_types['Other'] += 1
+
+    def get_state(self):
+        return {
+            'total_messages': self.total_messages,
+            'total_errors': self.total_errors,
+            'error_types': _counter_state(self.error_types),
+        }
+
+    def load_state(self, state):
+        self.total_messages = state['total_messages']
+        self.total_errors = state['total_errors']
+        self.error_types = _load_counter(state['error_types'])
+
+class DailySummary(Accumulator):
+    """Ringkasan aktivitas dan pesanan untuk satu tanggal"""
+
+    def __init__(self, day):
+        self.day = day
+        self.users = set()
+        self.messages = 0
+        self.orders = 0
+        self.revenue = 0.0
+
+    def add_log(self, log, message_type, timestamp):
+        if timestamp is not None and timestamp.date() == self.day:
+            self.users.add(log['phone_number'])
+            self.messages += 1
+
+    def add_order(self, order):
+        if str(order[8]).startswith(self.day.isoformat()):
+            self.orders += 1
+            self.revenue += order[6]
+
+    def get_state(self):
+        return {
+            'day': self.day.isoformat(),
+            'users': sorted(self.users),
+            'messages': self.messages,
+            'orders': self.orders,
+            'revenue': self.revenue,
+        }
+
+    def load_state(self, state):
+        # Checkpoint dari hari lain tidak berisi data hari ini: mulai dari nol
+        if state['day'] != self.day.isoformat():
+            return
+        self.users = set(state['users'])
+        self.messages = state['messages']
+        self.orders = state['orders']
+        self.revenue = state['revenue']
+
+class AnalyticsEngine:
+    """Mengalirkan log dan pesanan tepat satu kali ke semua akumulator.
+
+    Memori tetap konstan terhadap panjang log: entri dibaca satu per satu
+    dan hanya ringkasan (counter per pengguna/jam/jenis) yang disimpan.
+    ``on_progress(engine)`` dipanggil setiap ``progress_every`` record
+    sehingga hasil sementara bisa ditampilkan selama proses berjalan.
+
+    Posisi log terakhir dan id pesanan terakhir dicatat agar state bisa
+    disimpan (save_checkpoint) dan dilanjutkan hanya dengan record baru.
+    Segmen log yang terhapus sebelum terbaca dicatat di ``log_gaps``.
+    """
+
+    def __init__(self, today=None):
+        self.patterns = MessagePatterns()
+        self.funnel = ConversionFunnel()
+        self.errors = ErrorStats()
+        self.daily = DailySummary(today or datetime.now().date())
+        self.accumulators = [self.patterns, self.funnel, self.errors, self.daily]
+        self.logs_processed = 0
+        self.orders_processed = 0
+        self.log_position = None
+        self.last_order_id = 0
+        self.log_gaps = []
+
+    def add_log(self, log, position=None):
+        # Pesan kosong / None dihitung sebagai 'other' (sama dengan jalur vektor)
+        message_type = classify_message((log.get('user_message') or '').lower())
+        timestamp = parse_timestamp(log.get('timestamp'))
+        for accumulator in self.accumulators:
+            accumulator.add_log(log, message_type, timestamp)
+        self.logs_processed += 1
+        if position is not None:
+            self.log_position = position
+
+    def record_log_gap(self, segments):
+        """Callback ``on_gap`` iter_log_records: statistik log kurang dari seharusnya"""
+        print(f"⚠️ Log segments {segments} were rotated away before being read; "
+              f"message statistics undercount them (full history: log_archive / --vectorized)",
+              file=sys.stderr)
+        self.log_gaps.extend(segment for segment in segments if segment not in self.log_gaps)
+
+    def add_order(self, order):
+        for accumulator in self.accumulators:
+            accumulator.add_order(order)
+        self.orders_processed += 1
+        self.last_order_id = max(self.last_order_id, order[0])
+
+    def run(self, logs, orders, on_progress=None, progress_every=10000):
+        """Proses iterable log lalu iterable pesanan dalam satu kali jalan"""
+        return self.run_records(((None, log) for log in logs), orders,
+                                on_progress=on_progress, progress_every=progress_every)
+
+    def run_records(self, log_records, orders, on_progress=None, progress_every=10000):
+        """Seperti run(), dengan log berupa ``(posisi, entri)`` dari iter_log_records"""
+        processed = 0
+        for position, log in log_records:
+            self.add_log(log, position)
+            processed += 1
+            if on_progress and processed % progress_every == 0:
+                on_progress(self)
+
+        for order in orders:
+            self.add_order(order)
+            processed += 1
+            if on_progress and processed % progress_every == 0:
+                on_progress(self)
+
+        return self
+
+    def get_state(self):
+        """Seluruh state engine (akumulator + posisi) dalam bentuk JSON"""
+        return {
+            'version': CHECKPOINT_VERSION,
+            'log_position': self.log_position,
+            'last_order_id': self.last_order_id,
+            'log_gaps': self.log_gaps,
+            'logs_processed': self.logs_processed,
+            'orders_processed': self.orders_processed,
+            'patterns': self.patterns.get_state(),
+            'funnel': self.funnel.get_state(),
+            'errors': self.errors.get_state(),
+            'daily': self.daily.get_state(),
+        }
+
+    def load_state(self, state):
+        """Memulihkan state dari get_state()"""
+        self.log_position = tuple(state['log_position']) if state['log_position'] else None
+        self.last_order_id = state['last_order_id']
+        self.log_gaps = state.get('log_gaps', [])
+        self.logs_processed = state['logs_processed']
+        self.orders_processed = state['orders_processed']
+        self.patterns.load_state(state['patterns'])
+        self.funnel.load_state(state['funnel'])
+        self.errors.load_state(state['errors'])
+        self.daily.load_state(state['daily'])
+
+def save_checkpoint(engine, path):
+    """Simpan state engine secara atomik (tulis file sementara lalu rename)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(engine.get_state(), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path, today=None):
+    """Engine dengan state dari checkpoint; engine baru jika belum ada/tidak valid"""
+    engine = AnalyticsEngine(today=today)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == CHECKPOINT_VERSION:
+            engine.load_state(state)
+    except FileNotFoundError:
+        pass
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        print(f"Error loading analytics checkpoint {path}: {e}")
+        engine = AnalyticsEngine(today=today)
+    return engine
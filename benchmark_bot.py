@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark throughput dan latensi bot (in-process) dengan replay percakapan
+
+Memutar ulang log percakapan (python_message_logs) dan trafik sintetis
+banyak pengguna melalui ``chatbot.OrderBot.process_message`` dan
+``whatsapp_bot.process_order_flow``, lalu melaporkan pesan/detik, latensi
+p50/p95/p99 per langkah FSM, dan jumlah query database per pesan.
+Database dan produk memakai file sementara sehingga orders.db tidak berubah.
+
+Pemakaian:
+    python benchmark_bot.py [--users 200] [--rounds 3] [--save hasil.json] [--baseline baseline.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# Alur lengkap per pengguna untuk masing-masing implementasi bot
+ORDERBOT_FLOW = ['halo', '1', '2', 'ayam goreng', '3', 'budi santoso', 'Jl. Merdeka No. 10']
+FLASK_FLOW = ['halo', '1', 'ayam goreng', 'Budi Santoso', '3', 'Jl. Merdeka No. 10']
+
+def percentile(sorted_values, fraction):
+    """Persentil nearest-rank dari list yang sudah terurut"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, db_calls):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'messages': count,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'db_calls_per_message': round(db_calls / count, 2) if count else 0.0,
+    }
+
+class StatementCounter:
+    """Menghitung statement SQL pada koneksi database thread ini"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement):
+        self.count += 1
+
+    def attach(self):
+        from database import get_connection
+        get_connection().set_trace_callback(self)
+
+    def detach(self):
+        from database import get_connection
+        get_connection().set_trace_callback(None)
+
+def run_scenario(process, get_step, messages):
+    """Memproses ``(phone, pesan)`` satu per satu dan mengukur tiap pesan"""
+    counter = StatementCounter()
+    counter.attach()
+    per_step = defaultdict(lambda: ([], [0]))
+    latencies = []
+    started = time.perf_counter()
+    try:
+        for phone, message in messages:
+            step = get_step(phone)
+            calls_before = counter.count
+            t0 = time.perf_counter()
+            process(message, phone)
+            elapsed = time.perf_counter() - t0
+
+            latencies.append(elapsed)
+            step_latencies, step_calls = per_step[step]
+            step_latencies.append(elapsed)
+            step_calls[0] += counter.count - calls_before
+    finally:
+        counter.detach()
+    total_time = time.perf_counter() - started
+
+    result = summarize(latencies, counter.count)
+    result['seconds'] = round(total_time, 4)
+    result['messages_per_sec'] = round(len(latencies) / total_time, 1) if total_time else 0.0
+    result['steps'] = {step: summarize(values, calls[0]) for step, (values, calls) in sorted(per_step.items())}
+    return result
+
+def synthetic_messages(flow, users, rounds):
+    """Trafik sintetis: ``users`` pengguna berjalan bersamaan (pesan diselang-seling)"""
+    for round_number in range(rounds):
+        for position in range(len(flow)):
+            for user in range(users):
+                yield f"62899{round_number:02d}{user:06d}", flow[position]
+
+def recorded_messages(log_base):
+    """Pesan dari log interaksi yang tersimpan: ``(phone, pesan)``"""
+    from interaction_log import iter_log_entries
+    return [(entry['phone_number'], entry['user_message'])
+            for entry in iter_log_entries(log_base)
+            if entry.get('phone_number') and entry.get('user_message')]
+
+def run_benchmark(users=200, rounds=3, log_base='python_message_logs'):
+    """Menjalankan semua skenario pada database yang sedang aktif"""
+    from chatbot import OrderBot
+    import whatsapp_bot
+
+    def orderbot_target():
+        bot = OrderBot()
+        sessions = bot.user_sessions
+        return bot.process_message, lambda phone: sessions[phone].step if phone in sessions else 'greeting'
+
+    def flask_target():
+        whatsapp_bot.user_sessions.clear()
+        sessions = whatsapp_bot.user_sessions
+        return (lambda message, phone: whatsapp_bot.process_order_flow(phone, message),
+                lambda phone: sessions[phone].step if phone in sessions else 'greeting')
+
+    scenarios = {}
+    recorded = recorded_messages(log_base)
+    if recorded:
+        scenarios['replay_orderbot'] = run_scenario(*orderbot_target(), recorded)
+        scenarios['replay_flask'] = run_scenario(*flask_target(), recorded)
+    scenarios['synthetic_orderbot'] = run_scenario(
+        *orderbot_target(), synthetic_messages(ORDERBOT_FLOW, users, rounds))
+    scenarios['synthetic_flask'] = run_scenario(
+        *flask_target(), synthetic_messages(FLASK_FLOW, users, rounds))
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'users': users,
+        'rounds': rounds,
+        'scenarios': scenarios,
+    }
+
+def print_report(results, baseline=None):
+    for name, result in results['scenarios'].items():
+        print(f"\n📊 {name}: {result['messages']} messages, {result['messages_per_sec']:,.0f} msg/s, "
+              f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+              f"{result['db_calls_per_message']} DB calls/msg")
+
+        previous = (baseline or {}).get('scenarios', {}).get(name)
+        if previous:
+            change = (result['messages_per_sec'] / previous['messages_per_sec'] - 1) * 100 \
+                if previous['messages_per_sec'] else 0.0
+            print(f"   vs baseline: {previous['messages_per_sec']:,.0f} msg/s ({change:+.1f}%), "
+                  f"p95 {previous['p95_ms']} ms, {previous['db_calls_per_message']} DB calls/msg")
+
+        print(f"   {'step':<20} {'msgs':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'DB/msg':>7}")
+        for step, stats in result['steps'].items():
+            print(f"   {step:<20} {stats['messages']:>6} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                  f"{stats['p99_ms']:>9} {stats['db_calls_per_message']:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OrderBot dan alur pesanan Flask")
+    parser.add_argument('--users', type=int, default=200, help="jumlah pengguna sintetis per putaran")
+    parser.add_argument('--rounds', type=int, default=3, help="jumlah putaran alur pesanan lengkap")
+    parser.add_argument('--log', default='python_message_logs', help="base path log untuk replay")
+    parser.add_argument('--save', help="simpan hasil ke file JSON")
+    parser.add_argument('--baseline', help="bandingkan dengan hasil JSON sebelumnya")
+    args = parser.parse_args()
+
+    log_base = os.path.abspath(args.log)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Database sementara dipilih sebelum modul bot diimport
+        os.environ['ORDERS_DB_PATH'] = os.path.join(tmp, 'orders.db')
+        os.environ.setdefault('WHATSAPP_FAKE_CLIENT', '1')
+
+        print("⏱️ BOT BENCHMARK")
+        print("=" * 60)
+        results = run_benchmark(args.users, args.rounds, log_base)
+        print_report(results, baseline)
+
+        from database import close_connection
+        close_connection()
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark time-to-first-paint per halaman dashboard Streamlit
+
+Setiap halaman dijalankan dengan ``streamlit.testing`` (AppTest) di proses
+Python baru yang hanya sudah memuat streamlit, seperti server Streamlit yang
+baru start. Dilaporkan waktu run pertama (termasuk import library halaman),
+waktu rerun, dan library berat yang dimuat oleh halaman tersebut. Database
+sementara diisi produk dan pesanan contoh sehingga chart ikut dirender.
+
+Pemakaian:
+    python benchmark_dashboard.py [--runs 3] [--orders 500] [--app streamlit_app.py]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PAGES = ["📊 Dashboard", "📋 Kelola Pesanan", "🛍️ Kelola Produk", "💬 WhatsApp Bot", "📈 Laporan"]
+
+# Library berat yang dicatat jika dimuat oleh halaman
+HEAVY_MODULES = ('pandas', 'numpy', 'plotly.express')
+
+PAGE_SNIPPET = """
+import json, sys, time
+import streamlit  # server Streamlit sudah memuat streamlit sebelum sesi pertama
+from streamlit.testing.v1 import AppTest
+
+heavy = {heavy!r}
+preloaded = [name for name in heavy if name in sys.modules]
+started = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=120)
+app.session_state['page'] = {page!r}
+app.run()
+first_paint = time.perf_counter() - started
+started = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - started
+print(json.dumps({{
+    'first_paint_ms': first_paint * 1000,
+    'rerun_ms': rerun * 1000,
+    'loaded': [name for name in heavy if name in sys.modules and name not in preloaded],
+    'errors': [str(error.value) for error in app.exception],
+}}))
+"""
+
+def seed_database(path, orders):
+    """Database contoh: produk default dan ``orders`` pesanan dengan status bervariasi"""
+    import database
+    from chatbot import OrderBot
+
+    original_path = database.DB_PATH
+    database.set_db_path(path)
+    try:
+        OrderBot().setup_default_products()
+        statuses = ['pending', 'confirmed', 'delivered', 'cancelled']
+        products = [(product[1], product[2]) for product in database.get_all_products()]
+        for number in range(orders):
+            name, price = products[number % len(products)]
+            order_id = database.add_order(f"Pelanggan {number}", f"62811{number:06d}", name,
+                                          1 + number % 3, price, "Jl. Contoh")
+            if number % 4:
+                database.update_order_status(order_id, statuses[number % 4])
+    finally:
+        database.set_db_path(original_path)
+
+def measure_page(app_path, page, workdir, db_path):
+    env = dict(os.environ,
+               PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''),
+               ORDERS_DB_PATH=db_path)
+    code = PAGE_SNIPPET.format(heavy=HEAVY_MODULES, app=app_path, page=page)
+    completed = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env,
+                               capture_output=True, text=True, timeout=300)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Page run failed: {completed.stderr.strip()[-500:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run_benchmark(app_path, runs=3, orders=500):
+    """Median first paint dan rerun per halaman"""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'orders.db')
+        seed_database(db_path, orders)
+        for page in PAGES:
+            samples = [measure_page(app_path, page, workdir, db_path) for _ in range(runs)]
+            results[page] = {
+                'first_paint_ms': round(statistics.median(s['first_paint_ms'] for s in samples), 1),
+                'rerun_ms': round(statistics.median(s['rerun_ms'] for s in samples), 1),
+                'loaded': samples[-1]['loaded'],
+                'errors': samples[-1]['errors'],
+            }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-first-paint per halaman dashboard")
+    parser.add_argument('--runs', type=int, default=3, help="jumlah proses per halaman (median)")
+    parser.add_argument('--orders', type=int, default=500, help="jumlah pesanan contoh")
+    parser.add_argument('--app', default=os.path.join(REPO_DIR, 'streamlit_app.py'),
+                        help="file aplikasi Streamlit (mis. versi lama untuk perbandingan)")
+    args = parser.parse_args()
+
+    print("🖥️ DASHBOARD FIRST PAINT BENCHMARK")
+    print("=" * 60)
+    results = run_benchmark(os.path.abspath(args.app), args.runs, args.orders)
+
+    print(f"{'page':<20} {'first paint':>12} {'rerun':>9}  heavy imports")
+    for page, result in results.items():
+        print(f"{page:<20} {result['first_paint_ms']:>9.1f} ms {result['rerun_ms']:>6.1f} ms  "
+              f"{', '.join(result['loaded']) or '-'}")
+        for error in result['errors']:
+            print(f"   ❌ {error}")
+    return 1 if any(result['errors'] for result in results.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start: waktu import modul bot dan waktu sampai respon pertama
+
+Setiap pengukuran dijalankan di proses Python baru (folder kerja dan database
+sementara), sehingga mencerminkan biaya yang dibayar setiap pemanggilan
+``process_message.py``, test, atau rerun Streamlit. Import modul tidak boleh
+menyentuh database, dan waktu import dibatasi ``--budget-ms``; jika terlampaui
+skrip keluar dengan kode 1 (bisa dipakai di CI).
+
+Pemakaian:
+    python benchmark_startup.py [--runs 5] [--budget-ms 75]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modul yang diimport oleh setiap pemanggilan CLI / test; wajib di bawah budget
+BUDGETED_MODULES = ('database', 'chatbot', 'process_message')
+# Hanya dilaporkan (Flask dan Twilio memang berat)
+REPORTED_MODULES = ('whatsapp_bot',)
+
+IMPORT_SNIPPET = """
+import json, os, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - started) * 1000,
+                  'db_touched': os.path.exists(os.environ['ORDERS_DB_PATH'])}}))
+"""
+
+FIRST_RESPONSE_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import process_message
+imported = time.perf_counter()
+response = process_message.handle_message('halo', '628000000001')
+answered = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000,
+                  'first_response_ms': (answered - started) * 1000,
+                  'ok': bool(response) and 'gangguan' not in response}))
+"""
+
+def run_snippet(code, workdir):
+    """Menjalankan kode di interpreter baru; mengembalikan (hasil JSON, waktu total ms)"""
+    env = dict(os.environ,
+               PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''),
+               ORDERS_DB_PATH=os.path.join(workdir, 'orders.db'),
+               WHATSAPP_FAKE_CLIENT='1')
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env,
+                               capture_output=True, text=True, timeout=120)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup snippet failed: {completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), wall_ms
+
+def measure_imports(modules, runs):
+    """Median waktu import per modul (database sementara kosong setiap run)"""
+    results = {}
+    for module in modules:
+        timings = []
+        touched = False
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as workdir:
+                result, _ = run_snippet(IMPORT_SNIPPET.format(module=module), workdir)
+            timings.append(result['import_ms'])
+            touched = touched or result['db_touched']
+        results[module] = {'import_ms': round(statistics.median(timings), 1), 'db_touched': touched}
+    return results
+
+def measure_first_response(runs):
+    """Waktu sampai respon pertama, untuk database baru (cold) dan yang sudah ada (warm)"""
+    results = {}
+    with tempfile.TemporaryDirectory() as warm_dir:
+        # Database warm disiapkan sekali (skema + produk contoh) sebelum diukur
+        run_snippet(FIRST_RESPONSE_SNIPPET, warm_dir)
+        for label in ('cold_db', 'warm_db'):
+            first_response, wall = [], []
+            ok = True
+            for _ in range(runs):
+                if label == 'cold_db':
+                    with tempfile.TemporaryDirectory() as workdir:
+                        result, wall_ms = run_snippet(FIRST_RESPONSE_SNIPPET, workdir)
+                else:
+                    result, wall_ms = run_snippet(FIRST_RESPONSE_SNIPPET, warm_dir)
+                first_response.append(result['first_response_ms'])
+                wall.append(wall_ms)
+                ok = ok and result['ok']
+            results[label] = {
+                'first_response_ms': round(statistics.median(first_response), 1),
+                'process_wall_ms': round(statistics.median(wall), 1),
+                'ok': ok,
+            }
+    return results
+
+def check_budget(imports, budget_ms, modules=BUDGETED_MODULES):
+    """Daftar pelanggaran: import melebihi budget atau menyentuh database"""
+    problems = []
+    for module in modules:
+        result = imports.get(module)
+        if result is None:
+            continue
+        if result['import_ms'] > budget_ms:
+            problems.append(f"import {module} took {result['import_ms']} ms (budget {budget_ms} ms)")
+        if result['db_touched']:
+            problems.append(f"import {module} touched the database")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu import dan respon pertama bot")
+    parser.add_argument('--runs', type=int, default=5, help="jumlah proses per pengukuran (median)")
+    parser.add_argument('--budget-ms', type=float, default=75, help="batas waktu import per modul")
+    args = parser.parse_args()
+
+    print("🚀 STARTUP BENCHMARK")
+    print("=" * 60)
+
+    imports = measure_imports(BUDGETED_MODULES + REPORTED_MODULES, args.runs)
+    for module, result in imports.items():
+        marker = " (not budgeted)" if module in REPORTED_MODULES else ""
+        print(f"📦 import {module:<16} {result['import_ms']:>7.1f} ms | "
+              f"DB touched: {'yes' if result['db_touched'] else 'no'}{marker}")
+
+    for label, result in measure_first_response(args.runs).items():
+        print(f"💬 first response ({label}): {result['first_response_ms']:.1f} ms in-process, "
+              f"{result['process_wall_ms']:.1f} ms incl. interpreter start"
+              f"{'' if result['ok'] else ' ❌ invalid response'}")
+
+    problems = check_budget(imports, args.budget_ms)
+    if problems:
+        print("\n❌ Startup budget exceeded:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+    print(f"\n✅ All imports within {args.budget_ms:.0f} ms budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Broadcast pesan sebagai job background: konkurensi terbatas, rate limit, dan resume
+"""
+
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import (
+    claim_broadcast_job, claim_broadcast_recipients, create_broadcast_job, finish_broadcast_job,
+    get_broadcast_job, get_running_broadcast_jobs, mark_broadcast_recipient,
+)
+
+class TokenBucket:
+    """Rate limiter token bucket: ``rate`` token per detik, burst maksimal ``capacity``"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Menunggu sampai satu token tersedia lalu memakainya"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+class BroadcastManager:
+    """Menjalankan job broadcast di thread background.
+
+    Setiap job menyimpan status per penerima di SQLite. Hasil kirim dicatat
+    segera setelah setiap pesan, sehingga job yang terhenti (restart) bisa
+    dilanjutkan tanpa mengirim ulang ke penerima yang sudah selesai. Lease
+    di tabel ``broadcast_jobs`` mencegah dua proses menjalankan job yang sama.
+    """
+
+    # Lease diperpanjang setiap batch; job dianggap yatim jika lease habis
+    LEASE_SECONDS = 60
+    # Batas pengambilan satu penerima jika hasil kirimnya tidak bisa dicatat
+    MAX_ATTEMPTS = 3
+    # Rate maksimal (pesan per detik) yang diterima endpoint broadcast
+    MAX_RATE = 1000
+
+    def __init__(self, send, concurrency=4, rate=10.0, batch_size=100):
+        self.send = send
+        self.concurrency = concurrency
+        self.rate = rate
+        self.batch_size = batch_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._resume_stop = threading.Event()
+
+    def start(self, message, phone_numbers, rate=None):
+        """Membuat job baru dan langsung menjalankannya; mengembalikan id job"""
+        job_id = create_broadcast_job(message, phone_numbers, rate or self.rate)
+        self.run_in_background(job_id, message, rate or self.rate)
+        return job_id
+
+    def resume_unfinished(self):
+        """Melanjutkan job yang belum selesai (mis. setelah restart); id job yang dilanjutkan"""
+        resumed = []
+        for job_id in get_running_broadcast_jobs():
+            job = get_broadcast_job(job_id)
+            if job and self.run_in_background(job_id, job['message'], job['rate'] or self.rate):
+                resumed.append(job_id)
+        return resumed
+
+    def start_resume_timer(self, interval=None):
+        """Thread background yang melanjutkan job terputus saat start lalu secara berkala.
+
+        Dicek berkala karena job proses lama baru bisa diambil alih setelah leasenya habis.
+        """
+        interval = interval or self.LEASE_SECONDS / 2
+        self._resume_stop.clear()
+
+        def loop():
+            while True:
+                try:
+                    self.resume_unfinished()
+                except Exception as e:
+                    print(f"Error resuming broadcasts: {e}")
+                if self._resume_stop.wait(interval):
+                    return
+
+        thread = threading.Thread(target=loop, name="broadcast-resume", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_resume_timer(self):
+        self._resume_stop.set()
+
+    def run_in_background(self, job_id, message, rate):
+        """Menjalankan job di thread baru jika lease berhasil diambil"""
+        with self._lock:
+            thread = self._threads.get(job_id)
+            if thread is not None and thread.is_alive():
+                return False
+            if not claim_broadcast_job(job_id, self.owner, self.LEASE_SECONDS):
+                return False
+            thread = threading.Thread(target=self.run, args=(job_id, message, rate),
+                                      name=f"broadcast-{job_id}", daemon=True)
+            self._threads[job_id] = thread
+            thread.start()
+            return True
+
+    def wait(self, job_id, timeout=None):
+        """Menunggu job selesai (untuk test / shutdown)"""
+        thread = self._threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+
+    def run(self, job_id, message, rate):
+        """Mengirim ke semua penerima yang masih pending, batch demi batch"""
+        bucket = TokenBucket(rate)
+        # Batch cukup kecil agar lease diperpanjang sebelum habis
+        batch_size = min(self.batch_size, max(self.concurrency, int(rate * self.LEASE_SECONDS / 2)))
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency,
+                                    thread_name_prefix=f"broadcast-{job_id}") as executor:
+                while claim_broadcast_job(job_id, self.owner, self.LEASE_SECONDS):
+                    recipients = claim_broadcast_recipients(job_id, batch_size, self.MAX_ATTEMPTS)
+                    if not recipients:
+                        finish_broadcast_job(job_id)
+                        return
+                    futures = [executor.submit(self._send_one, bucket, job_id, phone, message)
+                               for phone in recipients]
+                    for phone, future in zip(recipients, futures):
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self._record_failure(job_id, phone, e)
+        except Exception as e:
+            # Job tetap 'running' dan akan dilanjutkan setelah lease habis
+            print(f"Error running broadcast job {job_id}: {e}")
+
+    def _send_one(self, bucket, job_id, phone_number, message):
+        bucket.acquire()
+        try:
+            sid = self.send(phone_number, message)
+        except Exception as e:
+            mark_broadcast_recipient(job_id, phone_number, error=str(e))
+            return
+        mark_broadcast_recipient(job_id, phone_number, message_sid=sid,
+                                 error=None if sid else 'send failed')
+
+    def _record_failure(self, job_id, phone_number, error):
+        """Hasil kirim gagal dicatat: tandai penerima 'failed' agar tidak dikirimi ulang"""
+        print(f"Error sending broadcast job {job_id} to {phone_number}: {error}")
+        try:
+            mark_broadcast_recipient(job_id, phone_number, error=str(error))
+        except Exception as e:
+            # Tetap 'pending'; dicoba lagi sampai MAX_ATTEMPTS lalu ditandai 'failed'
+            print(f"Error recording broadcast result for {phone_number}: {e}")
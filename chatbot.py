@@ -1,10 +1,13 @@
 import re
-from database import add_order, get_product_by_name, add_product, get_all_products
+import metrics
+from database import add_order, get_product, get_product_by_name, find_product, add_product, get_all_products, get_table_cache_key
+from session_state import ChatSession
 
 class OrderBot:
     def __init__(self):
-        self.user_sessions = {}  # Menyimpan session percakapan user
-        self.setup_default_products()
+        self.user_sessions = {}  # Nomor HP -> ChatSession
+        self._catalog_cache = {}  # (lokasi database, versi tabel products) -> teks katalog
+        self._products_ready = False  # Produk default dicek saat pesan pertama
     
     def setup_default_products(self):
         """Setup produk default jika belum ada"""
@@ -18,43 +21,49 @@ class OrderBot:
     
     def process_message(self, message, phone_number):
         """Memproses pesan dari WhatsApp dan memberikan respon"""
+        if not self._products_ready:
+            self.setup_default_products()
+            self._products_ready = True
+        session = self.user_sessions.get(phone_number)
+        step = session.step if session else 'greeting'
+        with metrics.BOT_STEP_SECONDS.time('orderbot', step):
+            return self._process_message(message, phone_number)
+
+    def _process_message(self, message, phone_number):
         original_message = message.strip()
         message = message.strip().lower()
         
         # Inisialisasi session jika belum ada
         if phone_number not in self.user_sessions:
-            self.user_sessions[phone_number] = {
-                'step': 'greeting',
-                'order_data': {}
-            }
+            self.user_sessions[phone_number] = ChatSession()
         
         session = self.user_sessions[phone_number]
         
         # Check for order commands first (works from any state)
         if message.startswith('pesan '):
             product_name = self.parse_order_command(message)
-            session['step'] = 'waiting_product'
+            session.step = 'waiting_product'
             return self.handle_product_selection(product_name, phone_number)
         
         # Greeting dan menu utama
         if message in ['hi', 'halo', 'hai', 'hello', 'menu', 'mulai']:
-            session['step'] = 'main_menu'
+            session.step = 'main_menu'
             return self.show_main_menu()
         
         # Proses berdasarkan langkah saat ini
-        if session['step'] == 'greeting' or session['step'] == 'main_menu':
+        if session.step == 'greeting' or session.step == 'main_menu':
             return self.handle_main_menu_selection(message, phone_number)
         
-        elif session['step'] == 'waiting_product':
+        elif session.step == 'waiting_product':
             return self.handle_product_selection(message, phone_number)
         
-        elif session['step'] == 'waiting_quantity':
+        elif session.step == 'waiting_quantity':
             return self.handle_quantity_input(message, phone_number)
         
-        elif session['step'] == 'waiting_name':
+        elif session.step == 'waiting_name':
             return self.handle_name_input(original_message, phone_number)
         
-        elif session['step'] == 'waiting_address':
+        elif session.step == 'waiting_address':
             return self.handle_address_input(original_message, phone_number)
         
         else:
@@ -74,35 +83,44 @@ Ketik angka pilihan Anda (1-4) atau ketik nama produk langsung untuk memesan."""
         return menu
     
     def show_product_catalog(self):
-        """Menampilkan katalog produk"""
-        products = get_all_products()
+        """Menampilkan katalog produk (di-cache per database dan versi tabel products)"""
+        key = get_table_cache_key('products')
+        catalog = self._catalog_cache.get(key)
+        if catalog is None:
+            catalog = self.render_product_catalog(get_all_products())
+            self._catalog_cache = {key: catalog}
+        return catalog
+    
+    def render_product_catalog(self, products):
+        """Menyusun teks katalog produk"""
         if not products:
             return "Maaf, saat ini belum ada produk tersedia."
         
-        catalog = "📋 *MENU PRODUK KAMI:*\n\n"
+        parts = ["📋 *MENU PRODUK KAMI:*\n\n"]
         for product in products:
-            catalog += f"🍽️ *{product[1]}*\n"
-            catalog += f"💰 Harga: Rp {product[2]:,}\n"
-            catalog += f"📦 Stok: {product[3]}\n"
-            catalog += f"📝 {product[4]}\n"
-            catalog += "─" * 30 + "\n\n"
+            parts.append(f"🍽️ *{product[1]}*\n")
+            parts.append(f"💰 Harga: Rp {product[2]:,}\n")
+            parts.append(f"📦 Stok: {product[3]}\n")
+            parts.append(f"📝 {product[4]}\n")
+            parts.append("─" * 30 + "\n\n")
         
-        catalog += """💬 *CARA MEMESAN:*
+        parts.append("""💬 *CARA MEMESAN:*
 • Ketik: *pesan [nama produk]*
 • Contoh: *pesan keripik singkong*
 • Atau: *pesan kopi* (nama singkat)
 
-Atau pilih menu *2* untuk pemesanan step-by-step."""
-        return catalog
+Atau pilih menu *2* untuk pemesanan step-by-step.""")
+        return "".join(parts)
     
     def handle_product_selection(self, message, phone_number):
         """Menangani pemilihan produk"""
-        # Cari produk berdasarkan input user
-        product = get_product_by_name(message)
+        # Cari produk berdasarkan input user (toleran terhadap salah ketik)
+        product = find_product(message)
         
         if product:
-            self.user_sessions[phone_number]['order_data']['product'] = product
-            self.user_sessions[phone_number]['step'] = 'waiting_quantity'
+            session = self.user_sessions[phone_number]
+            session.product_id = product[0]
+            session.step = 'waiting_quantity'
             
             return f"""✅ Produk ditemukan: *{product[1]}*
 💰 Harga: Rp {product[2]:,}
@@ -113,6 +131,21 @@ Ketik angka saja (contoh: 2)"""
         else:
             return f"""❌ Produk "{message}" tidak ditemukan.
 
+{self.show_product_catalog()}"""
+    
+    def get_session_product(self, session):
+        """Baris produk terkini untuk session (None jika produk sudah dihapus)"""
+        if session.product_id is None:
+            return None
+        return get_product(session.product_id)
+    
+    def product_unavailable(self, session):
+        """Produk di session sudah tidak ada; minta user memilih produk lagi"""
+        session.product_id = None
+        session.quantity = None
+        session.step = 'waiting_product'
+        return f"""❌ Maaf, produk yang Anda pilih sudah tidak tersedia.
+
 {self.show_product_catalog()}"""
     
     def handle_quantity_input(self, message, phone_number):
@@ -122,12 +155,15 @@ Ketik angka saja (contoh: 2)"""
             if quantity <= 0:
                 return "❌ Jumlah harus lebih dari 0. Silakan masukkan jumlah yang valid."
             
-            product = self.user_sessions[phone_number]['order_data']['product']
+            session = self.user_sessions[phone_number]
+            product = self.get_session_product(session)
+            if product is None:
+                return self.product_unavailable(session)
             if quantity > product[3]:  # Cek stok
                 return f"❌ Stok tidak mencukupi. Stok tersedia: {product[3]}"
             
-            self.user_sessions[phone_number]['order_data']['quantity'] = quantity
-            self.user_sessions[phone_number]['step'] = 'waiting_name'
+            session.quantity = quantity
+            session.step = 'waiting_name'
             
             total = quantity * product[2]
             
@@ -147,8 +183,9 @@ Silakan masukkan nama Anda untuk pesanan ini:"""
         if len(message.strip()) < 2:
             return "❌ Nama terlalu pendek. Silakan masukkan nama lengkap Anda:"
         
-        self.user_sessions[phone_number]['order_data']['customer_name'] = message.strip().title()
-        self.user_sessions[phone_number]['step'] = 'waiting_address'
+        session = self.user_sessions[phone_number]
+        session.customer_name = message.strip().title()
+        session.step = 'waiting_address'
         
         return "📍 Silakan masukkan alamat pengiriman Anda:"
     
@@ -157,11 +194,13 @@ Silakan masukkan nama Anda untuk pesanan ini:"""
         if len(message.strip()) < 5:
             return "❌ Alamat terlalu pendek. Silakan masukkan alamat lengkap:"
         
-        # Finalisasi pesanan
-        order_data = self.user_sessions[phone_number]['order_data']
-        product = order_data['product']
-        quantity = order_data['quantity']
-        customer_name = order_data['customer_name']
+        # Finalisasi pesanan dengan harga produk saat ini
+        session = self.user_sessions[phone_number]
+        product = self.get_session_product(session)
+        if product is None:
+            return self.product_unavailable(session)
+        quantity = session.quantity
+        customer_name = session.customer_name
         address = message.strip()
         
         # Simpan ke database
@@ -175,7 +214,7 @@ Silakan masukkan nama Anda untuk pesanan ini:"""
         )
         
         # Reset session
-        self.user_sessions[phone_number] = {'step': 'greeting', 'order_data': {}}
+        self.user_sessions[phone_number] = ChatSession()
         
         total = quantity * product[2]
         
@@ -202,7 +241,7 @@ Ketik *menu* untuk kembali ke menu utama."""
             return self.show_product_catalog()
         
         elif message == '2':
-            session['step'] = 'waiting_product'
+            session.step = 'waiting_product'
             return """🛒 *PESAN MAKANAN*
 
 Silakan ketik nama produk yang ingin Anda pesan.
@@ -240,8 +279,8 @@ Ketik "menu" untuk kembali ke menu utama."""
             # Jika input tidak sesuai menu, coba cari sebagai nama produk
             product = get_product_by_name(message)
             if product:
-                session['step'] = 'waiting_quantity'
-                session['order_data']['product'] = product
+                session.step = 'waiting_quantity'
+                session.product_id = product[0]
                 return f"""✅ Produk ditemukan: *{product[1]}*
 💰 Harga: Rp {product[2]:,}
 📦 Stok tersedia: {product[3]}
@@ -265,5 +304,18 @@ Ketik angka saja (contoh: 2)"""
         # Handle direct product name
         return message
 
-# Instance global bot
-order_bot = OrderBot()
+# Instance global bot, dibuat saat pertama kali dipakai (``chatbot.order_bot``)
+_order_bot = None
+
+def get_order_bot():
+    """Instance global OrderBot (dibuat sekali)"""
+    global _order_bot
+    if _order_bot is None:
+        _order_bot = OrderBot()
+    return _order_bot
+
+def __getattr__(name):
+    # ``from chatbot import order_bot`` tetap berfungsi tanpa membuat bot saat import
+    if name == 'order_bot':
+        return get_order_bot()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
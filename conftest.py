@@ -0,0 +1,40 @@
+"""
+Fixture pytest bersama untuk test yang memakai database
+"""
+
+import sys
+
+import pytest
+
+import database
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Arahkan database ke file sementara per test; lokasi dan cache dikembalikan setelahnya.
+
+    Index produk dan cache katalog dikosongkan agar tidak membawa isi database lain.
+    """
+    path = str(tmp_path / 'orders.db')
+    monkeypatch.setattr(database, 'DB_PATH', path)
+    monkeypatch.setattr(database, '_product_index', None)
+    monkeypatch.setattr(database, '_product_index_key', None)
+    if 'chatbot' in sys.modules:
+        monkeypatch.setattr(sys.modules['chatbot'], '_order_bot', None)
+    if 'whatsapp_bot' in sys.modules:
+        monkeypatch.setattr(sys.modules['whatsapp_bot'], '_catalog_cache', {})
+    yield path
+    database.close_connection()
+
+@pytest.fixture
+def whatsapp_app(temp_db, monkeypatch):
+    """Modul whatsapp_bot dengan client Twilio palsu dan session kosong di database sementara"""
+    monkeypatch.setenv('WHATSAPP_FAKE_CLIENT', '1')
+    import whatsapp_bot
+    from outbound import FakeTwilioClient
+
+    monkeypatch.setattr(whatsapp_bot, 'client', FakeTwilioClient())
+    monkeypatch.setattr(whatsapp_bot, 'user_sessions', {})
+    monkeypatch.setattr(whatsapp_bot, '_catalog_cache', {})
+    yield whatsapp_bot
+    # Jangan biarkan pesan antrian terkirim lewat client milik test berikutnya
+    whatsapp_bot.outbound_queue.drain(timeout=5)
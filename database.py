@@ -1,9 +1,91 @@
+import json
+import os
 import sqlite3
-from datetime import datetime
+import threading
+from datetime import date, datetime, timedelta
+from product_index import ProductIndex
+from session_state import compact_session
+import metrics
+
+# Lokasi database, bisa diganti lewat environment variable atau set_db_path()
+DB_PATH = os.getenv('ORDERS_DB_PATH', 'orders.db')
+
+# Pragma untuk setiap koneksi baru. WAL membuat pembaca (dashboard) tidak
+# memblokir penulis (bot) dan sebaliknya.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Satu koneksi per thread yang dipakai ulang oleh semua fungsi database
+_local = threading.local()
+
+# Lokasi database yang skemanya sudah dicek di proses ini (lihat _ensure_schema)
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+# Index nama produk di memori beserta (lokasi database, versi tabel products)
+# saat dibangun; versi saja tidak cukup karena database lain bisa punya versi sama
+_product_index = None
+_product_index_key = None
+_product_index_lock = threading.Lock()
+
+def set_db_path(path):
+    """Mengganti lokasi database; koneksi lama akan dibuka ulang otomatis"""
+    global DB_PATH
+    DB_PATH = path
+    close_connection()
+
+def get_connection():
+    """Mengambil koneksi database milik thread saat ini (dibuat sekali)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == DB_PATH:
+        return conn
+    
+    close_connection()
+    conn = sqlite3.connect(DB_PATH, timeout=5)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    
+    _local.conn = conn
+    _local.path = DB_PATH
+    if DB_PATH not in _schema_ready:
+        _ensure_schema(conn)
+    return conn
+
+def _ensure_schema(conn):
+    """Cek skema sekali per lokasi database saat koneksi pertama dibuka.
+
+    Database yang ``user_version``-nya sudah terbaru cukup dicek dengan satu
+    PRAGMA; tabel dibuat dan migrasi dijalankan hanya jika versinya tertinggal.
+    """
+    with _schema_lock:
+        if DB_PATH in _schema_ready:
+            return
+        if get_schema_version(conn) < SCHEMA_VERSION:
+            _create_schema(conn)
+        _schema_ready.add(DB_PATH)
+
+def close_connection():
+    """Menutup koneksi database milik thread saat ini"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
 
 def init_database():
-    """Inisialisasi database untuk menyimpan pesanan"""
-    conn = sqlite3.connect('orders.db')
+    """Inisialisasi database untuk menyimpan pesanan.
+
+    Tidak wajib dipanggil: skema juga disiapkan otomatis saat koneksi pertama.
+    """
+    conn = get_connection()
+    _create_schema(conn)
+
+def _create_schema(conn):
     cursor = conn.cursor()
     
     # Tabel untuk menyimpan pesanan
@@ -35,81 +117,671 @@ def init_database():
     ''')
     
     conn.commit()
-    conn.close()
+    
+    # Evolusi skema berikutnya lewat migrasi bernomor
+    migrate_database(conn)
+
+def _table_version_triggers(table):
+    """SQL trigger yang menaikkan versi tabel setiap INSERT/UPDATE/DELETE"""
+    statements = [f"INSERT OR IGNORE INTO table_versions (name, version) VALUES ('{table}', 0)"]
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END
+        ''')
+    return statements
+
+def _status_sql(row):
+    """Status pesanan dengan default 'pending' (prefix row: '', 'NEW', 'OLD')"""
+    prefix = f"{row}." if row else ''
+    return f"COALESCE({prefix}status, 'pending')"
+
+def _rollup_add_sql(row):
+    """SQL trigger untuk menambahkan satu pesanan ke rollup daily_sales"""
+    return f'''
+            INSERT INTO daily_sales (day, product_name, status, order_count, quantity, revenue)
+            VALUES (date({row}.order_date), {row}.product_name, {_status_sql(row)}, 1, {row}.quantity, {row}.total_amount)
+            ON CONFLICT (day, product_name, status) DO UPDATE SET
+                order_count = order_count + 1,
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue;'''
 
+def _rollup_remove_sql(row):
+    """SQL trigger untuk mengurangi satu pesanan dari rollup daily_sales"""
+    key = f"day = date({row}.order_date) AND product_name = {row}.product_name AND status = {_status_sql(row)}"
+    return f'''
+            UPDATE daily_sales SET
+                order_count = order_count - 1,
+                quantity = quantity - {row}.quantity,
+                revenue = revenue - {row}.total_amount
+            WHERE {key};
+            DELETE FROM daily_sales WHERE {key} AND order_count <= 0;'''
+
+def add_column_if_missing(conn, table, column, definition):
+    """Menambah kolom jika belum ada (untuk langkah migrasi yang idempoten)"""
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+def compact_stored_sessions(conn):
+    """Menulis ulang session tersimpan ke format ringkas (produk sebagai id)"""
+    rows = conn.execute('SELECT phone_number, data FROM user_sessions').fetchall()
+    updates = []
+    for phone_number, data in rows:
+        compact = json.dumps(compact_session(json.loads(data)), ensure_ascii=False)
+        if compact != data:
+            updates.append((compact, phone_number))
+    conn.executemany('UPDATE user_sessions SET data = ? WHERE phone_number = ?', updates)
+
+# Migrasi skema berurutan. Migrasi ke-N (mulai dari 1) dijalankan jika
+# PRAGMA user_version < N. Setiap langkah berupa SQL atau fungsi(conn) dan
+# harus idempoten, mis. CREATE ... IF NOT EXISTS atau add_column_if_missing.
+# Tambahkan migrasi baru di akhir list; jangan ubah migrasi yang sudah ada.
+MIGRATIONS = [
+    # 1: versi perubahan per tabel, dinaikkan otomatis oleh trigger
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        *_table_version_triggers('products'),
+    ],
+    # 2: session percakapan, satu baris per nomor HP
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            phone_number TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ],
+    # 3: index untuk urutan tanggal dan filter status / pelanggan pada orders
+    [
+        "CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders (order_date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_status_date ON orders (status, order_date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_phone_date ON orders (phone_number, order_date, id)",
+    ],
+    # 4: versi perubahan tabel orders (untuk invalidasi cache dashboard)
+    [
+        *_table_version_triggers('orders'),
+    ],
+    # 5: rollup penjualan harian per (hari, produk, status), dijaga trigger
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            day TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_name, status)
+        ) WITHOUT ROWID
+        ''',
+        # Backfill sekali dari riwayat pesanan
+        "DELETE FROM daily_sales",
+        f'''
+        INSERT INTO daily_sales (day, product_name, status, order_count, quantity, revenue)
+        SELECT date(order_date), product_name, {_status_sql('')}, COUNT(*), SUM(quantity), SUM(total_amount)
+        FROM orders
+        GROUP BY 1, 2, 3
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_sales_insert AFTER INSERT ON orders
+        BEGIN
+            {_rollup_add_sql('NEW')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_sales_update
+        AFTER UPDATE OF product_name, quantity, total_amount, status, order_date ON orders
+        BEGIN
+            {_rollup_remove_sql('OLD')}
+            {_rollup_add_sql('NEW')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_sales_delete AFTER DELETE ON orders
+        BEGIN
+            {_rollup_remove_sql('OLD')}
+        END
+        ''',
+    ],
+    # 6: job broadcast di background (bisa dilanjutkan setelah restart)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS broadcast_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            rate REAL,
+            lease_owner TEXT,
+            lease_expires REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            job_id INTEGER NOT NULL REFERENCES broadcast_jobs (id),
+            position INTEGER NOT NULL,
+            phone_number TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            message_sid TEXT,
+            error TEXT,
+            sent_at TIMESTAMP,
+            PRIMARY KEY (job_id, position),
+            UNIQUE (job_id, phone_number)
+        ) WITHOUT ROWID
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_status "
+        "ON broadcast_recipients (job_id, status, position)",
+    ],
+    # 7: session ringkas: id produk, bukan seluruh baris produk
+    [
+        compact_stored_sessions,
+    ],
+    # 8: jumlah percobaan kirim per penerima broadcast (dibatasi, lihat claim_broadcast_recipients)
+    [
+        lambda conn: add_column_if_missing(conn, 'broadcast_recipients', 'attempts', 'INTEGER NOT NULL DEFAULT 0'),
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn=None):
+    """Versi skema database saat ini (PRAGMA user_version)"""
+    conn = conn or get_connection()
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate_database(conn=None):
+    """Menjalankan migrasi yang belum diterapkan, masing-masing dalam satu transaksi"""
+    conn = conn or get_connection()
+    
+    while get_schema_version(conn) < SCHEMA_VERSION:
+        # BEGIN IMMEDIATE mengunci penulis lain; cek ulang versi setelah terkunci
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version = get_schema_version(conn)
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                break
+            
+            for step in MIGRATIONS[version]:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
 def add_order(customer_name, phone_number, product_name, quantity, price, delivery_address=""):
     """Menambah pesanan baru ke database"""
-    conn = sqlite3.connect('orders.db')
-    cursor = conn.cursor()
+    conn = get_connection()
     
     total_amount = quantity * price
     
-    cursor.execute('''
-        INSERT INTO orders (customer_name, phone_number, product_name, quantity, price, total_amount, delivery_address)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (customer_name, phone_number, product_name, quantity, price, total_amount, delivery_address))
-    
-    order_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    with conn:
+        cursor = conn.execute('''
+            INSERT INTO orders (customer_name, phone_number, product_name, quantity, price, total_amount, delivery_address)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (customer_name, phone_number, product_name, quantity, price, total_amount, delivery_address))
     
-    return order_id
+    return cursor.lastrowid
 
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
 def get_all_orders():
     """Mengambil semua pesanan dari database"""
-    conn = sqlite3.connect('orders.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM orders ORDER BY order_date DESC')
-    orders = cursor.fetchall()
-    
-    conn.close()
-    return orders
+    conn = get_connection()
+    return conn.execute('SELECT * FROM orders ORDER BY order_date DESC').fetchall()
 
+def iter_orders(after_id=0, batch_size=1000):
+    """Mengalirkan pesanan berurutan id (id > after_id) tanpa memuat semuanya"""
+    conn = get_connection()
+    while True:
+        rows = conn.execute(
+            'SELECT * FROM orders WHERE id > ? ORDER BY id LIMIT ?', (after_id, batch_size)
+        ).fetchall()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1][0]
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
 def update_order_status(order_id, status):
     """Update status pesanan"""
-    conn = sqlite3.connect('orders.db')
-    cursor = conn.cursor()
+    conn = get_connection()
+    with conn:
+        conn.execute('UPDATE orders SET status = ? WHERE id = ?', (status, order_id))
+
+def _order_filters(status=None, date_from=None, date_to=None, customer=None, phone_number=None):
+    """Menyusun klausa WHERE untuk filter pesanan (tanggal inklusif)"""
+    clauses = []
+    params = []
     
-    cursor.execute('UPDATE orders SET status = ? WHERE id = ?', (status, order_id))
+    if status:
+        clauses.append('status = ?')
+        params.append(status)
+    if date_from:
+        clauses.append('order_date >= ?')
+        params.append(f"{date_from} 00:00:00")
+    if date_to:
+        if isinstance(date_to, str):
+            date_to = date.fromisoformat(date_to)
+        clauses.append('order_date < ?')
+        params.append(f"{date_to + timedelta(days=1)} 00:00:00")
+    if customer:
+        clauses.append('customer_name LIKE ?')
+        params.append(f"%{customer}%")
+    if phone_number:
+        clauses.append('phone_number = ?')
+        params.append(phone_number)
     
-    conn.commit()
-    conn.close()
+    return clauses, params
+
+def _where_sql(clauses):
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_orders_page(limit=20, after=None, **filters):
+    """Mengambil satu halaman pesanan terbaru dengan keyset pagination.
+    
+    ``after`` adalah ``(order_date, id)`` dari baris terakhir halaman
+    sebelumnya; query memakai index sehingga biaya tergantung ukuran
+    halaman, bukan jumlah seluruh pesanan.
+    """
+    clauses, params = _order_filters(**filters)
+    if after is not None:
+        clauses.append('(order_date, id) < (?, ?)')
+        params.extend(after)
+    
+    where = _where_sql(clauses)
+    conn = get_connection()
+    return conn.execute(f'''
+        SELECT * FROM orders {where}
+        ORDER BY order_date DESC, id DESC
+        LIMIT ?
+    ''', (*params, limit)).fetchall()
 
+def get_latest_orders(limit=10):
+    """Mengambil N pesanan terbaru"""
+    return get_orders_page(limit)
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_orders(**filters):
+    """Mengambil semua pesanan yang cocok dengan filter, terbaru lebih dulu"""
+    clauses, params = _order_filters(**filters)
+    where = _where_sql(clauses)
+    conn = get_connection()
+    return conn.execute(f'SELECT * FROM orders {where} ORDER BY order_date DESC, id DESC', params).fetchall()
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def count_orders(**filters):
+    """Jumlah pesanan yang cocok dengan filter"""
+    clauses, params = _order_filters(**filters)
+    where = _where_sql(clauses)
+    conn = get_connection()
+    return conn.execute(f'SELECT COUNT(*) FROM orders {where}', params).fetchone()[0]
+
+def _rollup_filters(date_from=None, date_to=None):
+    """Klausa WHERE untuk tabel daily_sales (tanggal inklusif)"""
+    clauses = []
+    params = []
+    if date_from:
+        clauses.append('day >= ?')
+        params.append(str(date_from))
+    if date_to:
+        clauses.append('day <= ?')
+        params.append(str(date_to))
+    return clauses, params
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_order_summary(date_from=None, date_to=None):
+    """Ringkasan pesanan dari rollup: jumlah, pendapatan, rata-rata, pending, delivered"""
+    clauses, params = _rollup_filters(date_from, date_to)
+    conn = get_connection()
+    total_orders, total_revenue, pending_orders, delivered_orders = conn.execute(f'''
+        SELECT COALESCE(SUM(order_count), 0), COALESCE(SUM(revenue), 0),
+               COALESCE(SUM(CASE WHEN status = 'pending' THEN order_count END), 0),
+               COALESCE(SUM(CASE WHEN status = 'delivered' THEN order_count END), 0)
+        FROM daily_sales {_where_sql(clauses)}
+    ''', params).fetchone()
+    return {
+        'total_orders': total_orders,
+        'total_revenue': total_revenue,
+        'avg_order': total_revenue / total_orders if total_orders else 0,
+        'pending_orders': pending_orders,
+        'delivered_orders': delivered_orders,
+    }
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_daily_sales(date_from=None, date_to=None):
+    """Jumlah pesanan dan pendapatan per hari: list (tanggal, jumlah, pendapatan)"""
+    clauses, params = _rollup_filters(date_from, date_to)
+    conn = get_connection()
+    return conn.execute(f'''
+        SELECT day, SUM(order_count), SUM(revenue) FROM daily_sales {_where_sql(clauses)}
+        GROUP BY day ORDER BY day
+    ''', params).fetchall()
+
+def get_daily_order_counts(date_from=None, date_to=None):
+    """Jumlah pesanan per hari: list (tanggal, jumlah)"""
+    return [(day, count) for day, count, _ in get_daily_sales(date_from, date_to)]
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_status_counts(date_from=None, date_to=None):
+    """Jumlah pesanan per status: list (status, jumlah)"""
+    clauses, params = _rollup_filters(date_from, date_to)
+    conn = get_connection()
+    return conn.execute(f'''
+        SELECT status, SUM(order_count) AS total FROM daily_sales {_where_sql(clauses)}
+        GROUP BY status HAVING total > 0 ORDER BY total DESC
+    ''', params).fetchall()
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_best_sellers(limit=None, date_from=None, date_to=None):
+    """Produk terlaris berdasarkan jumlah unit: list (produk, unit, pendapatan)"""
+    clauses, params = _rollup_filters(date_from, date_to)
+    conn = get_connection()
+    return conn.execute(f'''
+        SELECT product_name, SUM(quantity) AS units, SUM(revenue) FROM daily_sales {_where_sql(clauses)}
+        GROUP BY product_name HAVING units > 0 ORDER BY units DESC, product_name
+        LIMIT ?
+    ''', (*params, -1 if limit is None else limit)).fetchall()
+
+def get_sales_report(date_from=None, date_to=None, top_products=10):
+    """Laporan penjualan untuk rentang tanggal (inklusif), dihitung dari rollup.
+
+    Mengembalikan dict berisi ``summary`` (lihat get_order_summary), ``daily``
+    (tanggal, jumlah, pendapatan), ``best_sellers`` (produk, unit, pendapatan)
+    dan ``status_counts`` (status, jumlah). Baris detail pesanan tidak ikut
+    diambil; gunakan get_orders(date_from=..., date_to=...) bila diperlukan.
+    """
+    return {
+        'summary': get_order_summary(date_from, date_to),
+        'daily': get_daily_sales(date_from, date_to),
+        'best_sellers': get_best_sellers(top_products, date_from, date_to),
+        'status_counts': get_status_counts(date_from, date_to),
+    }
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_order_date_range():
+    """Tanggal pesanan pertama dan terakhir (None jika belum ada pesanan)"""
+    conn = get_connection()
+    first = conn.execute('SELECT MIN(order_date) FROM orders').fetchone()[0]
+    last = conn.execute('SELECT MAX(order_date) FROM orders').fetchone()[0]
+    if first is None:
+        return None, None
+    return date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
 def add_product(name, price, stock, description="", category=""):
     """Menambah produk ke katalog"""
-    conn = sqlite3.connect('orders.db')
-    cursor = conn.cursor()
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute('''
+            INSERT INTO products (name, price, stock, description, category)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (name, price, stock, description, category))
+        product = conn.execute('SELECT * FROM products WHERE id = ?', (cursor.lastrowid,)).fetchone()
+        version = _table_version(conn, 'products')
     
-    cursor.execute('''
-        INSERT INTO products (name, price, stock, description, category)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (name, price, stock, description, category))
+    # Update index secara incremental jika tidak ada perubahan lain di antaranya
+    _update_product_index(version, product)
+    return product[0]
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def update_product_stock(product_id, stock):
+    """Update stok produk"""
+    conn = get_connection()
+    with conn:
+        conn.execute('UPDATE products SET stock = ? WHERE id = ?', (stock, product_id))
+        product = conn.execute('SELECT * FROM products WHERE id = ?', (product_id,)).fetchone()
+        version = _table_version(conn, 'products')
     
-    conn.commit()
-    conn.close()
+    if product:
+        _update_product_index(version, product)
 
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
 def get_all_products():
     """Mengambil semua produk dari database"""
-    conn = sqlite3.connect('orders.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM products')
-    products = cursor.fetchall()
-    
-    conn.close()
-    return products
+    return _all_products(get_connection())
+
+def _all_products(conn):
+    return conn.execute('SELECT * FROM products').fetchall()
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_product(product_id):
+    """Mengambil produk berdasarkan id dari index di memori (None jika sudah dihapus)"""
+    return _get_product_index().get(product_id)
 
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
 def get_product_by_name(product_name):
     """Mencari produk berdasarkan nama"""
-    conn = sqlite3.connect('orders.db')
-    cursor = conn.cursor()
+    return _get_product_index().search(product_name)
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def find_product(product_name):
+    """Mencari produk berdasarkan nama, toleran terhadap salah ketik"""
+    index = _get_product_index()
+    product = index.search(product_name)
+    if product is None:
+        matches = index.fuzzy_search(product_name, limit=1)
+        if matches:
+            product = matches[0][1]
+    return product
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_table_version(name):
+    """Versi perubahan sebuah tabel (naik setiap INSERT/UPDATE/DELETE)"""
+    return _table_version(get_connection(), name)
+
+def _table_version(conn, name):
+    row = conn.execute('SELECT version FROM table_versions WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else 0
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_table_cache_key(name):
+    """Kunci cache untuk isi sebuah tabel: (lokasi database, versi tabel)"""
+    return (DB_PATH, _table_version(get_connection(), name))
+
+def _get_product_index():
+    """Index nama produk, dibangun ulang jika database diganti atau tabel products berubah"""
+    global _product_index, _product_index_key
     
-    cursor.execute('SELECT * FROM products WHERE LOWER(name) LIKE LOWER(?)', (f'%{product_name}%',))
-    product = cursor.fetchone()
+    conn = get_connection()
+    key = (DB_PATH, _table_version(conn, 'products'))
+    with _product_index_lock:
+        if _product_index is None or _product_index_key != key:
+            _product_index = ProductIndex(_all_products(conn))
+            _product_index_key = key
+        return _product_index
+
+def _update_product_index(version, product):
+    """Terapkan satu perubahan produk ke index yang sudah ada"""
+    global _product_index_key
     
-    conn.close()
-    return product
+    with _product_index_lock:
+        # Jika versi melompat (ada penulis lain), index dibangun ulang saat dipakai
+        if _product_index is not None and _product_index_key == (DB_PATH, version - 1):
+            _product_index.update(product)
+            _product_index_key = (DB_PATH, version)
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_session(phone_number):
+    """Mengambil session percakapan untuk satu nomor HP (None jika belum ada)"""
+    conn = get_connection()
+    row = conn.execute('SELECT data FROM user_sessions WHERE phone_number = ?', (phone_number,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def save_session(phone_number, session):
+    """Menyimpan session percakapan untuk satu nomor HP"""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO user_sessions (phone_number, data, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(phone_number) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+        ''', (phone_number, json.dumps(session, ensure_ascii=False)))
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def delete_session(phone_number):
+    """Menghapus session percakapan untuk satu nomor HP"""
+    conn = get_connection()
+    with conn:
+        conn.execute('DELETE FROM user_sessions WHERE phone_number = ?', (phone_number,))
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_all_sessions():
+    """Mengambil semua session (untuk monitoring, bukan untuk jalur pesan)"""
+    conn = get_connection()
+    rows = conn.execute('SELECT phone_number, data FROM user_sessions').fetchall()
+    return {phone_number: json.loads(data) for phone_number, data in rows}
+
+def migrate_sessions_from_json(path='user_sessions.json'):
+    """Migrasi satu kali dari user_sessions.json ke tabel user_sessions.
+
+    Session disimpan dalam format ringkas dan yang sudah ada di database tidak
+    ditimpa. Setelah berhasil, file diganti nama menjadi ``<path>.migrated``
+    agar migrasi tidak diulang. File yang rusak dibiarkan di tempatnya dan
+    menghasilkan ValueError.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            sessions = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path} is not valid JSON: {e}") from e
+    if not isinstance(sessions, dict):
+        raise ValueError(f"{path} does not contain a session object")
+    
+    conn = get_connection()
+    with conn:
+        conn.executemany('''
+            INSERT OR IGNORE INTO user_sessions (phone_number, data)
+            VALUES (?, ?)
+        ''', [(phone, json.dumps(compact_session(session), ensure_ascii=False))
+              for phone, session in sessions.items()])
+    
+    os.replace(path, f"{path}.migrated")
+    return len(sessions)
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def create_broadcast_job(message, phone_numbers, rate=None):
+    """Membuat job broadcast; nomor duplikat hanya dikirimi sekali. Mengembalikan id job"""
+    conn = get_connection()
+    with conn:
+        job_id = conn.execute(
+            'INSERT INTO broadcast_jobs (message, rate) VALUES (?, ?)', (message, rate)
+        ).lastrowid
+        conn.executemany('''
+            INSERT OR IGNORE INTO broadcast_recipients (job_id, position, phone_number)
+            VALUES (?, ?, ?)
+        ''', [(job_id, position, phone) for position, phone in enumerate(phone_numbers)])
+    return job_id
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_broadcast_job(job_id):
+    """Status job broadcast beserta jumlah penerima per status (None jika tidak ada)"""
+    conn = get_connection()
+    job = conn.execute(
+        'SELECT id, message, status, rate, created_at, finished_at FROM broadcast_jobs WHERE id = ?',
+        (job_id,)
+    ).fetchone()
+    if job is None:
+        return None
+
+    counts = dict(conn.execute('''
+        SELECT status, COUNT(*) FROM broadcast_recipients WHERE job_id = ? GROUP BY status
+    ''', (job_id,)).fetchall())
+    return {
+        'job_id': job[0],
+        'message': job[1],
+        'status': job[2],
+        'rate': job[3],
+        'created_at': job[4],
+        'finished_at': job[5],
+        'total': sum(counts.values()),
+        'sent': counts.get('sent', 0),
+        'failed': counts.get('failed', 0),
+        'pending': counts.get('pending', 0),
+    }
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def claim_broadcast_recipients(job_id, limit=100, max_attempts=3):
+    """Penerima pending berikutnya (urut daftar asal); setiap pengambilan dihitung satu percobaan.
+
+    Penerima yang sudah diambil ``max_attempts`` kali tanpa hasil tercatat
+    (mis. pencatatan hasil kirim gagal) ditandai 'failed' agar tidak dikirimi terus.
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            UPDATE broadcast_recipients
+            SET status = 'failed', error = 'max attempts exceeded', sent_at = CURRENT_TIMESTAMP
+            WHERE job_id = ? AND status = 'pending' AND attempts >= ?
+        ''', (job_id, max_attempts))
+        rows = conn.execute('''
+            SELECT position, phone_number FROM broadcast_recipients
+            WHERE job_id = ? AND status = 'pending'
+            ORDER BY position LIMIT ?
+        ''', (job_id, limit)).fetchall()
+        conn.executemany('''
+            UPDATE broadcast_recipients SET attempts = attempts + 1 WHERE job_id = ? AND position = ?
+        ''', [(job_id, position) for position, _ in rows])
+    return [phone_number for _, phone_number in rows]
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def mark_broadcast_recipient(job_id, phone_number, message_sid=None, error=None):
+    """Mencatat hasil kirim untuk satu penerima (sent jika ada message_sid)"""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            UPDATE broadcast_recipients
+            SET status = ?, message_sid = ?, error = ?, sent_at = CURRENT_TIMESTAMP
+            WHERE job_id = ? AND phone_number = ?
+        ''', ('sent' if message_sid else 'failed', message_sid, error, job_id, phone_number))
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def claim_broadcast_job(job_id, owner, lease_seconds):
+    """Mengambil/memperpanjang hak menjalankan job; False jika dipegang proses lain"""
+    now = datetime.now().timestamp()
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute('''
+            UPDATE broadcast_jobs SET lease_owner = ?, lease_expires = ?
+            WHERE id = ? AND status = 'running'
+              AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires < ?)
+        ''', (owner, now + lease_seconds, job_id, owner, now))
+    return cursor.rowcount == 1
+
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def finish_broadcast_job(job_id, status='completed'):
+    """Menandai job broadcast selesai dan melepas lease"""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            UPDATE broadcast_jobs
+            SET status = ?, finished_at = CURRENT_TIMESTAMP, lease_owner = NULL, lease_expires = NULL
+            WHERE id = ?
+        ''', (status, job_id))
 
-# Inisialisasi database saat import
-init_database()
+@metrics.timed_function(metrics.DB_CALL_SECONDS, metrics.DB_CALL_ERRORS)
+def get_running_broadcast_jobs():
+    """Id job broadcast yang belum selesai (untuk dilanjutkan setelah restart)"""
+    conn = get_connection()
+    return [row[0] for row in conn.execute(
+        "SELECT id FROM broadcast_jobs WHERE status = 'running' ORDER BY id"
+    ).fetchall()]
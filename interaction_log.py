@@ -0,0 +1,223 @@
+"""
+Log interaksi append-only dalam format JSON Lines dengan rotasi segmen
+"""
+
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+
+class JsonlLogSink:
+    """Penulis log JSON Lines yang di-buffer dan ditulis oleh thread background.
+
+    Setiap entri hanya di-append ke segmen aktif (``<base>.<nomor>.jsonl``).
+    Jika segmen sudah berisi ``segment_entries`` baris, segmen baru dibuat dan
+    segmen paling lama dihapus sehingga hanya ``max_segments`` yang tersisa.
+    Biaya per entri tetap konstan berapapun besar riwayat log.
+
+    ``on_segment_closed(base_path, nomor)`` dipanggil untuk setiap segmen yang
+    sudah penuh sebelum retensi berjalan (mis. untuk diarsipkan). Jika
+    ``can_remove_segment(base_path, nomor)`` diberikan, retensi hanya menghapus
+    segmen yang disetujuinya (mis. yang sudah tercatat di arsip); segmen lain
+    tetap disimpan dan dicek lagi pada rotasi berikutnya.
+    """
+
+    def __init__(self, base_path, segment_entries=250, max_segments=4, flush_interval=1.0,
+                 on_segment_closed=None, can_remove_segment=None):
+        self.base_path = base_path
+        self.segment_entries = segment_entries
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.on_segment_closed = on_segment_closed
+        self.can_remove_segment = can_remove_segment
+
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+
+        # Diisi saat flush pertama
+        self._segment = None
+        self._segment_count = 0
+
+        atexit.register(self.close)
+
+    def write(self, entry):
+        """Menambah satu entri ke buffer (diserialisasi saat itu juga)"""
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._buffer_lock:
+            self._buffer.append(line)
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Menulis seluruh isi buffer ke segmen aktif"""
+        with self._write_lock:
+            with self._buffer_lock:
+                lines, self._buffer = self._buffer, []
+
+            if not lines:
+                return
+
+            if self._segment is None:
+                self._open_latest_segment()
+
+            while lines:
+                room = self.segment_entries - self._segment_count
+                if room <= 0:
+                    self._rotate()
+                    continue
+
+                chunk, lines = lines[:room], lines[room:]
+                with open(self.segment_path(self._segment), 'a', encoding='utf-8') as f:
+                    f.write("\n".join(chunk) + "\n")
+                self._segment_count += len(chunk)
+
+    def close(self):
+        """Menghentikan thread background dan menulis sisa buffer"""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def segment_path(self, number):
+        """Path file untuk segmen dengan nomor tertentu"""
+        return segment_path(self.base_path, number)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing log {self.base_path}: {e}")
+
+    def _open_latest_segment(self):
+        numbers = list_segments(self.base_path)
+        if not numbers:
+            self._segment = 1
+            self._segment_count = 0
+            return
+
+        # Hitung baris segmen terakhir sekali saja per proses
+        self._segment = numbers[-1]
+        with open(self.segment_path(self._segment), 'rb') as f:
+            self._segment_count = sum(1 for _ in f)
+
+    def _rotate(self):
+        if self.on_segment_closed is not None:
+            try:
+                self.on_segment_closed(self.base_path, self._segment)
+            except Exception as e:
+                print(f"Error closing log segment {self.base_path}: {e}")
+
+        self._segment += 1
+        self._segment_count = 0
+
+        # Retensi: hapus segmen yang sudah di luar jendela max_segments
+        for number in list_segments(self.base_path):
+            if number <= self._segment - self.max_segments:
+                if not self._removable(number):
+                    continue
+                try:
+                    os.remove(self.segment_path(number))
+                except FileNotFoundError:
+                    pass
+
+    def _removable(self, number):
+        if self.can_remove_segment is None:
+            return True
+        try:
+            return self.can_remove_segment(self.base_path, number)
+        except Exception as e:
+            print(f"Error checking log segment {self.base_path} {number}: {e}")
+            return False
+
+def segment_path(base_path, number):
+    """Path file segmen log ``<base>.<nomor>.jsonl``"""
+    return f"{base_path}.{number:06d}.jsonl"
+
+def list_segments(base_path):
+    """Daftar nomor segmen yang ada untuk sebuah log, terurut dari yang lama"""
+    pattern = re.compile(re.escape(os.path.basename(base_path)) + r'\.(\d+)\.jsonl')
+    numbers = []
+    for path in glob.glob(f"{glob.escape(base_path)}.*.jsonl"):
+        match = pattern.fullmatch(os.path.basename(path))
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+def iter_log_entries(base_path):
+    """Membaca semua entri log secara berurutan: file JSON lama lalu segmen JSONL"""
+    try:
+        with open(f"{base_path}.json", 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    for number in list_segments(base_path):
+        try:
+            with open(segment_path(base_path, number), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Baris terakhir bisa terpotong jika proses mati saat menulis
+                        continue
+        except FileNotFoundError:
+            continue
+
+def iter_log_records(base_path, position=None, on_gap=None):
+    """Membaca entri log mulai dari ``position``: yield ``(posisi, entri)``.
+
+    Posisi adalah ``(segmen, offset)``; segmen 0 berarti file JSON lama dengan
+    offset = jumlah entri, segmen lain memakai offset byte setelah baris
+    tersebut. Posisi entri terakhir bisa disimpan sebagai checkpoint lalu
+    diberikan lagi agar hanya entri baru yang dibaca. Baris yang belum
+    selesai ditulis (tanpa newline) belum dibaca.
+
+    Jika ``position`` diberikan dan ada segmen sejak posisi itu yang sudah
+    dihapus rotasi sebelum sempat dibaca (termasuk segmen posisi itu sendiri),
+    ``on_gap(nomor_segmen)`` dipanggil sekali dengan daftar nomornya.
+    """
+    segment, offset = position or (0, 0)
+    numbers = list_segments(base_path)
+    if position is not None and on_gap is not None and numbers:
+        missing = [number for number in range(max(segment, 1), numbers[-1]) if number not in numbers]
+        if missing:
+            on_gap(missing)
+
+    if segment == 0:
+        try:
+            with open(f"{base_path}.json", 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            legacy = []
+        for index in range(offset, len(legacy)):
+            yield (0, index + 1), legacy[index]
+
+    for number in numbers:
+        if number < segment:
+            # Segmen ini sudah dibaca
+            continue
+        start = offset if number == segment else 0
+        try:
+            with open(segment_path(base_path, number), 'rb') as f:
+                f.seek(start)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    start += len(line)
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    yield (number, start), entry
+        except FileNotFoundError:
+            continue
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Load test endpoint /webhook dengan client Twilio palsu
+
+Banyak nomor HP simulasi menjalankan alur pesanan lengkap (sapaan → menu →
+produk → nama → jumlah → alamat) secara bersamaan dengan laju request yang
+bisa diatur. Secara default server Flask dijalankan lokal (thread) dengan
+database sementara dan ``FakeTwilioClient``; gunakan ``--url`` dan ``--db``
+untuk menguji server yang sudah berjalan (jalankan dengan
+WHATSAPP_FAKE_CLIENT=1). Di akhir dilaporkan throughput, latensi, error
+rate, dan apakah ada pesanan yang hilang atau dobel di database.
+
+Pemakaian:
+    python loadtest_webhook.py [--users 100] [--rate 200] [--concurrency 16]
+    python loadtest_webhook.py --url http://localhost:5001/webhook --db orders.db
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmark_bot import FLASK_FLOW, percentile
+
+def start_local_server():
+    """Menjalankan whatsapp_bot di thread dengan client palsu; mengembalikan (url, server, modul)"""
+    os.environ['WHATSAPP_FAKE_CLIENT'] = '1'
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from chatbot import OrderBot
+    import whatsapp_bot
+
+    # Produk contoh di database sementara agar alur pesanan bisa selesai
+    OrderBot().setup_default_products()
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass  # Log akses per request terlalu ramai saat load test
+
+    server = make_server('127.0.0.1', 0, whatsapp_bot.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/webhook", server, whatsapp_bot
+
+def run_load(url, phones, rate, concurrency, flow=FLASK_FLOW, timeout=30):
+    """Setiap nomor menjalankan ``flow`` berurutan; banyak nomor berjalan paralel"""
+    from broadcast import TokenBucket
+
+    bucket = TokenBucket(rate)
+    users = queue.Queue()
+    for phone in phones:
+        users.put(phone)
+
+    lock = threading.Lock()
+    latencies = []
+    errors = []
+    completed = []
+
+    def worker():
+        session = requests.Session()
+        while True:
+            try:
+                phone = users.get_nowait()
+            except queue.Empty:
+                return
+            ok = True
+            for message in flow:
+                bucket.acquire()
+                started = time.perf_counter()
+                try:
+                    response = session.post(url, data={'From': f'whatsapp:{phone}', 'Body': message},
+                                            timeout=timeout)
+                    error = None if response.status_code == 200 else f"HTTP {response.status_code}"
+                except requests.RequestException as e:
+                    error = type(e).__name__
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if error:
+                        errors.append(error)
+                if error:
+                    ok = False
+                    break
+            if ok:
+                with lock:
+                    completed.append(phone)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'users': len(phones),
+        'completed_users': len(completed),
+        'completed_phones': completed,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_rate': len(errors) / len(latencies) if latencies else 0.0,
+        'error_types': {error: errors.count(error) for error in set(errors)},
+        'duration': duration,
+        'throughput': len(latencies) / duration if duration else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+def check_orders(db_path, phones, completed_phones):
+    """Pesanan per nomor di database: nomor selesai tanpa pesanan (hilang) atau >1 (dobel)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        counts = {}
+        phone_list = list(phones)
+        for start in range(0, len(phone_list), 500):
+            chunk = phone_list[start:start + 500]
+            rows = conn.execute(
+                f"SELECT phone_number, COUNT(*) FROM orders WHERE phone_number IN ({','.join('?' * len(chunk))}) "
+                f"GROUP BY phone_number", chunk
+            ).fetchall()
+            counts.update(rows)
+    finally:
+        conn.close()
+
+    return {
+        'orders': sum(counts.values()),
+        'lost': sorted(phone for phone in completed_phones if counts.get(phone, 0) == 0),
+        'duplicated': sorted(phone for phone, count in counts.items() if count > 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test endpoint /webhook")
+    parser.add_argument('--users', type=int, default=100, help="jumlah nomor HP simulasi")
+    parser.add_argument('--rate', type=float, default=200, help="laju request maksimal (request/detik)")
+    parser.add_argument('--concurrency', type=int, default=16, help="jumlah pengguna yang aktif bersamaan")
+    parser.add_argument('--url', help="URL webhook server yang sudah berjalan (default: server lokal)")
+    parser.add_argument('--db', help="database server untuk cek pesanan (wajib bersama --url)")
+    args = parser.parse_args()
+
+    run_id = int(time.time()) % 100000
+    phones = [f"6287{run_id:05d}{user:05d}" for user in range(args.users)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        whatsapp_bot = None
+        if args.url:
+            url, db_path = args.url, args.db
+        else:
+            db_path = os.path.join(tmp, 'orders.db')
+            os.environ['ORDERS_DB_PATH'] = db_path
+            url, server, whatsapp_bot = start_local_server()
+
+        print("🔥 WEBHOOK LOAD TEST")
+        print("=" * 60)
+        print(f"Target: {url} | users: {args.users} | rate: {args.rate:.0f} req/s | "
+              f"concurrency: {args.concurrency}")
+
+        result = run_load(url, phones, args.rate, args.concurrency)
+
+        print(f"\n📨 Requests: {result['requests']} in {result['duration']:.2f} s "
+              f"({result['throughput']:.1f} req/s)")
+        print(f"⏱️ Latency: p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+              f"p99 {result['p99_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+        print(f"❌ Errors: {result['errors']} ({result['error_rate'] * 100:.2f}%) {result['error_types'] or ''}")
+        print(f"✅ Users completed flow: {result['completed_users']}/{result['users']}")
+
+        if whatsapp_bot is not None:
+            drained = whatsapp_bot.outbound_queue.drain(timeout=30)
+            stats = whatsapp_bot.outbound_queue.stats()
+            print(f"📤 Replies sent by fake Twilio: {len(whatsapp_bot.client.sent)} "
+                  f"(failed {stats['failed']}, queue drained: {drained})")
+
+        healthy = result['errors'] == 0
+        if db_path:
+            orders = check_orders(db_path, phones, result['completed_phones'])
+            print(f"🗄️ Orders in DB: {orders['orders']} | lost: {len(orders['lost'])} | "
+                  f"duplicated: {len(orders['duplicated'])}")
+            healthy = healthy and not orders['lost'] and not orders['duplicated']
+
+        if whatsapp_bot is not None:
+            server.shutdown()
+            from database import close_connection
+            close_connection()
+
+    print("\n✅ Load test passed" if healthy else "\n❌ Load test found problems")
+    return 0 if healthy else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
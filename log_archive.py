@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Arsip kolom terkompresi untuk segmen log interaksi yang sudah dirotasi
+
+Segmen JSON Lines yang sudah ditutup (dan file JSON lama) dipadatkan ke
+``<base>.archive/<nomor>.parquet`` (butuh pyarrow) atau ``<nomor>.npz``
+(NumPy) sehingga riwayat panjang tetap tersimpan walau segmen aktif dirotasi.
+``index.json`` di folder arsip mencatat rentang waktu dan kolom tiap file
+agar pembaca bisa melewati file di luar rentang waktu yang diminta.
+
+Pengarsipan memuat pandas/pyarrow, jadi jangan dijalankan di jalur pesan:
+pakai ``archive_in_background`` sebagai ``on_segment_closed`` atau jalankan
+CLI ini dari cron. Satu file kunci per log membuat proses pengarsip berjalan
+bergantian sehingga ``index.json`` tidak saling menimpa.
+
+Pemakaian: python log_archive.py [--through NOMOR] [base_path ...]
+"""
+
+import json
+import os
+import subprocess
+import sys
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa kunci antar proses
+    fcntl = None
+
+from interaction_log import list_segments, segment_path
+
+DEFAULT_LOGS = ('python_message_logs', 'session_debug')
+INDEX_FILE = 'index.json'
+LOCK_FILE = '.lock'
+LOG_FILE = 'archive.log'
+
+# Segmen 0 = file JSON lama (<base>.json)
+LEGACY_SEGMENT = 0
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        return None
+
+def archive_dir(base_path):
+    """Folder arsip untuk sebuah log"""
+    return f"{base_path}.archive"
+
+def load_index(base_path):
+    """Isi index arsip: {nama file: {segment, rows, start, end, columns}}"""
+    try:
+        with open(os.path.join(archive_dir(base_path), INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+@contextmanager
+def _archive_lock(base_path):
+    """Kunci arsip sebuah log (menunggu jika sedang dipegang proses lain)"""
+    os.makedirs(archive_dir(base_path), exist_ok=True)
+    with open(os.path.join(archive_dir(base_path), LOCK_FILE), 'a') as f:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _save_index(base_path, index):
+    path = os.path.join(archive_dir(base_path), INDEX_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+def archived_segments(base_path):
+    """Nomor segmen yang sudah ada di arsip"""
+    return sorted(info['segment'] for info in load_index(base_path).values())
+
+def is_archived(base_path, number):
+    """Callback ``can_remove_segment``: segmen boleh dihapus setelah tercatat di index arsip"""
+    return number in archived_segments(base_path)
+
+def _read_segment(base_path, number):
+    if number == LEGACY_SEGMENT:
+        try:
+            with open(f"{base_path}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    entries = []
+    with open(segment_path(base_path, number), 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+def entries_to_frame(entries):
+    """DataFrame kolom dari entri log; nilai bertingkat (dict/list) disimpan sebagai JSON"""
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(entries)
+    for column in frame.columns:
+        if column == 'timestamp':
+            frame[column] = pd.to_datetime(frame[column], format='ISO8601', errors='coerce')
+        elif frame[column].map(lambda value: isinstance(value, (dict, list))).any():
+            frame[column] = frame[column].map(
+                lambda value: value if value is None else json.dumps(value, ensure_ascii=False))
+    return frame
+
+def _write_frame(frame, path_without_ext):
+    pyarrow = _pyarrow()
+    if pyarrow is not None:
+        path = f"{path_without_ext}.parquet"
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        pyarrow.parquet.write_table(table, path, compression='zstd')
+        return path
+
+    import numpy as np
+
+    # Tanpa pyarrow: satu array per kolom (+ mask null) dalam .npz terkompresi
+    arrays = {}
+    for column in frame.columns:
+        values = frame[column]
+        if column == 'timestamp':
+            arrays[column] = values.to_numpy(dtype='datetime64[us]')
+            continue
+        arrays[f"{column}__null"] = values.isna().to_numpy()
+        arrays[column] = np.array(values.fillna('').astype(str).tolist(), dtype=str)
+    path = f"{path_without_ext}.npz"
+    np.savez_compressed(path, **arrays)
+    return path
+
+def archive_segment(base_path, number):
+    """Memadatkan satu segmen (0 = file JSON lama) ke arsip; dilewati jika sudah ada"""
+    with _archive_lock(base_path):
+        return _archive_segment(base_path, number)
+
+def _archive_segment(base_path, number):
+    index = load_index(base_path)
+    if any(info['segment'] == number for info in index.values()):
+        return None
+
+    entries = _read_segment(base_path, number)
+    if not entries:
+        return None
+
+    frame = entries_to_frame(entries)
+    path = _write_frame(frame, os.path.join(archive_dir(base_path), f"{number:06d}"))
+
+    timestamps = frame['timestamp'].dropna() if 'timestamp' in frame else []
+    index[os.path.basename(path)] = {
+        'segment': number,
+        'rows': len(frame),
+        'start': timestamps.min().isoformat() if len(timestamps) else None,
+        'end': timestamps.max().isoformat() if len(timestamps) else None,
+        'columns': list(frame.columns),
+    }
+    _save_index(base_path, index)
+    return path
+
+def archive_closed_segments(base_path, through=None):
+    """Mengarsipkan file JSON lama dan semua segmen kecuali segmen aktif (terakhir).
+
+    ``through`` menandai segmen terakhir yang sudah ditutup, untuk dipakai saat
+    segmen berikutnya belum dibuat.
+    """
+    segments = list_segments(base_path)
+    if through is None:
+        closed = segments[:-1]
+    else:
+        closed = [number for number in segments if number <= through]
+
+    archived = []
+    with _archive_lock(base_path):
+        for number in [LEGACY_SEGMENT] + closed:
+            try:
+                path = _archive_segment(base_path, number)
+            except Exception as e:
+                print(f"Error archiving {base_path} segment {number}: {e}")
+                continue
+            if path:
+                archived.append(path)
+    return archived
+
+def archive_in_background(base_path, number):
+    """Callback ``on_segment_closed``: arsipkan di proses terpisah (pandas tidak dimuat di proses pemanggil).
+
+    Output dan error proses pengarsip ditambahkan ke ``<base>.archive/archive.log``.
+    """
+    os.makedirs(archive_dir(base_path), exist_ok=True)
+    with open(os.path.join(archive_dir(base_path), LOG_FILE), 'ab') as log:
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--through', str(number), os.path.abspath(base_path)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True)
+
+def _read_file(path, columns):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns).to_pandas()
+
+    import numpy as np
+    import pandas as pd
+
+    data = {}
+    # NpzFile memuat array secara lazy: hanya kolom yang diminta dibaca
+    with np.load(path) as npz:
+        for column in columns:
+            values = npz[column]
+            null_key = f"{column}__null"
+            if null_key in npz.files:
+                values = pd.Series(values, dtype=object).mask(npz[null_key])
+            data[column] = values
+    return pd.DataFrame(data)
+
+def read_archive(base_path, columns=None, start=None, end=None):
+    """Membaca arsip log sebagai DataFrame.
+
+    ``columns`` membatasi kolom yang dibaca; ``start``/``end`` (datetime,
+    inklusif) memfilter timestamp, dan file di luar rentang dilewati lewat
+    index tanpa dibuka.
+    """
+    import pandas as pd
+
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    frames = []
+    index = load_index(base_path)
+    for name, info in sorted(index.items(), key=lambda item: item[1]['segment']):
+        if start is not None and info['end'] and pd.Timestamp(info['end']) < start:
+            continue
+        if end is not None and info['start'] and pd.Timestamp(info['start']) > end:
+            continue
+
+        wanted = [column for column in (columns or info['columns']) if column in info['columns']]
+        if (start is not None or end is not None) and 'timestamp' not in wanted:
+            frame = _read_file(os.path.join(archive_dir(base_path), name), wanted + ['timestamp'])
+        else:
+            frame = _read_file(os.path.join(archive_dir(base_path), name), wanted)
+
+        if start is not None:
+            frame = frame[frame['timestamp'] >= start]
+        if end is not None:
+            frame = frame[frame['timestamp'] <= end]
+        frames.append(frame[wanted])
+
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    result = pd.concat(frames, ignore_index=True)
+    return result.reindex(columns=columns) if columns else result
+
+def load_log_frame(base_path, columns=None, start=None, end=None):
+    """Riwayat lengkap log: arsip ditambah segmen (dan file JSON lama) yang belum diarsipkan"""
+    import pandas as pd
+
+    archived = set(archived_segments(base_path))
+    frame = read_archive(base_path, columns, start, end)
+
+    pending = []
+    if LEGACY_SEGMENT not in archived:
+        pending.extend(_read_segment(base_path, LEGACY_SEGMENT))
+    for number in list_segments(base_path):
+        if number not in archived:
+            try:
+                pending.extend(_read_segment(base_path, number))
+            except FileNotFoundError:
+                continue
+    if not pending:
+        return frame
+
+    live = entries_to_frame(pending)
+    if start is not None:
+        live = live[live['timestamp'] >= pd.Timestamp(start)]
+    if end is not None:
+        live = live[live['timestamp'] <= pd.Timestamp(end)]
+    if columns:
+        live = live.reindex(columns=columns)
+    return pd.concat([frame, live], ignore_index=True) if len(frame) else live.reset_index(drop=True)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    through = None
+    if args[:1] == ['--through']:
+        through = int(args[1])
+        args = args[2:]
+    for base in args or DEFAULT_LOGS:
+        paths = archive_closed_segments(base, through)
+        print(f"📦 {base}: {len(paths)} segment(s) archived")
+        for path in paths:
+            print(f"  {path}")
@@ -0,0 +1,213 @@
+"""
+Metrik in-process (counter, gauge, histogram) dalam format teks Prometheus
+
+Dipakai untuk mengukur latensi per langkah FSM bot, per fungsi database, dan
+per pengiriman pesan keluar. Observasi histogram hanya ditambahkan ke deque
+(tanpa lock) dan digabung ke bucket secara batch, sehingga murah di hot path.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Bucket latensi (detik): query SQLite bisa di bawah 1 ms, kirim API bisa detik
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(labels, self._copy(value)) for labels, value in series]
+        for label_values, value in series:
+            lines.extend(self._render_series(label_values, value))
+        return lines
+
+    def _copy(self, value):
+        return value
+
+    def _render_series(self, label_values, value):
+        return [f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}"]
+
+class Counter(_Metric):
+    """Nilai yang hanya bertambah (mis. jumlah error)"""
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._series.get(label_values, 0)
+
+class Gauge(_Metric):
+    """Nilai sesaat (mis. kedalaman antrian)"""
+    kind = 'gauge'
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._series[label_values] = value
+
+    def value(self, *label_values):
+        return self._series.get(label_values, 0)
+
+class Histogram(_Metric):
+    """Distribusi nilai (latensi) per kombinasi label, dengan bucket tetap"""
+    kind = 'histogram'
+
+    # Batas observasi yang ditampung sebelum digabung ke bucket
+    FLUSH_EVERY = 4096
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._pending = deque()
+
+    def observe(self, value, *label_values):
+        # deque.append atomik tanpa lock; observasi digabung ke bucket secara batch
+        self._pending.append((label_values, value))
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self._flush()
+
+    def time(self, *label_values):
+        """Context manager yang mencatat durasi blok ``with``"""
+        return _Timer(self, label_values)
+
+    def count(self, *label_values):
+        self._flush()
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def clear(self):
+        self._pending.clear()
+        super().clear()
+
+    def render(self):
+        self._flush()
+        return super().render()
+
+    def _flush(self):
+        buckets = self.buckets
+        with self._lock:
+            while True:
+                try:
+                    label_values, value = self._pending.popleft()
+                except IndexError:
+                    return
+                series = self._series.get(label_values)
+                if series is None:
+                    # [jumlah per bucket (+Inf di akhir), total nilai, jumlah observasi]
+                    series = self._series[label_values] = [[0] * (len(buckets) + 1), 0.0, 0]
+                series[0][bisect_left(buckets, value)] += 1
+                series[1] += value
+                series[2] += 1
+
+    def _copy(self, value):
+        return [list(value[0]), value[1], value[2]]
+
+    def _render_series(self, label_values, value):
+        bucket_counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+            cumulative += bucket_count
+            le = f'le="{_format_number(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+        labels = _format_labels(self.labels, label_values)
+        lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class _Timer:
+    __slots__ = ('histogram', 'label_values', 'started')
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+        return False
+
+def timed_function(histogram, errors=None):
+    """Dekorator: durasi fungsi dicatat di ``histogram`` (dan exception di ``errors``) dengan label nama fungsi"""
+    def decorator(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc(name)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, name)
+
+        return wrapper
+    return decorator
+
+def render():
+    """Semua metrik terdaftar dalam format teks Prometheus"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def reset():
+    """Mengosongkan semua nilai metrik (untuk test)"""
+    for metric in _registry:
+        metric.clear()
+
+# Metrik bot: dipakai oleh chatbot.py, whatsapp_bot.py, dan database.py
+BOT_STEP_SECONDS = Histogram(
+    'bot_step_duration_seconds', 'Waktu memproses satu pesan per langkah FSM', ('bot', 'step'))
+DB_CALL_SECONDS = Histogram(
+    'db_call_duration_seconds', 'Durasi panggilan fungsi database.py', ('function',))
+DB_CALL_ERRORS = Counter(
+    'db_call_errors_total', 'Panggilan fungsi database.py yang melempar exception', ('function',))
+OUTBOUND_SEND_SECONDS = Histogram(
+    'outbound_send_duration_seconds', 'Durasi satu pengiriman pesan ke Twilio', ('result',))
+OUTBOUND_QUEUE = Gauge(
+    'outbound_queue_messages', 'Pesan di antrian kirim menurut keadaan', ('state',))
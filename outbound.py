@@ -0,0 +1,187 @@
+"""
+Antrian pengiriman pesan keluar (outbound) dengan worker pool, retry, dan metrik
+"""
+
+import atexit
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+class FakeMessage:
+    def __init__(self, sid):
+        self.sid = sid
+
+class FakeMessages:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, body, from_, to):
+        return self._client._create(body, from_, to)
+
+class FakeTwilioClient:
+    """Pengganti ``twilio.rest.Client`` untuk uji offline.
+
+    Pesan yang "terkirim" disimpan di ``sent``. ``latency`` mensimulasikan
+    waktu round trip API dan ``fail_first`` membuat N panggilan pertama gagal
+    (untuk menguji retry).
+    """
+
+    def __init__(self, latency=0.0, fail_first=0):
+        self.messages = FakeMessages(self)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.sent = []
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _create(self, body, from_, to):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.fail_first:
+                raise ConnectionError("Fake Twilio error")
+            sid = f"SMFAKE{next(self._ids):08d}"
+            self.sent.append({'sid': sid, 'from': from_, 'to': to, 'body': body})
+        return FakeMessage(sid)
+
+def is_retryable(error):
+    """Error 4xx dari Twilio (kecuali 429) tidak akan berhasil jika diulang"""
+    status = getattr(error, 'status', None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status != 429)
+
+class OutboundQueue:
+    """Antrian pesan keluar yang dikirim oleh beberapa thread worker.
+
+    Setiap worker punya antrian sendiri dan semua pesan ke nomor yang sama
+    masuk ke worker yang sama (``hash(to) % workers``), sehingga pesan ke satu
+    nomor terkirim berurutan dan tidak pernah bersamaan.
+
+    ``send(to, body)`` harus melempar exception jika gagal. Pengiriman yang
+    gagal diulang hingga ``max_retries`` kali dengan backoff eksponensial
+    (``backoff``, ``backoff * 2``, ... maksimal ``max_backoff`` detik) di
+    worker tersebut; pesan berikutnya untuk nomor yang sama menunggu di
+    belakangnya. Worker dijalankan saat pesan pertama masuk.
+    """
+
+    def __init__(self, send, workers=4, max_retries=3, backoff=0.5, max_backoff=30.0,
+                 latency_window=1000):
+        self.send = send
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._lanes = [queue.Queue() for _ in range(workers)]
+        self._threads = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._latencies = deque(maxlen=latency_window)
+        self._pending = 0
+        self._in_flight = 0
+        self._waiting_retry = 0
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+
+        atexit.register(self.drain, 5)
+
+    def enqueue(self, to, body):
+        """Memasukkan pesan ke antrian dan langsung kembali"""
+        with self._lock:
+            self._pending += 1
+            if not self._threads:
+                self._start_workers()
+        self._lanes[hash(to) % self.workers].put((to, body))
+
+    def drain(self, timeout=None):
+        """Menunggu sampai semua pesan terkirim atau gagal; True jika kosong"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stats(self):
+        """Kedalaman antrian, jumlah terkirim/gagal, dan latensi kirim (ms)"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'queue_depth': sum(lane.qsize() for lane in self._lanes),
+                'in_flight': self._in_flight,
+                'waiting_retry': self._waiting_retry,
+                'pending': self._pending,
+                'sent': self._sent,
+                'failed': self._failed,
+                'retried': self._retried,
+                'workers': len(self._threads),
+            }
+
+        if latencies:
+            stats['latency_ms'] = {
+                'avg': round(sum(latencies) / len(latencies) * 1000, 2),
+                'p50': round(latencies[len(latencies) // 2] * 1000, 2),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+                'max': round(latencies[-1] * 1000, 2),
+            }
+        else:
+            stats['latency_ms'] = None
+        return stats
+
+    def _start_workers(self):
+        for number, lane in enumerate(self._lanes):
+            thread = threading.Thread(target=self._run, args=(lane,), name=f"outbound-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self, lane):
+        while True:
+            to, body = lane.get()
+            self._deliver(to, body)
+            lane.task_done()
+
+    def _deliver(self, to, body):
+        attempt = 0
+        while True:
+            with self._lock:
+                self._in_flight += 1
+
+            started = time.perf_counter()
+            try:
+                self.send(to, body)
+                error = None
+            except Exception as e:
+                error = e
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._in_flight -= 1
+                self._latencies.append(elapsed)
+                if error is None:
+                    self._sent += 1
+                    self._finish()
+                    return
+                if attempt >= self.max_retries or not is_retryable(error):
+                    self._failed += 1
+                    print(f"Error sending message to {to}: {error}")
+                    self._finish()
+                    return
+                self._retried += 1
+                self._waiting_retry += 1
+
+            attempt += 1
+            time.sleep(min(self.max_backoff, self.backoff * (2 ** (attempt - 1))))
+            with self._lock:
+                self._waiting_retry -= 1
+
+    def _finish(self):
+        # Dipanggil dengan self._lock terkunci
+        self._pending -= 1
+        if not self._pending:
+            self._idle.notify_all()
@@ -3,7 +3,56 @@ import json
 import datetime
 import traceback
 import os
-from chatbot import order_bot
+import socket
+import socketserver
+import threading
+from interaction_log import JsonlLogSink
+from log_archive import archive_in_background, is_archived
+from profiling import MessageProfiler
+from session_state import ChatSession
+from database import get_session, save_session, migrate_sessions_from_json
+
+# Respon default jika CLI dipanggil tanpa argumen yang lengkap
+DEFAULT_RESPONSE = """🤖 *Warung Digital Bot*
+
+Halo! Selamat datang di layanan pemesanan otomatis kami.
+
+Ketik salah satu:
+• *menu* - Lihat menu lengkap
+• *pesan* - Mulai pemesanan
+• *bantuan* - Panduan penggunaan
+
+Atau ketik *halo* untuk memulai percakapan."""
+
+# Lokasi Unix socket worker (opsional); jika ada, CLI meneruskan pesan ke worker
+SOCKET_PATH = os.getenv('PROCESS_MESSAGE_SOCKET', '')
+
+# Worker memproses satu pesan dalam satu waktu agar session tidak saling tumpang tindih.
+# Mode socket memakai satu thread pemroses tetap (dibuat saat dibutuhkan), sehingga
+# semua koneksi client berbagi satu koneksi SQLite milik thread tersebut.
+_process_lock = threading.Lock()
+_message_executor = None
+_executor_lock = threading.Lock()
+
+# Log interaksi dan debug session (JSON Lines, ~1000 dan ~500 entri terakhir);
+# segmen yang sudah penuh diarsipkan ke <base>.archive/ oleh proses terpisah (lihat log_archive.py)
+# dan baru dihapus setelah tercatat di arsip
+message_log = JsonlLogSink('python_message_logs', segment_entries=250, max_segments=4,
+                           on_segment_closed=archive_in_background, can_remove_segment=is_archived)
+session_log = JsonlLogSink('session_debug', segment_entries=125, max_segments=4,
+                           on_segment_closed=archive_in_background, can_remove_segment=is_archived)
+
+# Profiling sebagian pesan (PROFILE_SAMPLE_RATE), file profil per langkah FSM
+message_profiler = MessageProfiler.from_env('process_message')
+
+# File session lama yang dimigrasi ke tabel user_sessions
+LEGACY_SESSIONS_FILE = 'user_sessions.json'
+_sessions_migrated = False
+
+def get_order_bot():
+    """Import chatbot hanya saat dibutuhkan agar mode client tetap ringan"""
+    from chatbot import get_order_bot as get_chatbot
+    return get_chatbot()
 
 def log_interaction(phone_number, message, response, error=None):
     """Log interaksi untuk debugging dan monitoring"""
@@ -16,40 +65,41 @@ def log_interaction(phone_number, message, response, error=None):
             "error": error
         }
         
-        # Baca existing log atau buat baru
-        try:
-            with open('python_message_logs.json', 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            logs = []
-        
-        logs.append(log_entry)
-        
-        # Simpan hanya 1000 log terakhir untuk mencegah file terlalu besar
-        if len(logs) > 1000:
-            logs = logs[-1000:]
-        
-        with open('python_message_logs.json', 'w', encoding='utf-8') as f:
-            json.dump(logs, f, indent=2, ensure_ascii=False)
+        # Append ke log JSON Lines; retensi diatur lewat rotasi segmen
+        message_log.write(log_entry)
             
     except Exception as log_error:
         print(f"Error logging: {log_error}")
 
-def load_sessions():
-    """Memuat session dari file"""
+def load_session(phone_number):
+    """Memuat session satu nomor HP dari session store"""
+    _migrate_legacy_sessions()
     try:
-        with open('user_sessions.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+        return get_session(phone_number)
+    except Exception as e:
+        print(f"Error loading session: {e}")
+        return None
 
-def save_sessions(sessions):
-    """Menyimpan session ke file"""
+def store_session(phone_number, session):
+    """Menyimpan session satu nomor HP ke session store"""
     try:
-        with open('user_sessions.json', 'w', encoding='utf-8') as f:
-            json.dump(sessions, f, indent=2, ensure_ascii=False)
+        save_session(phone_number, session)
     except Exception as e:
-        print(f"Error saving sessions: {e}")
+        print(f"Error saving session: {e}")
+
+def _migrate_legacy_sessions():
+    """Migrasi user_sessions.json ke database, sekali per proses"""
+    global _sessions_migrated
+    if _sessions_migrated:
+        return
+    
+    try:
+        migrated = migrate_sessions_from_json(LEGACY_SESSIONS_FILE)
+        if migrated:
+            sys.stderr.write(f"Migrated {migrated} sessions from {LEGACY_SESSIONS_FILE}\n")
+    except Exception as e:
+        sys.stderr.write(f"Error migrating sessions: {e}\n")
+    _sessions_migrated = True
 
 def validate_input(message, phone_number):
     """Validasi input dari user"""
@@ -69,80 +119,69 @@ def validate_input(message, phone_number):
 def debug_session(phone_number, sessions):
     """Debug session untuk monitoring flow"""
     try:
+        session = sessions.get(phone_number)
         session_info = {
             "timestamp": datetime.datetime.now().isoformat(),
             "phone_number": phone_number,
-            "current_step": sessions.get(phone_number, {}).get('step', 'none'),
-            "order_data": sessions.get(phone_number, {}).get('order_data', {})
+            "current_step": session.step if session else 'none',
+            "order_data": session.order_data() if session else {}
         }
         
         # Simpan debug session
-        try:
-            with open('session_debug.json', 'r', encoding='utf-8') as f:
-                debug_logs = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            debug_logs = []
-        
-        debug_logs.append(session_info)
-        
-        # Simpan hanya 500 log terakhir
-        if len(debug_logs) > 500:
-            debug_logs = debug_logs[-500:]
-        
-        with open('session_debug.json', 'w', encoding='utf-8') as f:
-            json.dump(debug_logs, f, indent=2, ensure_ascii=False)
+        session_log.write(session_info)
             
     except Exception as e:
         print(f"Error debugging session: {e}")
 
-def main():
-    # Validasi argument
-    if len(sys.argv) != 3:
-        default_response = """🤖 *Warung Digital Bot*
+def handle_message(message, phone_number):
+    """Memproses satu pesan dan mengembalikan respon bot.
 
-Halo! Selamat datang di layanan pemesanan otomatis kami.
-
-Ketik salah satu:
-• *menu* - Lihat menu lengkap
-• *pesan* - Mulai pemesanan
-• *bantuan* - Panduan penggunaan
+    Hanya session milik ``phone_number`` yang dibaca dan ditulis ke session
+    store, sehingga biaya per pesan tidak bergantung pada jumlah pelanggan.
+    """
+    with message_profiler.sample('invalid') as sample:
+        return _handle_message(message, phone_number, sample)
 
-Atau ketik *halo* untuk memulai percakapan."""
-        print(default_response)
-        return
-    
-    message = sys.argv[1]
-    phone_number = sys.argv[2]
-    
+def _handle_message(message, phone_number, sample):
     # Validasi input
     is_valid, result = validate_input(message, phone_number)
     if not is_valid:
         error_response = f"❌ {result}\n\nSilakan coba lagi dengan format yang benar."
         log_interaction(phone_number, message, error_response, "Invalid input")
-        print(error_response)
-        return
+        return error_response
     
     cleaned_message = result
     response = None
     error_msg = None
     
     try:
-        # Load dan set session ke bot
-        sessions = load_sessions()
-        order_bot.user_sessions = sessions
-        
-        # Debug session sebelum processing
-        debug_session(phone_number, sessions)
-        
-        # Proses message dengan chatbot
-        response = order_bot.process_message(cleaned_message, phone_number)
+        order_bot = get_order_bot()
         
-        # Simpan session yang telah diupdate
-        save_sessions(order_bot.user_sessions)
+        # Load session milik nomor ini saja ke bot
+        session = load_session(phone_number)
+        if session is not None:
+            order_bot.user_sessions[phone_number] = ChatSession.from_dict(session)
+        else:
+            order_bot.user_sessions.pop(phone_number, None)
+        sample.step = session.get('step', 'greeting') if session else 'greeting'
         
-        # Debug session setelah pemrosesan
+        # Debug session sebelum processing
         debug_session(phone_number, order_bot.user_sessions)
         
+        try:
+            # Proses message dengan chatbot
+            response = order_bot.process_message(cleaned_message, phone_number)
+            
+            # Simpan session yang telah diupdate
+            if phone_number in order_bot.user_sessions:
+                store_session(phone_number, order_bot.user_sessions[phone_number].to_dict())
+            
+            # Debug session setelah pemrosesan
+            debug_session(phone_number, order_bot.user_sessions)
+        finally:
+            # Session store adalah sumber utama; jangan simpan session di memori
+            order_bot.user_sessions.pop(phone_number, None)
+        
         # Pastikan response tidak kosong
         if not response or not response.strip():
             response = """🤖 Maaf, saya tidak mengerti pesan Anda.
@@ -151,7 +190,7 @@ Ketik *menu* untuk melihat pilihan yang tersedia, atau *bantuan* untuk panduan."
         
         # Log interaksi sukses
         log_interaction(phone_number, cleaned_message, response)
-        print(response)
+        return response
         
     except Exception as e:
         error_msg = str(e)
@@ -167,12 +206,128 @@ Jika masalah berlanjut, hubungi admin kami."""
         # Log error untuk debugging
         log_interaction(phone_number, cleaned_message, response, error_trace)
         
-        # Print error untuk debugging (tapi tidak ke user)
-        print(response)
-        
-        # Optional: print error ke stderr untuk debugging
+        # Print error ke stderr untuk debugging (tapi tidak ke user)
         sys.stderr.write(f"Error processing message: {error_msg}\n")
         sys.stderr.write(f"Traceback: {error_trace}\n")
+        return response
+
+def handle_request_line(line):
+    """Memproses satu baris request JSON dan mengembalikan baris respon JSON"""
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return json.dumps({"id": None, "error": f"Invalid request: {e}"})
+    if not isinstance(request, dict):
+        return json.dumps({"id": None, "error": "Invalid request: expected a JSON object"})
+    
+    message = request.get('message', '')
+    phone_number = request.get('phone_number', '')
+    if not isinstance(message, str) or not isinstance(phone_number, str):
+        return json.dumps({"id": request.get('id'), "error": "Invalid request: message and phone_number must be strings"})
+    
+    with _process_lock:
+        response = handle_message(message, phone_number)
+    
+    return json.dumps({"id": request.get('id'), "response": response})
+
+def serve_stdio(stdin=None, stdout=None):
+    """Mode worker: baca request JSON per baris dari stdin, tulis respon ke stdout"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    
+    # Output lain (print error, dll) dialihkan ke stderr agar protokol tetap bersih
+    original_stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        for line in stdin:
+            if not line.strip():
+                continue
+            stdout.write(handle_request_line(line) + "\n")
+            stdout.flush()
+    finally:
+        sys.stdout = original_stdout
+
+def _get_message_executor():
+    """Thread pemroses tunggal untuk mode socket"""
+    global _message_executor
+    with _executor_lock:
+        if _message_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _message_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='process-message')
+        return _message_executor
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handler koneksi Unix socket; satu koneksi bisa mengirim banyak request"""
+    
+    def handle(self):
+        executor = _get_message_executor()
+        for raw_line in self.rfile:
+            line = raw_line.decode('utf-8', errors='replace')
+            if not line.strip():
+                continue
+            # Thread koneksi hanya melakukan I/O; pesan diproses di thread pemroses tetap
+            reply = executor.submit(handle_request_line, line).result()
+            self.wfile.write((reply + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def make_socket_server(path):
+    """Server Unix socket untuk mode worker (belum dijalankan)"""
+    if os.path.exists(path):
+        os.remove(path)
+    return _UnixServer(path, _RequestHandler)
+
+def serve_socket(path):
+    """Mode worker: layani request JSON per baris melalui Unix socket"""
+    with make_socket_server(path) as server:
+        sys.stderr.write(f"process_message worker listening on {path}\n")
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
+
+def request_worker(message, phone_number, path, timeout=10):
+    """Kirim pesan ke worker melalui Unix socket dan kembalikan responnya"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        request = {"id": 1, "message": message, "phone_number": phone_number}
+        sock.sendall((json.dumps(request) + "\n").encode('utf-8'))
+        with sock.makefile('rb') as reader:
+            reply = json.loads(reader.readline().decode('utf-8'))
+    
+    if 'response' not in reply:
+        raise RuntimeError(reply.get('error', 'Invalid worker reply'))
+    return reply['response']
+
+def main():
+    # Mode worker: python process_message.py --serve [--socket PATH]
+    if len(sys.argv) >= 2 and sys.argv[1] == '--serve':
+        if len(sys.argv) == 4 and sys.argv[2] == '--socket':
+            serve_socket(sys.argv[3])
+        else:
+            serve_stdio()
+        return
+    
+    # Validasi argument
+    if len(sys.argv) != 3:
+        print(DEFAULT_RESPONSE)
+        return
+    
+    message = sys.argv[1]
+    phone_number = sys.argv[2]
+    
+    # Gunakan worker yang sudah berjalan jika tersedia
+    if SOCKET_PATH and os.path.exists(SOCKET_PATH):
+        try:
+            print(request_worker(message, phone_number, SOCKET_PATH))
+            return
+        except (OSError, ValueError, RuntimeError) as e:
+            sys.stderr.write(f"Worker unavailable, processing locally: {e}\n")
+    
+    print(handle_message(message, phone_number))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,181 @@
+"""
+Index nama produk di memori untuk pencarian substring, prefix, dan fuzzy
+"""
+
+import bisect
+import heapq
+from collections import Counter
+
+# Penanda akhir nama agar setiap posisi karakter punya trigram sendiri
+_PAD = "\0\0"
+
+# Penanda awal nama; dipakai pencarian fuzzy agar awal kata lebih berbobot
+_START = "\0"
+
+def normalize_name(text):
+    """Normalisasi nama produk / kata kunci pencarian"""
+    return " ".join(str(text).lower().split())
+
+def _trigrams(name):
+    padded = name + _PAD
+    grams = {padded[i:i + 3] for i in range(len(name))}
+    grams.add(_START + name[:2])
+    return grams
+
+def _query_trigrams(term):
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+class ProductIndex:
+    """Index trigram atas nama produk yang sudah dinormalisasi.
+
+    Setiap trigram menyimpan daftar id produk terurut naik, sehingga hasil
+    pertama yang cocok sama dengan urutan baris di tabel ``products``.
+    Kata kunci >= 3 huruf memakai daftar trigram terpendek lalu diverifikasi;
+    kata kunci 1-2 huruf memakai trigram yang diawali kata kunci tersebut.
+    Pencarian fuzzy (salah ketik) menghitung trigram yang sama lewat daftar
+    yang sama, tanpa menghitung edit distance ke semua produk.
+    """
+
+    # Trigram yang muncul di lebih dari proporsi ini diabaikan saat fuzzy
+    # (terlalu umum untuk membedakan produk, dan mahal untuk dihitung)
+    COMMON_GRAM_RATIO = 0.05
+    COMMON_GRAM_MIN = 200
+
+    def __init__(self, products=()):
+        self._products = {}   # id -> baris produk
+        self._names = {}      # id -> nama ternormalisasi
+        self._gram_counts = {}  # id -> jumlah trigram nama
+        self._postings = {}   # trigram -> [id, ...] terurut
+        self._keys = []       # daftar trigram terurut untuk pencarian prefix
+        for product in products:
+            self.add(product)
+
+    def __len__(self):
+        return len(self._products)
+
+    def add(self, product):
+        """Menambah atau mengganti satu produk di index"""
+        product_id = product[0]
+        if product_id in self._products:
+            self.remove(product_id)
+
+        name = normalize_name(product[1])
+        self._products[product_id] = product
+        self._names[product_id] = name
+        grams = _trigrams(name)
+        self._gram_counts[product_id] = len(grams)
+
+        for gram in grams:
+            ids = self._postings.get(gram)
+            if ids is None:
+                self._postings[gram] = [product_id]
+                bisect.insort(self._keys, gram)
+            elif ids[-1] < product_id:
+                ids.append(product_id)
+            else:
+                bisect.insort(ids, product_id)
+
+    def update(self, product):
+        """Memperbarui data produk (harga/stok) tanpa membangun ulang index"""
+        product_id = product[0]
+        if self._names.get(product_id) == normalize_name(product[1]):
+            self._products[product_id] = product
+        else:
+            self.add(product)
+
+    def remove(self, product_id):
+        """Menghapus produk dari index"""
+        name = self._names.pop(product_id, None)
+        self._products.pop(product_id, None)
+        self._gram_counts.pop(product_id, None)
+        if name is None:
+            return
+
+        for gram in _trigrams(name):
+            ids = self._postings[gram]
+            ids.pop(bisect.bisect_left(ids, product_id))
+            if not ids:
+                del self._postings[gram]
+                self._keys.pop(bisect.bisect_left(self._keys, gram))
+
+    def get(self, product_id):
+        """Mengambil baris produk berdasarkan id"""
+        return self._products.get(product_id)
+
+    def search(self, term):
+        """Produk pertama (id terkecil) yang namanya mengandung ``term``"""
+        for product_id in self._matching_ids(normalize_name(term)):
+            return self._products[product_id]
+        return None
+
+    def search_all(self, term, limit=None):
+        """Semua produk yang namanya mengandung ``term``, urut berdasarkan id"""
+        results = []
+        for product_id in self._matching_ids(normalize_name(term)):
+            results.append(self._products[product_id])
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def fuzzy_search(self, term, limit=3, min_score=0.6):
+        """Kandidat produk untuk kata kunci yang salah ketik.
+
+        Skor = proporsi trigram kata kunci yang ada di nama produk; kandidat
+        dengan skor sama diurutkan berdasarkan kemiripan Dice lalu id.
+        Mengembalikan list ``(skor, produk)``.
+        """
+        term = normalize_name(term)
+        grams = _query_trigrams(term)
+        if not grams:
+            return []
+        grams.add(_START + term[:2])
+
+        common = max(self.COMMON_GRAM_MIN, int(len(self._products) * self.COMMON_GRAM_RATIO))
+        shared = Counter()
+        for gram in grams:
+            ids = self._postings.get(gram)
+            if ids is not None and len(ids) <= common:
+                shared.update(ids)
+
+        candidates = []
+        for product_id, count in shared.items():
+            score = count / len(grams)
+            if score >= min_score:
+                dice = 2 * count / (len(grams) + self._gram_counts[product_id])
+                candidates.append((-score, -dice, product_id))
+
+        return [(-score, self._products[product_id])
+                for score, _, product_id in heapq.nsmallest(limit, candidates)]
+
+    def _matching_ids(self, term):
+        if not term:
+            yield from sorted(self._products)
+            return
+
+        if len(term) < 3:
+            # Gabungkan semua trigram yang diawali term (sudah pasti cocok)
+            position = bisect.bisect_left(self._keys, term)
+            postings = []
+            while position < len(self._keys) and self._keys[position].startswith(term):
+                postings.append(self._postings[self._keys[position]])
+                position += 1
+
+            last = None
+            for product_id in heapq.merge(*postings):
+                if product_id != last:
+                    yield product_id
+                    last = product_id
+            return
+
+        # Pilih daftar trigram terpendek sebagai kandidat, lalu verifikasi
+        shortest = None
+        for gram in _query_trigrams(term):
+            ids = self._postings.get(gram)
+            if ids is None:
+                return
+            if shortest is None or len(ids) < len(shortest):
+                shortest = ids
+
+        for product_id in shortest:
+            if term in self._names[product_id]:
+                yield product_id
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Profiling per pesan (opt-in) dengan sampling, dikelompokkan per langkah FSM
+
+Aktifkan dengan ``PROFILE_SAMPLE_RATE`` (mis. 0.01 = 1% pesan) dan lokasi
+output ``PROFILE_DIR`` (default ``profiles``). Setiap pesan yang terpilih
+diprofil dengan cProfile lalu digabung ke ``<dir>/<sumber>-<langkah>.prof``,
+sehingga satu file berisi akumulasi semua sampel untuk langkah tersebut.
+Jika tidak aktif, biaya per pesan hanya satu pengecekan atribut.
+
+Melihat hasil:
+    python profiling.py profiles/flask-get_address.prof [--sort cumulative] [--limit 25]
+"""
+
+import os
+import random
+import re
+import sys
+import threading
+
+class _NullSample:
+    """Sampel kosong untuk pesan yang tidak diprofil"""
+    step = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass  # Dipakai bersama oleh banyak thread; abaikan step
+
+_NULL_SAMPLE = _NullSample()
+
+class _Sample:
+    def __init__(self, profiler, step):
+        self.profiler = profiler
+        self.step = step
+        self._profile = None
+
+    def __enter__(self):
+        # cProfile hanya boleh aktif satu per proses (Python 3.12+); pesan lain dilewati
+        if self.profiler._active.acquire(blocking=False):
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profile is not None:
+            self._profile.disable()
+            self.profiler._active.release()
+            self.profiler.record(self.step or 'unknown', self._profile)
+        return False
+
+class MessageProfiler:
+    """Memprofil sebagian pesan dan menyimpan profil gabungan per langkah FSM"""
+
+    def __init__(self, source, sample_rate=0.0, directory='profiles'):
+        self.source = source
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.samples = {}
+        self._active = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, source):
+        """Konfigurasi dari PROFILE_SAMPLE_RATE dan PROFILE_DIR"""
+        try:
+            sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0') or 0)
+        except ValueError:
+            print("Invalid PROFILE_SAMPLE_RATE, profiling disabled")
+            sample_rate = 0.0
+        return cls(source, sample_rate, os.getenv('PROFILE_DIR', 'profiles'))
+
+    def sample(self, step=None):
+        """Context manager untuk satu pesan; ``step`` boleh diisi di dalam blok"""
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return _NULL_SAMPLE
+        return _Sample(self, step)
+
+    def path_for(self, step):
+        safe_step = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(step))
+        return os.path.join(self.directory, f"{self.source}-{safe_step}.prof")
+
+    def record(self, step, profile):
+        """Menggabungkan profil satu pesan ke file langkahnya (ditulis atomik)"""
+        # pstats/tempfile diimport di sini agar import modul ini tetap ringan
+        import pstats
+        import tempfile
+
+        path = self.path_for(step)
+        try:
+            with self._write_lock:
+                stats = pstats.Stats(profile)
+                if os.path.exists(path):
+                    try:
+                        stats.add(path)
+                    except Exception as e:
+                        print(f"Error reading profile {path}, starting over: {e}")
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                os.close(fd)
+                stats.dump_stats(tmp_path)
+                os.replace(tmp_path, path)
+                self.samples[step] = self.samples.get(step, 0) + 1
+        except Exception as e:
+            print(f"Error writing profile {path}: {e}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tampilkan profil gabungan per langkah FSM")
+    parser.add_argument('paths', nargs='+', help="file .prof (beberapa file digabung)")
+    parser.add_argument('--sort', default='cumulative', help="urutan pstats (cumulative, tottime, calls)")
+    parser.add_argument('--limit', type=int, default=25, help="jumlah fungsi yang ditampilkan")
+    args = parser.parse_args()
+
+    import pstats
+    stats = pstats.Stats(*args.paths)
+    stats.strip_dirs().sort_stats(args.sort).print_stats(args.limit)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Session percakapan OrderBot dalam bentuk ringkas
+
+Produk disimpan sebagai id saja; nama, harga, dan stok dibaca ulang dari
+katalog (``database.get_product``) saat dibutuhkan, sehingga session kecil
+dan tidak menyimpan harga/stok yang sudah basi. Format JSON yang disimpan:
+``{"step": ..., "order_data": {"product_id": ..., "quantity": ..., "customer_name": ...}}``
+(field kosong tidak ditulis). Session format lama yang menyimpan seluruh baris
+produk di ``order_data["product"]`` tetap bisa dibaca.
+
+Migrasi file session / log debug lama ke format ringkas:
+    python session_state.py user_sessions.json session_debug.json session_debug.000001.jsonl
+"""
+
+import json
+import os
+import sys
+
+class ChatSession:
+    """State percakapan satu nomor HP (``__slots__`` agar kecil di memori)"""
+
+    __slots__ = ('step', 'product_id', 'quantity', 'customer_name')
+
+    def __init__(self, step='greeting', product_id=None, quantity=None, customer_name=None):
+        self.step = step
+        self.product_id = product_id
+        self.quantity = quantity
+        self.customer_name = customer_name
+
+    def __repr__(self):
+        return (f"ChatSession(step={self.step!r}, product_id={self.product_id!r}, "
+                f"quantity={self.quantity!r}, customer_name={self.customer_name!r})")
+
+    def __eq__(self, other):
+        if not isinstance(other, ChatSession):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def order_data(self):
+        """Data pesanan yang sudah diisi (tanpa field kosong)"""
+        data = {}
+        if self.product_id is not None:
+            data['product_id'] = self.product_id
+        if self.quantity is not None:
+            data['quantity'] = self.quantity
+        if self.customer_name is not None:
+            data['customer_name'] = self.customer_name
+        return data
+
+    def to_dict(self):
+        """Bentuk JSON yang disimpan di session store"""
+        return {'step': self.step, 'order_data': self.order_data()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Dari JSON session; format lama (baris produk lengkap) juga diterima"""
+        data = data or {}
+        order_data = data.get('order_data') or {}
+        product_id = order_data.get('product_id')
+        if product_id is None and order_data.get('product'):
+            product_id = order_data['product'][0]
+        return cls(data.get('step', 'greeting'), product_id,
+                   order_data.get('quantity'), order_data.get('customer_name'))
+
+def compact_session(data):
+    """Session JSON format lama -> format ringkas"""
+    return ChatSession.from_dict(data).to_dict()
+
+def compact_order_data(order_data):
+    """``order_data`` format lama -> format ringkas (untuk log debug session)"""
+    return ChatSession.from_dict({'order_data': order_data}).order_data()
+
+def _compact_record(record):
+    # Log debug session: {"current_step": ..., "order_data": {...}}
+    if isinstance(record, dict) and 'order_data' in record and 'step' not in record:
+        return dict(record, order_data=compact_order_data(record['order_data']))
+    return record
+
+def compact_session_file(path):
+    """Menulis ulang file session / log debug ke format ringkas (atomik).
+
+    Mendukung ``user_sessions.json`` (nomor HP -> session), log debug JSON
+    (list entri), dan segmen log ``.jsonl``. Mengembalikan jumlah entri.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = json.load(f)
+
+    if isinstance(records, dict):
+        records = {phone: compact_session(session) for phone, session in records.items()}
+    else:
+        records = [_compact_record(record) for record in records]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        else:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return len(records)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python session_state.py FILE [FILE ...]")
+        return 1
+
+    for path in sys.argv[1:]:
+        try:
+            before = os.path.getsize(path)
+            count = compact_session_file(path)
+            print(f"✅ {path}: {count} entries, {before:,} -> {os.path.getsize(path):,} bytes")
+        except (OSError, ValueError) as e:
+            print(f"❌ {path}: {e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,14 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import json
 import os
-from database import get_all_orders, get_all_products, add_product, update_order_status
-import subprocess
-import time
+from database import (
+    get_all_products, add_product, update_order_status, get_orders, get_orders_page,
+    get_latest_orders, get_order_summary, get_daily_order_counts, get_status_counts,
+    get_sales_report, get_order_date_range, get_table_version,
+)
+
+# pandas dan plotly diimport di dalam halaman / loader yang memakainya, sehingga
+# halaman ringan (Kelola Pesanan, WhatsApp Bot) tidak menunggu import library berat
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -40,6 +41,70 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Kolom DataFrame pesanan, sesuai urutan kolom tabel orders
+ORDER_COLUMNS = [
+    'ID', 'Nama Customer', 'No. HP', 'Produk', 'Jumlah', 
+    'Harga', 'Total', 'Status', 'Tanggal', 'Alamat'
+]
+
+# Jumlah pesanan per halaman di Kelola Pesanan
+ORDERS_PAGE_SIZE = 20
+
+def orders_dataframe(orders):
+    """Convert baris pesanan ke DataFrame"""
+    import pandas as pd
+    orders_df = pd.DataFrame(orders, columns=ORDER_COLUMNS)
+    orders_df['Tanggal'] = pd.to_datetime(orders_df['Tanggal'])
+    return orders_df
+
+# Cache hasil query database. Setiap fungsi menerima versi tabel (dinaikkan
+# oleh trigger setiap ada perubahan) sebagai bagian dari key cache, sehingga
+# rerun, ganti filter, dan navigasi memakai data yang sudah dimuat sampai
+# database benar-benar berubah.
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_order_summary(orders_version):
+    return get_order_summary()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_daily_order_counts(orders_version):
+    import pandas as pd
+    return pd.DataFrame(get_daily_order_counts(), columns=['Tanggal', 'Jumlah Pesanan'])
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_status_counts(orders_version):
+    return get_status_counts()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_sales_report(orders_version, start_date, end_date):
+    import pandas as pd
+    report = get_sales_report(date_from=start_date, date_to=end_date, top_products=None)
+    report['daily'] = pd.DataFrame(report['daily'], columns=['Tanggal', 'Jumlah Pesanan', 'Pendapatan'])
+    report['best_sellers'] = pd.DataFrame(report['best_sellers'], columns=['Produk', 'Jumlah', 'Pendapatan'])
+    return report
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_latest_orders(orders_version, limit):
+    return orders_dataframe(get_latest_orders(limit))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_orders_page(orders_version, limit, after, status, customer):
+    return get_orders_page(limit, after=after, status=status, customer=customer)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_order_date_range(orders_version):
+    return get_order_date_range()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_orders_in_range(orders_version, start_date, end_date):
+    return orders_dataframe(get_orders(date_from=start_date, date_to=end_date))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_products_dataframe(products_version):
+    import pandas as pd
+    return pd.DataFrame(get_all_products(), columns=[
+        'ID', 'Nama', 'Harga', 'Stok', 'Deskripsi', 'Kategori'
+    ])
+
 def main():
     st.markdown('<h1 class="main-header">🛍️ Dashboard UMKM - WhatsApp Order System</h1>', unsafe_allow_html=True)
     
@@ -47,7 +112,8 @@ def main():
     st.sidebar.title("📱 Navigasi")
     page = st.sidebar.selectbox(
         "Pilih Halaman:",
-        ["📊 Dashboard", "📋 Kelola Pesanan", "🛍️ Kelola Produk", "💬 WhatsApp Bot", "📈 Laporan"]
+        ["📊 Dashboard", "📋 Kelola Pesanan", "🛍️ Kelola Produk", "💬 WhatsApp Bot", "📈 Laporan"],
+        key='page'
     )
     
     if page == "📊 Dashboard":
@@ -64,47 +130,36 @@ def main():
 def show_dashboard():
     st.header("📊 Dashboard Utama")
     
-    # Ambil data pesanan
-    orders = get_all_orders()
-    products = get_all_products()
+    # Ringkasan dibaca dari rollup daily_sales, bukan dari seluruh baris pesanan
+    orders_version = get_table_version('orders')
+    summary = load_order_summary(orders_version)
     
-    if not orders:
+    if not summary['total_orders']:
         st.info("Belum ada pesanan masuk. Bot WhatsApp siap menerima pesanan!")
         return
     
-    # Convert ke DataFrame
-    orders_df = pd.DataFrame(orders, columns=[
-        'ID', 'Nama Customer', 'No. HP', 'Produk', 'Jumlah', 
-        'Harga', 'Total', 'Status', 'Tanggal', 'Alamat'
-    ])
-    orders_df['Tanggal'] = pd.to_datetime(orders_df['Tanggal'])
-    
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_orders = len(orders_df)
-        st.metric("📦 Total Pesanan", total_orders)
+        st.metric("📦 Total Pesanan", summary['total_orders'])
     
     with col2:
-        total_revenue = orders_df['Total'].sum()
-        st.metric("💰 Total Pendapatan", f"Rp {total_revenue:,.0f}")
+        st.metric("💰 Total Pendapatan", f"Rp {summary['total_revenue']:,.0f}")
     
     with col3:
-        pending_orders = len(orders_df[orders_df['Status'] == 'pending'])
-        st.metric("⏳ Pesanan Pending", pending_orders)
+        st.metric("⏳ Pesanan Pending", summary['pending_orders'])
     
     with col4:
-        avg_order = orders_df['Total'].mean()
-        st.metric("📊 Rata-rata Pesanan", f"Rp {avg_order:,.0f}")
+        st.metric("📊 Rata-rata Pesanan", f"Rp {summary['avg_order']:,.0f}")
     
-    # Charts
+    # Charts (plotly baru dimuat setelah metrics tampil)
+    import plotly.express as px
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📈 Pesanan per Hari")
-        daily_orders = orders_df.groupby(orders_df['Tanggal'].dt.date).size().reset_index()
-        daily_orders.columns = ['Tanggal', 'Jumlah Pesanan']
+        daily_orders = load_daily_order_counts(orders_version)
         
         if not daily_orders.empty:
             fig = px.line(daily_orders, x='Tanggal', y='Jumlah Pesanan', 
@@ -113,31 +168,20 @@ def show_dashboard():
     
     with col2:
         st.subheader("🥧 Status Pesanan")
-        status_counts = orders_df['Status'].value_counts()
-        fig = px.pie(values=status_counts.values, names=status_counts.index,
+        status_counts = load_status_counts(orders_version)
+        fig = px.pie(values=[count for _, count in status_counts],
+                     names=[status for status, _ in status_counts],
                      title="Distribusi Status Pesanan")
         st.plotly_chart(fig, use_container_width=True)
     
     # Pesanan terbaru
     st.subheader("📋 Pesanan Terbaru")
-    recent_orders = orders_df.head(10)
+    recent_orders = load_latest_orders(orders_version, 10)
     st.dataframe(recent_orders, use_container_width=True)
 
 def show_orders_management():
     st.header("📋 Kelola Pesanan")
     
-    orders = get_all_orders()
-    
-    if not orders:
-        st.info("Belum ada pesanan masuk.")
-        return
-    
-    # Convert ke DataFrame
-    orders_df = pd.DataFrame(orders, columns=[
-        'ID', 'Nama Customer', 'No. HP', 'Produk', 'Jumlah', 
-        'Harga', 'Total', 'Status', 'Tanggal', 'Alamat'
-    ])
-    
     # Filter
     col1, col2 = st.columns(2)
     with col1:
@@ -146,15 +190,29 @@ def show_orders_management():
     with col2:
         search_customer = st.text_input("Cari Nama Customer:")
     
-    # Apply filters
-    filtered_df = orders_df.copy()
-    if status_filter != "Semua":
-        filtered_df = filtered_df[filtered_df['Status'] == status_filter]
-    if search_customer:
-        filtered_df = filtered_df[filtered_df['Nama Customer'].str.contains(search_customer, case=False, na=False)]
+    filters = {
+        'status': None if status_filter == "Semua" else status_filter,
+        'customer': search_customer or None,
+    }
+    
+    # Keyset pagination: simpan (order_date, id) terakhir tiap halaman,
+    # kembali ke halaman pertama jika filter berubah
+    if st.session_state.get('orders_filters') != filters:
+        st.session_state['orders_filters'] = filters
+        st.session_state['orders_cursors'] = [None]
+    cursors = st.session_state['orders_cursors']
+    
+    orders = load_orders_page(get_table_version('orders'), ORDERS_PAGE_SIZE + 1,
+                              cursors[-1], filters['status'], filters['customer'])
+    has_next_page = len(orders) > ORDERS_PAGE_SIZE
+    orders = orders[:ORDERS_PAGE_SIZE]
+    
+    if not orders and len(cursors) == 1 and not any(filters.values()):
+        st.info("Belum ada pesanan masuk.")
+        return
     
-    # Display orders dengan kemampuan edit status
-    for idx, order in filtered_df.iterrows():
+    # Display orders dengan kemampuan edit status (tanpa pandas, cukup dict per baris)
+    for order in (dict(zip(ORDER_COLUMNS, row)) for row in orders):
         with st.expander(f"Pesanan #{order['ID']} - {order['Nama Customer']}"):
             col1, col2, col3 = st.columns(3)
             
@@ -183,6 +241,19 @@ def show_orders_management():
                     update_order_status(order['ID'], new_status)
                     st.success(f"Status pesanan #{order['ID']} berhasil diupdate!")
                     st.rerun()
+    
+    # Navigasi halaman
+    st.caption(f"Halaman {len(cursors)}")
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(cursors) > 1 and st.button("⬅️ Sebelumnya"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if has_next_page and st.button("Berikutnya ➡️"):
+            last_order = orders[-1]
+            cursors.append((last_order[8], last_order[0]))
+            st.rerun()
 
 def show_products_management():
     st.header("🛍️ Kelola Produk")
@@ -210,12 +281,9 @@ def show_products_management():
     
     # Daftar produk
     st.subheader("📋 Daftar Produk")
-    products = get_all_products()
+    products_df = load_products_dataframe(get_table_version('products'))
     
-    if products:
-        products_df = pd.DataFrame(products, columns=[
-            'ID', 'Nama', 'Harga', 'Stok', 'Deskripsi', 'Kategori'
-        ])
+    if not products_df.empty:
         st.dataframe(products_df, use_container_width=True)
     else:
         st.info("Belum ada produk. Tambahkan produk untuk memulai!")
@@ -273,65 +341,63 @@ def show_whatsapp_bot():
 def show_reports():
     st.header("📈 Laporan dan Analytics")
     
-    orders = get_all_orders()
-    if not orders:
+    orders_version = get_table_version('orders')
+    first_date, last_date = load_order_date_range(orders_version)
+    if first_date is None:
         st.info("Belum ada data untuk laporan.")
         return
     
-    orders_df = pd.DataFrame(orders, columns=[
-        'ID', 'Nama Customer', 'No. HP', 'Produk', 'Jumlah', 
-        'Harga', 'Total', 'Status', 'Tanggal', 'Alamat'
-    ])
-    orders_df['Tanggal'] = pd.to_datetime(orders_df['Tanggal'])
-    
     # Filter tanggal
     col1, col2 = st.columns(2)
     with col1:
-        start_date = st.date_input("Dari Tanggal", 
-                                  orders_df['Tanggal'].min().date())
+        start_date = st.date_input("Dari Tanggal", first_date)
     with col2:
-        end_date = st.date_input("Sampai Tanggal", 
-                                orders_df['Tanggal'].max().date())
+        end_date = st.date_input("Sampai Tanggal", last_date)
     
-    # Filter data
-    mask = (orders_df['Tanggal'].dt.date >= start_date) & (orders_df['Tanggal'].dt.date <= end_date)
-    filtered_df = orders_df.loc[mask]
+    # Metrics dan chart periode dihitung di SQLite; baris detail belum diambil
+    report = load_sales_report(orders_version, start_date, end_date)
+    summary = report['summary']
     
-    if filtered_df.empty:
+    if not summary['total_orders']:
         st.warning("Tidak ada data dalam rentang tanggal yang dipilih.")
         return
     
     # Metrics untuk periode
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Pesanan", len(filtered_df))
+        st.metric("Total Pesanan", summary['total_orders'])
     with col2:
-        st.metric("Total Pendapatan", f"Rp {filtered_df['Total'].sum():,.0f}")
+        st.metric("Total Pendapatan", f"Rp {summary['total_revenue']:,.0f}")
     with col3:
-        st.metric("Rata-rata per Pesanan", f"Rp {filtered_df['Total'].mean():,.0f}")
+        st.metric("Rata-rata per Pesanan", f"Rp {summary['avg_order']:,.0f}")
     with col4:
-        conversion_rate = len(filtered_df[filtered_df['Status'] == 'delivered']) / len(filtered_df) * 100
+        conversion_rate = summary['delivered_orders'] / summary['total_orders'] * 100
         st.metric("Tingkat Konversi", f"{conversion_rate:.1f}%")
     
-    # Charts
+    # Charts (plotly baru dimuat setelah metrics tampil)
+    import plotly.express as px
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 Produk Terlaris")
-        product_sales = filtered_df.groupby('Produk')['Jumlah'].sum().sort_values(ascending=False)
-        fig = px.bar(x=product_sales.index, y=product_sales.values, 
+        product_sales = report['best_sellers']
+        fig = px.bar(x=product_sales['Produk'], y=product_sales['Jumlah'], 
                     title="Produk Terlaris")
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("💰 Pendapatan Harian")
-        daily_revenue = filtered_df.groupby(filtered_df['Tanggal'].dt.date)['Total'].sum()
-        fig = px.line(x=daily_revenue.index, y=daily_revenue.values, 
+        daily_revenue = report['daily']
+        fig = px.line(x=daily_revenue['Tanggal'], y=daily_revenue['Pendapatan'], 
                      title="Trend Pendapatan Harian")
         st.plotly_chart(fig, use_container_width=True)
     
-    # Tabel detail
+    # Tabel detail: baris pesanan hanya diambil jika ditampilkan
     st.subheader("📋 Detail Laporan")
+    if not st.checkbox("Tampilkan detail pesanan"):
+        return
+    
+    filtered_df = load_orders_in_range(orders_version, start_date, end_date)
     st.dataframe(filtered_df, use_container_width=True)
     
     # Download laporan
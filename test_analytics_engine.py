@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test untuk mesin analitik single pass (akumulator log dan pesanan)
+"""
+
+import os
+import tempfile
+from datetime import date
+
+from analytics_engine import AnalyticsEngine, classify_message, load_checkpoint, save_checkpoint
+
+LOGS = [
+    {"timestamp": "2025-07-08T09:15:00", "phone_number": "628001", "user_message": "Halo"},
+    {"timestamp": "2025-07-08T09:16:00", "phone_number": "628001", "user_message": "2"},
+    {"timestamp": "2025-07-08T09:17:00", "phone_number": "628001", "user_message": "kopi arabika"},
+    {"timestamp": "2025-07-08T09:18:00", "phone_number": "628001", "user_message": "12"},
+    {"timestamp": "2025-07-09T20:00:00", "phone_number": "628002", "user_message": "hi"},
+    {"timestamp": "bukan tanggal", "phone_number": "628002", "user_message": "apa ini",
+     "error": "Invalid input"},
+    {"timestamp": "2025-07-09T20:05:00", "phone_number": "628003", "user_message": "teh",
+     "error": "database is locked"},
+]
+
+ORDERS = [
+    (1, "Budi", "628001", "Kopi Arabika Premium", 2, 75000.0, 150000.0, "pending", "2025-07-08 09:20:00", "Jl. A"),
+    (2, "Sari", "628003", "Teh Herbal Alami", 1, 45000.0, 45000.0, "delivered", "2025-07-09 20:10:00", "Jl. B"),
+]
+
+def test_classify_message():
+    """Klasifikasi jenis pesan sama dengan aturan dashboard lama"""
+    assert classify_message("menu") == "greeting"
+    assert classify_message("3") == "menu_selection"
+    assert classify_message("madu murni") == "product_query"
+    assert classify_message("25") == "quantity"
+    assert classify_message("terima kasih") == "other"
+
+def test_single_pass_feeds_every_accumulator():
+    """Satu kali jalan menghasilkan semua statistik, termasuk dari generator"""
+    progress = []
+    engine = AnalyticsEngine(today=date(2025, 7, 9))
+    engine.run((log for log in LOGS), iter(ORDERS),
+               on_progress=lambda e: progress.append(e.logs_processed), progress_every=3)
+
+    assert progress == [3, 6, 7]
+    assert engine.patterns.total_messages == 7
+    assert engine.patterns.user_activity == {"628001": 4, "628002": 2, "628003": 1}
+    assert engine.patterns.message_types == {
+        "greeting": 2, "menu_selection": 1, "product_query": 2, "quantity": 1, "other": 1}
+    assert engine.patterns.hourly_activity == {9: 4, 20: 2}
+
+    assert engine.funnel.greeted == {"628001", "628002"}
+    assert engine.funnel.started_order == {"628001"}
+    assert engine.funnel.selected_product == {"628001", "628003"}
+    assert engine.funnel.completed == {"628001", "628003"}
+
+    assert engine.errors.total_errors == 2
+    assert engine.errors.error_types == {"Invalid Input": 1, "Database Error": 1}
+
+    assert engine.daily.users == {"628002", "628003"}
+    assert engine.daily.messages == 2
+    assert (engine.daily.orders, engine.daily.revenue) == (1, 45000.0)
+
+def log_records(logs, start=0):
+    """Pasangan (posisi, entri) seperti iter_log_records untuk file JSON lama"""
+    return [((0, start + i), log) for i, log in enumerate(logs, 1)]
+
+def test_checkpoint_resume_matches_full_run():
+    """Checkpoint + record baru menghasilkan state yang sama dengan proses penuh"""
+    today = date(2025, 7, 9)
+    full = AnalyticsEngine(today=today)
+    full.run_records(log_records(LOGS), ORDERS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'checkpoint.json')
+        first = load_checkpoint(path, today=today)
+        first.run_records(log_records(LOGS[:4]), ORDERS[:1])
+        save_checkpoint(first, path)
+
+        resumed = load_checkpoint(path, today=today)
+        assert resumed.log_position == (0, 4) and resumed.last_order_id == 1
+        resumed.run_records(log_records(LOGS[4:], start=4), ORDERS[1:])
+        assert resumed.get_state() == full.get_state()
+        save_checkpoint(resumed, path)
+
+        # Checkpoint dari hari sebelumnya tidak membawa ringkasan harian
+        next_day = load_checkpoint(path, today=date(2025, 7, 10))
+        assert next_day.daily.messages == 0 and next_day.patterns.total_messages == 7
+
+def test_checkpoint_records_rotated_away_segments():
+    """Segmen log yang hilang sebelum terbaca dicatat di checkpoint, bukan dilewati diam-diam"""
+    from interaction_log import JsonlLogSink, iter_log_records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        path = os.path.join(tmp, 'checkpoint.json')
+        sink = JsonlLogSink(base, segment_entries=2, max_segments=2, flush_interval=60)
+        for log in LOGS[:3]:
+            sink.write(log)
+        sink.flush()
+
+        engine = AnalyticsEngine(today=date(2025, 7, 9))
+        engine.run_records(iter_log_records(base, on_gap=engine.record_log_gap), [])
+        save_checkpoint(engine, path)
+        assert engine.log_gaps == []
+
+        for log in LOGS[3:] * 2:
+            sink.write(log)
+        sink.close()
+
+        resumed = load_checkpoint(path, today=date(2025, 7, 9))
+        resumed.run_records(iter_log_records(base, resumed.log_position, on_gap=resumed.record_log_gap), [])
+        assert resumed.log_gaps == [2, 3, 4]
+        save_checkpoint(resumed, path)
+        assert load_checkpoint(path, today=date(2025, 7, 9)).log_gaps == [2, 3, 4]
+
+def test_vectorized_matches_per_record():
+    """Jalur kolom NumPy/pandas menghasilkan state yang sama"""
+    from vectorized_analytics import build_engine, load_log_columns
+
+    today = date(2025, 7, 9)
+    columns = load_log_columns(LOGS)
+    assert str(columns['timestamp'].dtype) == 'datetime64[ns]'
+    assert columns['phone'].dtype == 'category'
+
+    vectorized = build_engine(columns, today=today).run([], ORDERS)
+    per_record = AnalyticsEngine(today=today).run(LOGS, ORDERS)
+    assert vectorized.get_state() == per_record.get_state()
+    assert vectorized.patterns.user_activity.most_common() == per_record.patterns.user_activity.most_common()
+
+def test_missing_messages_match_per_record():
+    """Pesan None / kosong dihitung 'other' di kedua jalur, bukan sapaan atau awal pesanan"""
+    from vectorized_analytics import MESSAGE_TYPES, build_engine, load_log_columns
+
+    today = date(2025, 7, 9)
+    logs = [
+        {"timestamp": "2025-07-09T10:00:00", "phone_number": "628001", "user_message": "halo"},
+        {"timestamp": "2025-07-09T10:01:00", "phone_number": "628004", "user_message": None},
+        {"timestamp": "2025-07-09T10:02:00", "phone_number": "628005", "user_message": ""},
+        {"timestamp": "2025-07-09T10:03:00", "phone_number": "628006"},
+        {"timestamp": "2025-07-09T10:04:00", "phone_number": "628001", "user_message": "2"},
+    ]
+    columns = load_log_columns(logs)
+    assert columns['message_type'].tolist()[1:4] == [MESSAGE_TYPES.index('other')] * 3
+    assert columns['order_start'].tolist() == [False, False, False, False, True]
+
+    vectorized = build_engine(columns, today=today)
+    per_record = AnalyticsEngine(today=today).run(logs, [])
+    assert vectorized.get_state() == per_record.get_state()
+    assert per_record.patterns.message_types['other'] == 3
+    assert per_record.funnel.started_order == {"628001"}
+    assert per_record.funnel.greeted == {"628001"}
+
+if __name__ == "__main__":
+    print("📊 TESTING ANALYTICS ENGINE")
+    print("=" * 50)
+
+    test_classify_message()
+    test_single_pass_feeds_every_accumulator()
+    test_checkpoint_resume_matches_full_run()
+    test_checkpoint_records_rotated_away_segments()
+    test_vectorized_matches_per_record()
+    test_missing_messages_match_per_record()
+
+    print("✅ All analytics engine tests passed!")
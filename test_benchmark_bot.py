@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test untuk benchmark replay bot (skenario kecil pada database sementara)
+"""
+
+import os
+import sys
+
+import pytest
+
+import database
+from benchmark_bot import percentile, run_benchmark
+
+def test_percentile_nearest_rank():
+    """Persentil nearest-rank"""
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+def test_run_benchmark_reports_steps_and_db_calls(temp_db, tmp_path, monkeypatch):
+    """Semua skenario melaporkan throughput, latensi per langkah, dan query DB"""
+    monkeypatch.setenv('WHATSAPP_FAKE_CLIENT', '1')
+    results = run_benchmark(users=5, rounds=1, log_base=os.path.join(tmp_path, 'tidak_ada'))
+    assert database.count_orders() == 10
+
+    scenarios = results['scenarios']
+    assert set(scenarios) == {'synthetic_orderbot', 'synthetic_flask'}
+    orderbot = scenarios['synthetic_orderbot']
+    assert orderbot['messages'] == 35 and orderbot['messages_per_sec'] > 0
+    assert orderbot['steps']['waiting_address']['messages'] == 5
+    assert orderbot['steps']['waiting_address']['db_calls_per_message'] > 0
+    assert set(scenarios['synthetic_flask']['steps']) == {
+        'greeting', 'menu_selection', 'product_selection', 'get_name', 'get_quantity', 'get_address'}
+
+if __name__ == "__main__":
+    print("⏱️ TESTING BOT BENCHMARK")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Test untuk import per halaman dashboard (halaman ringan tanpa pandas/plotly)
+"""
+
+import os
+import tempfile
+
+from benchmark_dashboard import REPO_DIR, measure_page, seed_database
+
+APP_PATH = os.path.join(REPO_DIR, 'streamlit_app.py')
+
+def test_pages_load_only_needed_libraries():
+    """Halaman pesanan dan bot tidak memuat pandas/plotly; laporan memuat keduanya"""
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'orders.db')
+        seed_database(db_path, orders=30)
+
+        for page in ("📋 Kelola Pesanan", "💬 WhatsApp Bot"):
+            result = measure_page(APP_PATH, page, workdir, db_path)
+            assert result['errors'] == []
+            assert result['loaded'] == []
+            assert result['first_paint_ms'] > 0
+
+        result = measure_page(APP_PATH, "📈 Laporan", workdir, db_path)
+        assert result['errors'] == []
+        assert {'pandas', 'plotly.express'} <= set(result['loaded'])
+
+if __name__ == "__main__":
+    print("🖥️ TESTING DASHBOARD PAGE IMPORTS")
+    print("=" * 50)
+
+    test_pages_load_only_needed_libraries()
+
+    print("✅ All dashboard page tests passed!")
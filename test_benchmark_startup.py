@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test untuk cold start: import tanpa kerja database dan bot global yang lazy
+"""
+
+from benchmark_startup import check_budget, measure_imports
+
+def test_imports_do_not_touch_database():
+    """Import modul bot di proses baru tidak membuat file database"""
+    imports = measure_imports(('database', 'chatbot', 'process_message'), runs=1)
+    assert not any(result['db_touched'] for result in imports.values())
+    assert all(result['import_ms'] > 0 for result in imports.values())
+
+def test_check_budget_reports_slow_or_db_touching_imports():
+    """Import yang lambat atau menyentuh database dilaporkan sebagai pelanggaran"""
+    imports = {
+        'database': {'import_ms': 20.0, 'db_touched': False},
+        'chatbot': {'import_ms': 120.0, 'db_touched': False},
+        'process_message': {'import_ms': 30.0, 'db_touched': True},
+    }
+    assert check_budget(imports, 100) == [
+        "import chatbot took 120.0 ms (budget 100 ms)",
+        "import process_message touched the database",
+    ]
+    assert check_budget({'database': imports['database']}, 100) == []
+
+def test_order_bot_is_created_on_first_use():
+    """``chatbot.order_bot`` dibuat saat pertama diakses dan tetap satu instance"""
+    import chatbot
+
+    assert 'order_bot' not in vars(chatbot)
+    from chatbot import order_bot
+    assert order_bot is chatbot.get_order_bot() is chatbot.order_bot
+
+if __name__ == "__main__":
+    print("🚀 TESTING STARTUP")
+    print("=" * 50)
+
+    test_imports_do_not_touch_database()
+    test_check_budget_reports_slow_or_db_touching_imports()
+    test_order_bot_is_created_on_first_use()
+
+    print("✅ All startup tests passed!")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test untuk job broadcast background (rate limit, progress, dan resume)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import database
+from broadcast import BroadcastManager, TokenBucket
+
+class RecordingSender:
+    """Pengirim palsu: mencatat nomor tujuan, gagal untuk nomor tertentu"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def __call__(self, phone_number, message):
+        if phone_number in self.failing:
+            raise ConnectionError("Fake send error")
+        with self._lock:
+            self.sent.append(phone_number)
+        return f"SM{phone_number}"
+
+def test_token_bucket_limits_rate():
+    """Setelah burst habis, token keluar sesuai rate"""
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.perf_counter()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.perf_counter() - started >= 0.19
+
+def test_broadcast_job_tracks_progress(temp_db):
+    """Job berjalan di background dan status mencatat sent / failed"""
+    sender = RecordingSender(failing={"628005"})
+    manager = BroadcastManager(sender, concurrency=3, rate=1000)
+    phones = [f"62800{i}" for i in range(10)] + ["628001"]
+
+    job_id = manager.start("Promo hari ini", phones)
+    manager.wait(job_id, timeout=5)
+
+    job = database.get_broadcast_job(job_id)
+    assert job['status'] == 'completed'
+    assert (job['total'], job['sent'], job['failed'], job['pending']) == (10, 9, 1, 0)
+    assert sorted(sender.sent) == sorted(set(phones) - {"628005"})
+
+def test_resume_skips_completed_recipients(temp_db):
+    """Job yang terputus dilanjutkan tanpa mengirim ulang ke penerima yang selesai"""
+    phones = [f"62800{i}" for i in range(6)]
+    job_id = database.create_broadcast_job("Halo", phones, rate=1000)
+    database.claim_broadcast_job(job_id, "proses-lama", lease_seconds=60)
+    database.mark_broadcast_recipient(job_id, "628000", message_sid="SM1")
+    database.mark_broadcast_recipient(job_id, "628001", message_sid="SM2")
+
+    # Lease proses lama masih berlaku: job belum boleh diambil alih
+    sender = RecordingSender()
+    manager = BroadcastManager(sender, concurrency=2, rate=1000)
+    assert manager.resume_unfinished() == []
+
+    # Setelah lease habis (proses lama mati), job dilanjutkan
+    database.claim_broadcast_job(job_id, "proses-lama", lease_seconds=-1)
+    assert manager.resume_unfinished() == [job_id]
+    manager.wait(job_id, timeout=5)
+
+    assert sorted(sender.sent) == phones[2:]
+    assert database.get_broadcast_job(job_id)['sent'] == 6
+    assert database.get_running_broadcast_jobs() == []
+
+def test_resume_timer_picks_up_orphaned_jobs(temp_db):
+    """Timer background melanjutkan job yang leasenya habis tanpa perlu request masuk"""
+    job_id = database.create_broadcast_job("Halo", ["628001", "628002"], rate=1000)
+    database.claim_broadcast_job(job_id, "proses-lama", lease_seconds=-1)
+
+    sender = RecordingSender()
+    manager = BroadcastManager(sender, concurrency=2, rate=1000)
+    timer = manager.start_resume_timer(interval=0.05)
+    try:
+        deadline = time.monotonic() + 5
+        while database.get_broadcast_job(job_id)['status'] != 'completed' and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        manager.stop_resume_timer()
+        timer.join(timeout=5)
+
+    assert database.get_broadcast_job(job_id)['status'] == 'completed'
+    assert sorted(sender.sent) == ["628001", "628002"]
+
+def test_unrecorded_results_are_failed_after_max_attempts(temp_db, monkeypatch):
+    """Jika hasil kirim gagal dicatat, penerima ditandai failed dan tidak dikirimi tanpa batas"""
+    import broadcast
+
+    mark = broadcast.mark_broadcast_recipient
+    flaky = {"628002": 1, "628003": None}  # gagal sekali / selalu gagal
+
+    def failing_mark(job_id, phone_number, **kwargs):
+        remaining = flaky.get(phone_number, 0)
+        if remaining is None or remaining > 0:
+            if remaining:
+                flaky[phone_number] = remaining - 1
+            raise RuntimeError("database is locked")
+        return mark(job_id, phone_number, **kwargs)
+
+    monkeypatch.setattr(broadcast, 'mark_broadcast_recipient', failing_mark)
+    sender = RecordingSender()
+    manager = BroadcastManager(sender, concurrency=2, rate=1000)
+    job_id = manager.start("Promo", ["628001", "628002", "628003"])
+    manager.wait(job_id, timeout=5)
+
+    job = database.get_broadcast_job(job_id)
+    assert (job['status'], job['sent'], job['failed'], job['pending']) == ('completed', 1, 2, 0)
+    assert sender.sent.count("628002") == 1
+    assert sender.sent.count("628003") == BroadcastManager.MAX_ATTEMPTS
+
+    errors = dict(database.get_connection().execute(
+        "SELECT phone_number, error FROM broadcast_recipients WHERE job_id = ?", (job_id,)).fetchall())
+    assert errors["628002"] == "database is locked"
+    assert errors["628003"] == "max attempts exceeded"
+
+def test_broadcast_endpoints(whatsapp_app):
+    """POST /send-broadcast langsung membalas job id; status bisa dipantau"""
+    app = whatsapp_app.app.test_client()
+
+    response = app.post('/send-broadcast', json={
+        'message': 'Diskon 10%', 'phone_numbers': ['628001', '628002', '628003'], 'rate': 500})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    whatsapp_app.broadcasts.wait(job_id, timeout=5)
+    status = app.get(f'/send-broadcast/{job_id}').get_json()
+    assert (status['status'], status['sent'], status['pending']) == ('completed', 3, 0)
+    assert len(whatsapp_app.client.sent) == 3
+
+    assert app.get('/send-broadcast/999').status_code == 404
+    assert app.post('/send-broadcast', json={'message': 'x'}).status_code == 400
+    for rate in (0, -5, 'cepat', None, 'inf', '1e400', 'nan', whatsapp_app.broadcasts.MAX_RATE + 1):
+        response = app.post('/send-broadcast', json={
+            'message': 'x', 'phone_numbers': ['628001'], 'rate': rate})
+        assert response.status_code == 400, rate
+    for phone_numbers in ('628001,628002', ['628001', ''], ['628001', 628002], ['628001', None], {'a': '628001'}):
+        response = app.post('/send-broadcast', json={'message': 'x', 'phone_numbers': phone_numbers})
+        assert response.status_code == 400, phone_numbers
+    assert database.get_broadcast_job(job_id + 1) is None
+
+def test_requests_do_not_check_broadcast_jobs(whatsapp_app, temp_db):
+    """Webhook, /health, dan /metrics tidak menjalankan query job broadcast"""
+    app = whatsapp_app.app.test_client()
+    assert app.post('/webhook', data={'From': 'whatsapp:628001', 'Body': 'halo'}).status_code == 200
+    assert app.get('/health').status_code == 200
+    assert app.get('/metrics').status_code == 200
+    assert whatsapp_app.outbound_queue.drain(timeout=5)
+    assert not os.path.exists(temp_db)
+
+if __name__ == "__main__":
+    print("📣 TESTING BROADCAST JOBS")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
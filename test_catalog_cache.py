@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test untuk cache teks katalog produk (OrderBot dan webhook Flask)
+"""
+
+import sys
+
+import pytest
+
+import database
+from chatbot import OrderBot
+
+def count_renders(monkeypatch, owner, name='render_product_catalog'):
+    """Bungkus fungsi render katalog agar jumlah pemanggilannya tercatat"""
+    calls = []
+    render = getattr(owner, name)
+
+    def counting_render(products):
+        calls.append(len(products))
+        return render(products)
+
+    monkeypatch.setattr(owner, name, counting_render)
+    return calls
+
+def check_catalog_cache(show_catalog, calls, tmp_path):
+    """Cache dipakai ulang sampai katalog berubah atau database diganti"""
+    database.add_product("Kopi Arabika", 75000, 50)
+    first = show_catalog()
+    assert show_catalog() == first
+    assert len(calls) == 1
+
+    product_id = database.add_product("Teh Manis", 5000, 20)
+    assert "Teh Manis" in show_catalog()
+    assert len(calls) == 2
+
+    database.update_product_stock(product_id, 7)
+    assert "Stok: 7" in show_catalog()
+    assert len(calls) == 3
+
+    # Database lain dengan versi tabel products yang sama
+    database.set_db_path(str(tmp_path / 'lain.db'))
+    for name in ("Nasi Gudeg", "Kerupuk", "Es Jeruk"):
+        database.add_product(name, 3000, 10)
+    other = show_catalog()
+    assert "Nasi Gudeg" in other and "Kopi Arabika" not in other
+    assert len(calls) == 4
+
+def test_orderbot_catalog_cache(temp_db, tmp_path, monkeypatch):
+    """Katalog OrderBot di-render ulang hanya jika produk berubah atau database diganti"""
+    bot = OrderBot()
+    calls = count_renders(monkeypatch, bot)
+    check_catalog_cache(bot.show_product_catalog, calls, tmp_path)
+
+def test_webhook_catalog_cache(whatsapp_app, tmp_path, monkeypatch):
+    """Katalog webhook Flask di-render ulang hanya jika produk berubah atau database diganti"""
+    calls = count_renders(monkeypatch, whatsapp_app)
+    check_catalog_cache(whatsapp_app.get_product_catalog, calls, tmp_path)
+
+if __name__ == "__main__":
+    print("📋 TESTING CATALOG CACHE")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Test untuk migrasi skema dan query pesanan di database.py
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+import database
+
+def test_migrations_reach_schema_version_with_indexes(temp_db):
+    """Database baru langsung berada di versi skema terbaru beserta index orders"""
+    conn = database.get_connection()
+    assert database.get_schema_version() == database.SCHEMA_VERSION
+
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(orders)")}
+    assert {"idx_orders_order_date", "idx_orders_status_date", "idx_orders_phone_date"} <= indexes
+
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM orders WHERE status = 'pending' ORDER BY order_date DESC"
+    ).fetchall()
+    assert "idx_orders_status_date" in str(plan)
+
+def test_migrations_upgrade_legacy_database_idempotently(temp_db):
+    """Database lama (tanpa user_version) di-upgrade tanpa kehilangan data"""
+    legacy = sqlite3.connect(temp_db)
+    legacy.execute('''
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            total_amount REAL NOT NULL,
+            status TEXT DEFAULT 'pending',
+            order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            delivery_address TEXT
+        )
+    ''')
+    legacy.execute("INSERT INTO orders (customer_name, phone_number, product_name, quantity, price, total_amount) "
+                   "VALUES ('Budi', '628001', 'Kopi', 1, 1000, 1000)")
+    legacy.commit()
+    legacy.close()
+
+    database.init_database()
+    database.init_database()
+    assert database.get_schema_version() == database.SCHEMA_VERSION
+    assert len(database.get_all_orders()) == 1
+
+    conn = database.get_connection()
+    database.add_column_if_missing(conn, 'orders', 'notes', 'TEXT')
+    database.add_column_if_missing(conn, 'orders', 'notes', 'TEXT')
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(orders)")]
+    assert columns.count('notes') == 1
+
+def add_orders_at(conn, rows):
+    """Tambah pesanan dengan tanggal tertentu: (nama, status, order_date, total)"""
+    with conn:
+        conn.executemany('''
+            INSERT INTO orders (customer_name, phone_number, product_name, quantity, price,
+                                total_amount, status, order_date)
+            VALUES (?, '628001', 'Kopi', 1, ?, ?, ?, ?)
+        ''', [(name, total, total, status, order_date) for name, status, order_date, total in rows])
+
+def test_keyset_pagination_and_filters(temp_db):
+    """Halaman berurutan tidak tumpang tindih dan filter diterapkan di SQL"""
+    conn = database.get_connection()
+    add_orders_at(conn, [
+        (f"Customer {i}", "pending" if i % 2 else "delivered",
+         f"2025-07-{1 + i // 4:02d} 10:00:00", 1000 * (i + 1))
+        for i in range(25)
+    ])
+
+    seen = []
+    after = None
+    while True:
+        page = database.get_orders_page(10, after=after)
+        if not page:
+            break
+        seen.extend(order[0] for order in page)
+        after = (page[-1][8], page[-1][0])
+
+    assert seen == [order[0] for order in database.get_orders()]
+    assert len(seen) == len(set(seen)) == 25
+
+    assert [order[0] for order in database.get_latest_orders(3)] == seen[:3]
+    assert database.count_orders(status="pending") == 12
+    assert all(order[7] == "pending" for order in database.get_orders_page(50, status="pending"))
+    assert database.count_orders(customer="customer 2") == 6
+
+    july_2 = database.get_orders(date_from="2025-07-02", date_to="2025-07-02")
+    assert len(july_2) == 4 and all(order[8].startswith("2025-07-02") for order in july_2)
+
+    summary = database.get_order_summary()
+    assert summary['total_orders'] == 25
+    assert summary['pending_orders'] == 12
+    assert summary['total_revenue'] == sum(1000 * (i + 1) for i in range(25))
+    assert database.get_order_date_range()[0].isoformat() == "2025-07-01"
+
+def rollup_rows(conn):
+    return conn.execute(
+        "SELECT day, product_name, status, order_count, quantity, revenue FROM daily_sales ORDER BY 1, 2, 3"
+    ).fetchall()
+
+def recomputed_rows(conn):
+    return conn.execute('''
+        SELECT date(order_date), product_name, COALESCE(status, 'pending'), COUNT(*), SUM(quantity), SUM(total_amount)
+        FROM orders GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+    ''').fetchall()
+
+def test_daily_sales_rollup_follows_order_changes(temp_db):
+    """Rollup harian selalu sama dengan agregasi ulang tabel orders"""
+    conn = database.get_connection()
+    add_orders_at(conn, [
+        ("Budi", "pending", "2025-07-01 09:00:00", 1000),
+        ("Sari", "pending", "2025-07-01 15:00:00", 2000),
+        ("Andi", "delivered", "2025-07-02 10:00:00", 4000),
+    ])
+    assert rollup_rows(conn) == recomputed_rows(conn)
+
+    first_id = database.get_orders()[-1][0]
+    database.update_order_status(first_id, "delivered")
+    with conn:
+        conn.execute("UPDATE orders SET order_date = '2025-07-03 08:00:00', quantity = 3 "
+                     "WHERE customer_name = 'Sari'")
+        conn.execute("DELETE FROM orders WHERE customer_name = 'Andi'")
+    assert rollup_rows(conn) == recomputed_rows(conn)
+
+    summary = database.get_order_summary(date_from="2025-07-01", date_to="2025-07-02")
+    assert summary['total_orders'] == 1 and summary['delivered_orders'] == 1
+    assert database.get_daily_sales() == [("2025-07-01", 1, 1000.0), ("2025-07-03", 1, 2000.0)]
+    assert database.get_best_sellers(1) == [("Kopi", 4, 3000.0)]
+    assert dict(database.get_status_counts()) == {"delivered": 1, "pending": 1}
+
+    report = database.get_sales_report("2025-07-02", "2025-07-03", top_products=5)
+    assert report['summary']['total_orders'] == 1 and report['summary']['total_revenue'] == 2000
+    assert report['daily'] == [("2025-07-03", 1, 2000.0)]
+    assert report['best_sellers'] == [("Kopi", 3, 2000.0)]
+    assert report['status_counts'] == [("pending", 1)]
+
+    # Backfill migrasi membangun ulang rollup yang sama
+    expected = rollup_rows(conn)
+    with conn:
+        conn.execute("DELETE FROM daily_sales")
+        conn.execute("PRAGMA user_version = 4")
+    database.migrate_database()
+    assert rollup_rows(conn) == expected
+
+def test_order_writes_bump_version_and_keep_rollup_consistent(temp_db):
+    """Setiap INSERT/UPDATE/DELETE pesanan menaikkan versi 'orders' (kunci cache dashboard)
+    dan daily_sales tetap sama dengan agregasi ulang"""
+    conn = database.get_connection()
+    versions = [database.get_table_version('orders')]
+
+    database.add_order("Budi", "628001", "Kopi", 2, 1000)
+    database.add_order("Sari", "628002", "Teh", 1, 500)
+    versions.append(database.get_table_version('orders'))
+    assert rollup_rows(conn) == recomputed_rows(conn)
+
+    order_id = database.get_orders()[0][0]
+    database.update_order_status(order_id, "delivered")
+    versions.append(database.get_table_version('orders'))
+    assert rollup_rows(conn) == recomputed_rows(conn)
+
+    with conn:
+        conn.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+    versions.append(database.get_table_version('orders'))
+    assert rollup_rows(conn) == recomputed_rows(conn)
+
+    assert versions == sorted(set(versions))
+    assert database.get_table_cache_key('orders') == (temp_db, versions[-1])
+    assert database.get_order_summary()['total_orders'] == 1
+
+def test_sales_report_can_include_every_product(temp_db):
+    """top_products=None (laporan dashboard) memuat semua produk, bukan hanya 10 teratas"""
+    for i in range(12):
+        database.add_order("Budi", "628001", f"Produk {i:02d}", i + 1, 1000)
+
+    assert len(database.get_sales_report()['best_sellers']) == 10
+    best_sellers = database.get_sales_report(top_products=None)['best_sellers']
+    assert [name for name, _, _ in best_sellers] == [f"Produk {i:02d}" for i in reversed(range(12))]
+
+def test_schema_is_prepared_lazily_on_first_connection(temp_db):
+    """Tanpa init_database(), koneksi pertama ke database baru menyiapkan skema sekali"""
+    assert not os.path.exists(temp_db)
+    assert database.count_orders() == 0
+    assert database.get_schema_version() == database.SCHEMA_VERSION
+    assert temp_db in database._schema_ready
+
+    # Koneksi baru ke database yang sudah siap tidak menjalankan migrasi lagi
+    statements = []
+    database.close_connection()
+    conn = database.get_connection()
+    conn.set_trace_callback(statements.append)
+    database.add_order("Budi", "628001", "Kerupuk", 2, 3000)
+    assert not any('CREATE' in statement for statement in statements)
+
+def database_file(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+def test_set_db_path_switches_thread_connection(temp_db, tmp_path):
+    """Satu koneksi WAL per thread; set_db_path menutup koneksi lama dan membuka file baru"""
+    conn = database.get_connection()
+    assert database.get_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    database.add_order("Budi", "628001", "Kopi", 1, 1000)
+
+    other_path = str(tmp_path / 'lain.db')
+    database.set_db_path(other_path)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+    other = database.get_connection()
+    assert other is not conn
+    assert os.path.samefile(database_file(other), other_path)
+    assert database.count_orders() == 0
+
+    # Thread lain memakai koneksinya sendiri ke database yang sama
+    seen = []
+
+    def open_in_thread():
+        conn = database.get_connection()
+        seen.append((conn, database_file(conn)))
+        database.close_connection()
+
+    thread = threading.Thread(target=open_in_thread)
+    thread.start()
+    thread.join()
+    assert seen[0][0] is not other
+    assert os.path.samefile(seen[0][1], other_path)
+
+    database.set_db_path(temp_db)
+    assert database.count_orders() == 1
+
+if __name__ == "__main__":
+    print("🗄️ TESTING DATABASE")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
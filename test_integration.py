@@ -4,8 +4,9 @@ Test script untuk memverifikasi integrasi Node.js dengan Python chatbot
 """
 
 import subprocess
-import json
 import time
+from interaction_log import iter_log_entries
+from database import get_all_sessions
 
 def test_nodejs_python_integration():
     """Test integrasi Node.js dengan Python"""
@@ -49,8 +50,10 @@ def check_session_consistency():
     print("=" * 50)
     
     try:
-        with open('/workspaces/streamlit-whatsaapjs/user_sessions.json', 'r') as f:
-            sessions = json.load(f)
+        sessions = get_all_sessions()
+        if not sessions:
+            print("⚠️ No sessions found")
+            return
         
         print(f"📊 Total active sessions: {len(sessions)}")
         
@@ -59,12 +62,9 @@ def check_session_consistency():
             order_data = session.get('order_data', {})
             print(f"📱 {phone}: step='{step}', has_order_data={bool(order_data)}")
             
-            if 'product' in order_data:
-                product = order_data['product']
-                print(f"   🛍️ Product: {product[1] if len(product) > 1 else 'Unknown'}")
+            if 'product_id' in order_data:
+                print(f"   🛍️ Product id: {order_data['product_id']}")
                 
-    except FileNotFoundError:
-        print("⚠️ No session file found")
     except Exception as e:
         print(f"❌ Error reading sessions: {e}")
 
@@ -75,35 +75,34 @@ def check_log_files():
     
     # Check Python message logs
     try:
-        with open('/workspaces/streamlit-whatsaapjs/python_message_logs.json', 'r') as f:
-            logs = json.load(f)
-        print(f"📋 Python message logs: {len(logs)} entries")
-        
-        # Show last 3 entries
-        for log in logs[-3:]:
-            timestamp = log.get('timestamp', 'unknown')
-            phone = log.get('phone_number', 'unknown')
-            message = log.get('user_message', '')
-            print(f"   {timestamp}: {phone} -> '{message[:30]}...'")
+        logs = list(iter_log_entries('/workspaces/streamlit-whatsaapjs/python_message_logs'))
+        if logs:
+            print(f"📋 Python message logs: {len(logs)} entries")
+            
+            # Show last 3 entries
+            for log in logs[-3:]:
+                timestamp = log.get('timestamp', 'unknown')
+                phone = log.get('phone_number', 'unknown')
+                message = log.get('user_message', '')
+                print(f"   {timestamp}: {phone} -> '{message[:30]}...'")
+        else:
+            print("⚠️ No Python message logs found")
             
-    except FileNotFoundError:
-        print("⚠️ No Python message logs found")
     except Exception as e:
         print(f"❌ Error reading Python logs: {e}")
     
     # Check session debug logs
     try:
-        with open('/workspaces/streamlit-whatsaapjs/session_debug.json', 'r') as f:
-            debug_logs = json.load(f)
-        print(f"🔍 Session debug logs: {len(debug_logs)} entries")
-        
-        # Show last entry
+        debug_logs = list(iter_log_entries('/workspaces/streamlit-whatsaapjs/session_debug'))
         if debug_logs:
+            print(f"🔍 Session debug logs: {len(debug_logs)} entries")
+            
+            # Show last entry
             last_debug = debug_logs[-1]
             print(f"   Last session: {last_debug.get('phone_number')} at step '{last_debug.get('current_step')}'")
+        else:
+            print("⚠️ No session debug logs found")
             
-    except FileNotFoundError:
-        print("⚠️ No session debug logs found")
     except Exception as e:
         print(f"❌ Error reading debug logs: {e}")
 
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test untuk log interaksi JSON Lines (append, rotasi segmen, dan pembacaan)
+"""
+
+import json
+import os
+import tempfile
+
+from interaction_log import JsonlLogSink, iter_log_entries, iter_log_records, list_segments
+
+def test_rotation_keeps_only_recent_segments():
+    """Segmen lama dihapus sehingga hanya max_segments yang tersisa"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        sink = JsonlLogSink(base, segment_entries=10, max_segments=3, flush_interval=60)
+
+        for i in range(55):
+            sink.write({"n": i})
+        sink.close()
+
+        assert list_segments(base) == [4, 5, 6]
+        numbers = [entry["n"] for entry in iter_log_entries(base)]
+        assert numbers == list(range(30, 55))
+
+def test_resume_appends_to_latest_segment():
+    """Proses baru melanjutkan segmen terakhir tanpa menulis ulang isinya"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        first = JsonlLogSink(base, segment_entries=10, max_segments=3, flush_interval=60)
+        for i in range(7):
+            first.write({"n": i})
+        first.close()
+
+        second = JsonlLogSink(base, segment_entries=10, max_segments=3, flush_interval=60)
+        for i in range(7, 12):
+            second.write({"n": i})
+        second.close()
+
+        assert list_segments(base) == [1, 2]
+        assert [entry["n"] for entry in iter_log_entries(base)] == list(range(12))
+
+def test_reads_legacy_json_before_segments():
+    """File JSON lama tetap terbaca sebelum entri JSON Lines"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        with open(f"{base}.json", 'w', encoding='utf-8') as f:
+            json.dump([{"n": "lama"}], f)
+
+        sink = JsonlLogSink(base, flush_interval=60)
+        sink.write({"n": "baru"})
+        sink.close()
+
+        assert [entry["n"] for entry in iter_log_entries(base)] == ["lama", "baru"]
+
+def test_records_resume_from_position():
+    """Posisi terakhir bisa dipakai lagi untuk membaca hanya entri baru"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        with open(f"{base}.json", 'w', encoding='utf-8') as f:
+            json.dump([{"n": "lama"}], f)
+
+        sink = JsonlLogSink(base, segment_entries=3, max_segments=10, flush_interval=60)
+        for i in range(4):
+            sink.write({"n": i})
+        sink.flush()
+
+        records = list(iter_log_records(base))
+        assert [entry["n"] for _, entry in records] == ["lama", 0, 1, 2, 3]
+        position = records[-1][0]
+
+        for i in range(4, 8):
+            sink.write({"n": i})
+        sink.close()
+
+        # Baris yang belum selesai ditulis belum dibaca dan tidak menggeser posisi
+        with open(sink.segment_path(list_segments(base)[-1]), 'a', encoding='utf-8') as f:
+            f.write('{"n": 8')
+
+        new = list(iter_log_records(base, position))
+        assert [entry["n"] for _, entry in new] == [4, 5, 6, 7]
+        assert list(iter_log_records(base, new[-1][0])) == []
+
+        # Mulai dari posisi entri JSON lama
+        assert [entry["n"] for _, entry in iter_log_records(base, records[0][0])] == list(range(8))
+
+def test_records_report_segments_rotated_away():
+    """Segmen yang terhapus sebelum posisi checkpoint mencapainya dilaporkan lewat on_gap"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        sink = JsonlLogSink(base, segment_entries=3, max_segments=2, flush_interval=60)
+        for i in range(4):
+            sink.write({"n": i})
+        sink.flush()
+        position = list(iter_log_records(base))[1][0]
+        assert position[0] == 1
+
+        for i in range(4, 14):
+            sink.write({"n": i})
+        sink.close()
+        assert list_segments(base) == [4, 5]
+
+        gaps = []
+        new = list(iter_log_records(base, position, on_gap=gaps.append))
+        assert gaps == [[1, 2, 3]]
+        assert [entry["n"] for _, entry in new] == list(range(9, 14))
+
+        # Tanpa segmen yang hilang tidak ada laporan
+        gaps.clear()
+        assert list(iter_log_records(base, new[0][0], on_gap=gaps.append))
+        assert list(iter_log_records(base, on_gap=gaps.append))
+        assert gaps == []
+
+if __name__ == "__main__":
+    print("📝 TESTING INTERACTION LOG SINK")
+    print("=" * 50)
+
+    test_rotation_keeps_only_recent_segments()
+    test_resume_appends_to_latest_segment()
+    test_reads_legacy_json_before_segments()
+    test_records_resume_from_position()
+    test_records_report_segments_rotated_away()
+
+    print("✅ All interaction log tests passed!")
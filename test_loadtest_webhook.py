@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test untuk load test webhook (server lokal kecil dengan client Twilio palsu)
+"""
+
+import sys
+
+import pytest
+
+import database
+from loadtest_webhook import check_orders, run_load, start_local_server
+
+def test_load_test_orders_are_not_lost_or_duplicated(temp_db, monkeypatch):
+    """Semua pengguna menyelesaikan alur dan tepat satu pesanan tersimpan per nomor"""
+    monkeypatch.setenv('WHATSAPP_FAKE_CLIENT', '1')
+    url, server, whatsapp_bot = start_local_server()
+    try:
+        phones = [f"6287000{user:03d}" for user in range(10)]
+
+        result = run_load(url, phones, rate=500, concurrency=4)
+        assert result['errors'] == 0 and result['completed_users'] == 10
+        assert result['requests'] == 60 and result['throughput'] > 0
+        assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] <= result['max_ms']
+
+        orders = check_orders(temp_db, phones, result['completed_phones'])
+        assert orders == {'orders': 10, 'lost': [], 'duplicated': []}
+        assert whatsapp_bot.outbound_queue.drain(timeout=5)
+    finally:
+        server.shutdown()
+
+def test_check_orders_reports_lost_and_duplicated(temp_db):
+    """Nomor tanpa pesanan dilaporkan hilang, nomor dengan dua pesanan dilaporkan dobel"""
+    database.add_order("Budi", "628001", "Kerupuk", 1, 3000)
+    database.add_order("Budi", "628001", "Kerupuk", 1, 3000)
+    database.add_order("Sari", "628002", "Kerupuk", 2, 3000)
+    orders = check_orders(temp_db, ["628001", "628002", "628003"], ["628001", "628002", "628003"])
+
+    assert orders == {'orders': 3, 'lost': ["628003"], 'duplicated': ["628001"]}
+
+if __name__ == "__main__":
+    print("🔥 TESTING WEBHOOK LOAD TEST")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test untuk arsip kolom log interaksi (Parquet / .npz) dan pembacanya
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import log_archive
+from interaction_log import JsonlLogSink, list_segments
+
+def write_logs(base, count, max_segments=2, on_segment_closed=log_archive.archive_segment):
+    """Tulis log lewat sink dengan arsip otomatis saat segmen dirotasi"""
+    sink = JsonlLogSink(base, segment_entries=10, max_segments=max_segments, flush_interval=60,
+                        on_segment_closed=on_segment_closed, can_remove_segment=log_archive.is_archived)
+    start = datetime(2025, 7, 1)
+    for i in range(count):
+        sink.write({
+            "timestamp": (start + timedelta(hours=i)).isoformat(),
+            "phone_number": f"6280{i % 3}",
+            "user_message": str(i),
+            "bot_response": "ok",
+            "error": "Invalid input" if i % 10 == 0 else None,
+            "order_data": {"quantity": i},
+        })
+    sink.close()
+
+def check_archive_keeps_rotated_history():
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        write_logs(base, 45)
+
+        # Segmen aktif hanya menyimpan 2 segmen terakhir; arsip menyimpan sisanya
+        assert list_segments(base) == [4, 5]
+        assert log_archive.archived_segments(base) == [1, 2, 3, 4]
+
+        frame = log_archive.load_log_frame(base, columns=['timestamp', 'user_message', 'error'])
+        assert list(frame.columns) == ['timestamp', 'user_message', 'error']
+        assert frame['user_message'].tolist() == [str(i) for i in range(45)]
+        assert frame['error'].isna().sum() == 40
+
+        window = log_archive.read_archive(base, columns=['user_message'],
+                                          start=datetime(2025, 7, 1, 12), end=datetime(2025, 7, 1, 14))
+        assert window['user_message'].tolist() == ['12', '13', '14']
+
+        sessions = log_archive.read_archive(base, columns=['order_data'])
+        assert sessions['order_data'][0] == '{"quantity": 0}'
+
+def test_parquet_archive():
+    """Arsip Parquet (pyarrow) menyimpan riwayat yang sudah dirotasi"""
+    if log_archive._pyarrow() is None:
+        return
+    check_archive_keeps_rotated_history()
+
+def test_npz_archive_without_pyarrow():
+    """Tanpa pyarrow arsip memakai .npz dengan hasil baca yang sama"""
+    original = log_archive._pyarrow
+    log_archive._pyarrow = lambda: None
+    try:
+        check_archive_keeps_rotated_history()
+    finally:
+        log_archive._pyarrow = original
+
+def test_background_archive_keeps_pandas_out_of_caller():
+    """archive_in_background mengarsipkan di proses lain tanpa memuat pandas di proses penulis log"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        script = (
+            "import sys\n"
+            "from interaction_log import JsonlLogSink\n"
+            "from log_archive import archive_in_background\n"
+            f"sink = JsonlLogSink({base!r}, segment_entries=10, on_segment_closed=archive_in_background)\n"
+            "for i in range(25):\n"
+            "    sink.write({'timestamp': '2025-07-01T00:00:00', 'user_message': str(i)})\n"
+            "sink.close()\n"
+            "print('pandas' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=60)
+        assert result.stdout.strip() == 'False', result.stderr
+
+        deadline = time.time() + 60
+        while log_archive.archived_segments(base) != [1, 2] and time.time() < deadline:
+            time.sleep(0.1)
+        assert log_archive.archived_segments(base) == [1, 2]
+
+def test_archivers_wait_for_lock():
+    """Pengarsip kedua menunggu kunci dilepas, bukan menimpa index.json secara bersamaan"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'logs')
+        write_logs(base, 35, max_segments=10, on_segment_closed=None)
+
+        results = []
+        with log_archive._archive_lock(base):
+            worker = threading.Thread(target=lambda: results.append(log_archive.archive_closed_segments(base)))
+            worker.start()
+            worker.join(timeout=0.5)
+            assert worker.is_alive()
+            assert log_archive.archived_segments(base) == []
+        worker.join(timeout=60)
+
+        assert len(results[0]) == 3
+        assert log_archive.archived_segments(base) == [1, 2, 3]
+
+def test_failed_background_archive_keeps_segments(tmp_path, monkeypatch):
+    """Jika proses pengarsip gagal, errornya tercatat dan segmen tidak dihapus oleh retensi"""
+    # pandas palsu yang gagal diimpor, hanya di proses pengarsip
+    fake_modules = tmp_path / 'broken'
+    fake_modules.mkdir()
+    (fake_modules / 'pandas.py').write_text("raise ImportError('pandas rusak')\n")
+    monkeypatch.setenv('PYTHONPATH', str(fake_modules))
+
+    base = str(tmp_path / 'logs')
+    log_path = os.path.join(log_archive.archive_dir(base), log_archive.LOG_FILE)
+    write_logs(base, 45, on_segment_closed=log_archive.archive_in_background)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if os.path.exists(log_path) and "segment 4: pandas rusak" in open(log_path, encoding='utf-8').read():
+            break
+        time.sleep(0.1)
+    assert "Error archiving" in open(log_path, encoding='utf-8').read()
+    assert log_archive.archived_segments(base) == []
+
+    # Rotasi berikutnya tetap tidak menghapus segmen yang belum diarsipkan
+    write_logs(base, 10, on_segment_closed=None)
+    assert list_segments(base) == [1, 2, 3, 4, 5, 6]
+
+    # Setelah diarsipkan, retensi boleh menghapusnya
+    monkeypatch.delenv('PYTHONPATH')
+    assert log_archive.archived_segments(base) == []
+    log_archive.archive_closed_segments(base)
+    write_logs(base, 10, on_segment_closed=None)
+    assert list_segments(base) == [6, 7]
+
+if __name__ == "__main__":
+    print("📦 TESTING LOG ARCHIVE")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
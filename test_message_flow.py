@@ -3,16 +3,27 @@
 Script untuk testing flow message bot WhatsApp
 """
 
+import os
 import subprocess
 import sys
-import json
 import time
 
+import pytest
+
+import database
+from database import get_session
+
+@pytest.fixture(autouse=True)
+def isolated_database(temp_db):
+    """Di pytest, semua skenario (termasuk proses process_message.py) memakai database sementara"""
+    yield temp_db
+
 def run_message(message, phone_number):
     """Jalankan process_message.py dan return response"""
     try:
         cmd = ["/workspaces/streamlit-whatsaapjs/.venv/bin/python", "process_message.py", message, phone_number]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        env = dict(os.environ, ORDERS_DB_PATH=database.DB_PATH)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30, env=env)
         
         if result.returncode == 0:
             return result.stdout.strip()
@@ -110,18 +121,17 @@ def test_session_persistence():
     
     # Check session state
     try:
-        with open('user_sessions.json', 'r') as f:
-            sessions = json.load(f)
-            if phone in sessions:
-                step = sessions[phone].get('step', 'none')
-                print(f"Session step for {phone}: {step}")
-                product = sessions[phone].get('order_data', {}).get('product')
-                if product:
-                    print(f"Selected product: {product[1]}")
-                else:
-                    print("No product in session")
+        session = get_session(phone)
+        if session:
+            step = session.get('step', 'none')
+            print(f"Session step for {phone}: {step}")
+            product_id = session.get('order_data', {}).get('product_id')
+            if product_id is not None:
+                print(f"Selected product id: {product_id}")
             else:
-                print(f"No session found for {phone}")
+                print("No product in session")
+        else:
+            print(f"No session found for {phone}")
     except Exception as e:
         print(f"Error reading session: {e}")
 
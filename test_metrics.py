@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test untuk metrik Prometheus (histogram, instrumentasi bot/database, endpoint /metrics)
+"""
+
+import sys
+
+import pytest
+
+import database
+import metrics
+
+def test_histogram_renders_cumulative_buckets():
+    """Bucket kumulatif, _sum, _count, dan escaping label sesuai format Prometheus"""
+    histogram = metrics.Histogram('test_latency_seconds', 'Latensi test', ('step',), buckets=(0.1, 1.0))
+    metrics._registry.remove(histogram)
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, 'get_"name"')
+
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP test_latency_seconds Latensi test', '# TYPE test_latency_seconds histogram']
+    assert 'test_latency_seconds_bucket{step="get_\\"name\\"",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{step="get_\\"name\\"",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{step="get_\\"name\\"",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_sum{step="get_\\"name\\""} 4.05' in lines
+    assert 'test_latency_seconds_count{step="get_\\"name\\""} 4' in lines
+
+def test_bot_steps_and_database_calls_are_measured(whatsapp_app):
+    """Setiap pesan dicatat per langkah FSM dan setiap fungsi database per nama"""
+    from chatbot import OrderBot
+
+    metrics.reset()
+    bot = OrderBot()
+    for message in ['halo', '2', 'kerupuk', '2', 'Sari', 'Jl. Mawar 1']:
+        bot.process_message(message, '628001')
+    for message in ['halo', '1', 'kerupuk', 'Sari', '2', 'Jl. Mawar 1']:
+        whatsapp_app.process_order_flow('628002', message)
+    try:
+        database.update_order_status(1, 'dikirim')
+        database.add_order(None, '628003', 'Kerupuk', 1, 3000)
+    except Exception:
+        pass
+
+    assert metrics.BOT_STEP_SECONDS.count('orderbot', 'waiting_address') == 1
+    assert metrics.BOT_STEP_SECONDS.count('orderbot', 'main_menu') == 1
+    assert metrics.BOT_STEP_SECONDS.count('flask', 'get_address') == 1
+    assert metrics.BOT_STEP_SECONDS.count('flask', 'greeting') == 1
+    assert metrics.DB_CALL_SECONDS.count('add_order') == 3
+    assert metrics.DB_CALL_ERRORS.value('add_order') == 1
+    assert metrics.DB_CALL_SECONDS.count('get_connection') == 0
+    assert database.add_order.__name__ == 'add_order'
+
+def test_nested_database_calls_are_measured_once(temp_db):
+    """Fungsi database yang memakai query lain hanya tercatat di level yang dipanggil"""
+    database.add_product("Kerupuk", 3000, 10)
+    metrics.reset()
+
+    assert database.find_product("kerupuk")[1] == "Kerupuk"
+    assert database.get_table_cache_key('products')[0] == temp_db
+    assert metrics.DB_CALL_SECONDS.count('find_product') == 1
+    assert metrics.DB_CALL_SECONDS.count('get_table_cache_key') == 1
+    assert metrics.DB_CALL_SECONDS.count('get_all_products') == 0
+    assert metrics.DB_CALL_SECONDS.count('get_table_version') == 0
+
+    database.add_product("Rempeyek", 4000, 5)
+    assert metrics.DB_CALL_SECONDS.count('add_product') == 1
+    assert metrics.DB_CALL_SECONDS.count('get_table_version') == 0
+
+def test_metrics_endpoint(whatsapp_app, monkeypatch):
+    """GET /metrics mengembalikan teks Prometheus termasuk latensi kirim dan antrian"""
+    from outbound import FakeTwilioClient
+
+    metrics.reset()
+    monkeypatch.setattr(whatsapp_app, 'client', FakeTwilioClient(fail_first=1))
+    with pytest.raises(ConnectionError):
+        whatsapp_app.deliver_whatsapp_message('628001', 'Halo')
+    whatsapp_app.deliver_whatsapp_message('628001', 'Halo')
+
+    response = whatsapp_app.app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    assert 'outbound_send_duration_seconds_count{result="ok"} 1' in body
+    assert 'outbound_send_duration_seconds_count{result="error"} 1' in body
+    assert 'outbound_queue_messages{state="queue_depth"} 0' in body
+    assert '# TYPE bot_step_duration_seconds histogram' in body
+
+if __name__ == "__main__":
+    print("📈 TESTING METRICS")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test untuk antrian pesan keluar (retry/backoff, metrik) dan webhook non-blocking
+"""
+
+import sys
+import threading
+import time
+
+import pytest
+
+from outbound import FakeTwilioClient, OutboundQueue
+
+class FakeTwilioError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+def test_retries_with_backoff_then_succeeds():
+    """Kegagalan sementara diulang sampai terkirim"""
+    fake = FakeTwilioClient(fail_first=2)
+    outbound = OutboundQueue(lambda to, body: fake.messages.create(body=body, from_="bot", to=to),
+                             workers=2, max_retries=3, backoff=0.01)
+    for i in range(5):
+        outbound.enqueue(f"62800{i}", f"pesan {i}")
+
+    assert outbound.drain(timeout=5)
+    stats = outbound.stats()
+    assert (stats['sent'], stats['failed'], stats['retried'], stats['pending']) == (5, 0, 2, 0)
+    assert stats['latency_ms']['max'] >= 0
+    assert sorted(message['body'] for message in fake.sent) == [f"pesan {i}" for i in range(5)]
+
+def test_gives_up_on_permanent_errors():
+    """Error 4xx tidak diulang; error lain berhenti setelah max_retries"""
+    attempts = []
+
+    def send(to, body):
+        attempts.append(to)
+        raise FakeTwilioError(400 if to == "invalid" else 503)
+
+    outbound = OutboundQueue(send, workers=1, max_retries=2, backoff=0.01)
+    outbound.enqueue("invalid", "x")
+    outbound.enqueue("628001", "y")
+
+    assert outbound.drain(timeout=5)
+    assert attempts.count("invalid") == 1
+    assert attempts.count("628001") == 3
+    assert outbound.stats()['failed'] == 2
+
+def test_messages_to_one_phone_stay_in_order_across_retries():
+    """Pesan ke nomor yang sama tidak dikirim bersamaan dan retry tidak menyalip pesan berikutnya"""
+    lock = threading.Lock()
+    active = set()
+    overlaps = []
+    delivered = []
+    failed_once = set()
+
+    def send(to, body):
+        with lock:
+            if to in active:
+                overlaps.append(to)
+            active.add(to)
+        try:
+            time.sleep(0.005)
+            if body.endswith("-0") and to not in failed_once:
+                failed_once.add(to)
+                raise ConnectionError("Fake Twilio error")
+            with lock:
+                delivered.append((to, body))
+        finally:
+            with lock:
+                active.discard(to)
+
+    outbound = OutboundQueue(send, workers=4, max_retries=3, backoff=0.05)
+    phones = [f"62800{i}" for i in range(6)]
+    for n in range(3):
+        for phone in phones:
+            outbound.enqueue(phone, f"{phone}-{n}")
+
+    assert outbound.drain(timeout=5)
+    assert not overlaps
+    for phone in phones:
+        assert [body for to, body in delivered if to == phone] == [f"{phone}-{n}" for n in range(3)]
+    assert outbound.stats()['retried'] == len(phones)
+
+def test_webhook_returns_before_send_completes(whatsapp_app, monkeypatch):
+    """Webhook membalas Twilio tanpa menunggu pengiriman pesan"""
+    fake = FakeTwilioClient(latency=0.5)
+    monkeypatch.setattr(whatsapp_app, 'client', fake)
+
+    started = time.perf_counter()
+    response = whatsapp_app.app.test_client().post(
+        '/webhook', data={'From': 'whatsapp:628009', 'Body': 'halo'})
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert elapsed < 0.5 and not fake.sent
+
+    assert whatsapp_app.outbound_queue.drain(timeout=5)
+    assert fake.sent[0]['to'] == 'whatsapp:628009'
+    assert 'Selamat datang' in fake.sent[0]['body']
+
+    stats = whatsapp_app.app.test_client().get('/outbound-stats').get_json()
+    assert stats['queue_depth'] == 0 and stats['sent'] >= 1
+    assert stats['latency_ms']['max'] >= 500
+
+if __name__ == "__main__":
+    print("📤 TESTING OUTBOUND QUEUE")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test untuk index nama produk (pencarian substring/prefix dan update incremental)
+"""
+
+import sqlite3
+import sys
+
+import pytest
+
+import database
+from product_index import ProductIndex
+
+PRODUCTS = [
+    (1, "Kopi Arabika Premium", 75000.0, 50, "Kopi arabika pilihan", "Minuman"),
+    (2, "Teh Herbal Alami", 45000.0, 30, "Teh herbal", "Minuman"),
+    (3, "Keripik Singkong", 25000.0, 100, "Keripik renyah", "Makanan"),
+    (4, "Sambal Homemade", 35000.0, 25, "Sambal pedas", "Makanan"),
+    (5, "Madu Murni", 85000.0, 20, "Madu murni", "Kesehatan"),
+]
+
+def like_search(term):
+    """Referensi: perilaku query LIKE yang lama"""
+    for product in PRODUCTS:
+        if term.lower() in product[1].lower():
+            return product
+    return None
+
+def test_search_matches_like_semantics():
+    """Hasil index sama dengan LOWER(name) LIKE '%term%' untuk berbagai panjang kata"""
+    index = ProductIndex(PRODUCTS)
+    for term in ["kopi", "KERIPIK", "a", "ma", "teh", "ik s", "madu murni", "o", "zz", "premium x"]:
+        assert index.search(term) == like_search(term), term
+
+def test_incremental_update_and_remove():
+    """Perubahan nama/stok diterapkan tanpa membangun ulang index"""
+    index = ProductIndex(PRODUCTS)
+    index.update((3, "Keripik Singkong", 25000.0, 7, "Keripik renyah", "Makanan"))
+    assert index.search("singkong")[3] == 7
+
+    index.update((3, "Keripik Pisang", 25000.0, 7, "Keripik renyah", "Makanan"))
+    assert index.search("singkong") is None
+    assert index.search("pisang")[0] == 3
+
+    index.remove(5)
+    assert index.search("madu") is None
+    assert [product[0] for product in index.search_all("a")] == [1, 2, 3, 4]
+
+def test_fuzzy_search_tolerates_typos():
+    """Salah ketik tetap menemukan produk yang benar, teks acak tidak"""
+    index = ProductIndex(PRODUCTS + [(6, "Ayam Goreng", 20000.0, 30, "Ayam goreng crispy", "Makanan")])
+    for term, expected in [("kopi arabka", 1), ("ayam gorng", 6), ("keripk singkong", 3), ("sambel", 4)]:
+        matches = index.fuzzy_search(term, limit=1)
+        assert matches and matches[0][1][0] == expected, term
+
+    for term in ["halo apa kabar", "produk tidak ada", "ok"]:
+        assert index.fuzzy_search(term) == [], term
+
+def test_database_lookup_sees_external_changes(temp_db):
+    """Perubahan dari koneksi lain (mis. dashboard) terdeteksi lewat versi tabel"""
+    database.add_product("Kopi Arabika Premium", 75000, 50)
+    assert database.get_product_by_name("kopi")[1] == "Kopi Arabika Premium"
+
+    other = sqlite3.connect(temp_db)
+    other.execute("INSERT INTO products (name, price, stock) VALUES ('Kopi Luwak', 150000, 5)")
+    other.execute("UPDATE products SET stock = 0 WHERE name = 'Kopi Arabika Premium'")
+    other.commit()
+    other.close()
+
+    assert database.get_product_by_name("luwak")[1] == "Kopi Luwak"
+    assert database.get_product_by_name("arabika")[3] == 0
+
+def test_database_switch_rebuilds_index(temp_db, tmp_path):
+    """Index tidak dipakai ulang untuk database lain walau versi tabel products sama"""
+    database.add_product("Kopi Arabika", 75000, 50)
+    assert database.get_product_by_name("kopi")[1] == "Kopi Arabika"
+
+    database.set_db_path(str(tmp_path / 'lain.db'))
+    database.add_product("Teh Manis", 5000, 20)
+    assert database.get_product_by_name("kopi") is None
+    assert database.get_product_by_name("teh")[1] == "Teh Manis"
+    assert database.get_product(1)[1] == "Teh Manis"
+
+    database.set_db_path(temp_db)
+    assert database.get_product_by_name("teh") is None
+    assert database.get_product(1)[1] == "Kopi Arabika"
+
+if __name__ == "__main__":
+    print("🔎 TESTING PRODUCT INDEX")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
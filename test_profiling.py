@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test untuk profiling per pesan (sampling dan file profil per langkah FSM)
+"""
+
+import os
+import pstats
+import sys
+import tempfile
+
+import pytest
+
+from interaction_log import JsonlLogSink
+from profiling import MessageProfiler
+
+def busy_step():
+    return sum(range(1000))
+
+def profiled_calls(path, function_name):
+    stats = pstats.Stats(path)
+    return sum(calls for (_, _, name), (_, calls, _, _, _) in stats.stats.items() if name == function_name)
+
+def test_samples_are_merged_per_step():
+    """Sampel dengan langkah sama digabung ke satu file .prof"""
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = MessageProfiler('test', sample_rate=1.0, directory=tmp)
+        for step in ('waiting_quantity', 'waiting_quantity', 'main_menu'):
+            with profiler.sample(step):
+                busy_step()
+
+        assert sorted(os.listdir(tmp)) == ['test-main_menu.prof', 'test-waiting_quantity.prof']
+        assert profiled_calls(profiler.path_for('waiting_quantity'), 'busy_step') == 2
+        assert profiler.samples == {'waiting_quantity': 2, 'main_menu': 1}
+
+def test_disabled_profiler_writes_nothing():
+    """Tanpa PROFILE_SAMPLE_RATE tidak ada pesan yang diprofil"""
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = MessageProfiler('test', sample_rate=0.0, directory=tmp)
+        with profiler.sample('greeting') as sample:
+            sample.step = 'main_menu'
+            busy_step()
+        assert os.listdir(tmp) == []
+
+def test_handlers_write_profiles_by_step(whatsapp_app, tmp_path, monkeypatch):
+    """process_message dan webhook Flask menulis profil dengan nama langkah FSM"""
+    import process_message
+
+    tmp = str(tmp_path / 'profiles')
+    message_log = JsonlLogSink(os.path.join(tmp_path, 'messages'))
+    session_log = JsonlLogSink(os.path.join(tmp_path, 'sessions'))
+    monkeypatch.setattr(process_message, 'message_profiler', MessageProfiler('process_message', 1.0, tmp))
+    monkeypatch.setattr(process_message, 'message_log', message_log)
+    monkeypatch.setattr(process_message, 'session_log', session_log)
+    monkeypatch.setattr(process_message, '_sessions_migrated', True)  # jangan sentuh user_sessions.json repo
+    monkeypatch.setattr(whatsapp_app, 'webhook_profiler', MessageProfiler('flask', 1.0, tmp))
+    try:
+        process_message.handle_message('halo', '628001')
+        process_message.handle_message('', '628001')
+        app = whatsapp_app.app.test_client()
+        app.post('/webhook', data={'From': 'whatsapp:628002', 'Body': 'halo'})
+        app.post('/webhook', data={'From': 'whatsapp:628002', 'Body': '1'})
+        whatsapp_app.outbound_queue.drain(timeout=5)
+    finally:
+        message_log.close()
+        session_log.close()
+
+    files = set(os.listdir(tmp))
+    assert {'process_message-greeting.prof', 'process_message-invalid.prof',
+            'flask-greeting.prof', 'flask-menu_selection.prof'} <= files
+
+if __name__ == "__main__":
+    print("🔬 TESTING PROFILING")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
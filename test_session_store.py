@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test untuk session store per nomor HP di database
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+import database
+from chatbot import OrderBot
+from session_state import ChatSession, compact_session, compact_session_file
+
+# Session format lama: seluruh baris produk tersimpan di order_data
+LEGACY_SESSION = {
+    "step": "waiting_name",
+    "order_data": {
+        "product": [3, "Ayam Goreng", 20000.0, 30, "Ayam goreng crispy", "Makanan"],
+        "quantity": 2,
+    },
+}
+
+def test_get_save_delete_session(temp_db):
+    """Session disimpan, dibaca, dan dihapus per nomor HP"""
+    assert database.get_session("628001") is None
+
+    database.save_session("628001", {"step": "waiting_name", "order_data": {"quantity": 2}})
+    database.save_session("628002", {"step": "main_menu", "order_data": {}})
+    database.save_session("628001", {"step": "waiting_address", "order_data": {"quantity": 2}})
+
+    assert database.get_session("628001")["step"] == "waiting_address"
+    assert database.get_session("628002")["step"] == "main_menu"
+
+    database.delete_session("628001")
+    assert database.get_session("628001") is None
+    assert set(database.get_all_sessions()) == {"628002"}
+
+def test_migrate_sessions_from_json_once(temp_db, tmp_path):
+    """user_sessions.json dimigrasi sekali tanpa menimpa session yang lebih baru"""
+    path = os.path.join(tmp_path, 'user_sessions.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "628001": {"step": "waiting_quantity", "order_data": {}},
+            "628002": {"step": "greeting", "order_data": {}},
+        }, f)
+
+    database.save_session("628002", {"step": "main_menu", "order_data": {}})
+
+    assert database.migrate_sessions_from_json(path) == 2
+    assert not os.path.exists(path)
+    assert os.path.exists(f"{path}.migrated")
+    assert database.migrate_sessions_from_json(path) == 0
+
+    assert database.get_session("628001")["step"] == "waiting_quantity"
+    assert database.get_session("628002")["step"] == "main_menu"
+
+@pytest.mark.parametrize("content", ['{"628001": {"step": "waiting_quantity"', '["628001"]'])
+def test_corrupt_sessions_json_is_left_in_place(temp_db, tmp_path, content):
+    """user_sessions.json yang rusak tidak dimigrasi dan tidak diganti nama"""
+    path = os.path.join(tmp_path, 'user_sessions.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+    with pytest.raises(ValueError):
+        database.migrate_sessions_from_json(path)
+
+    assert os.path.exists(path)
+    assert not os.path.exists(f"{path}.migrated")
+    assert database.get_all_sessions() == {}
+
+def test_chat_session_round_trip_and_legacy_format():
+    """Session ringkas hanya menyimpan id produk; format lama tetap terbaca"""
+    session = ChatSession.from_dict(LEGACY_SESSION)
+    assert session == ChatSession('waiting_name', product_id=3, quantity=2)
+    assert session.to_dict() == {"step": "waiting_name", "order_data": {"product_id": 3, "quantity": 2}}
+    assert ChatSession.from_dict(session.to_dict()) == session
+    assert ChatSession.from_dict(None).to_dict() == {"step": "greeting", "order_data": {}}
+    assert not hasattr(session, '__dict__')
+
+def test_stored_and_legacy_sessions_are_compacted(temp_db, tmp_path):
+    """Migrasi skema dan migrasi user_sessions.json menulis session ringkas"""
+    database.save_session("628001", LEGACY_SESSION)
+    conn = database.get_connection()
+    with conn:
+        conn.execute("PRAGMA user_version = 6")  # ulangi migrasi 7
+    database.migrate_database()
+    assert database.get_session("628001") == compact_session(LEGACY_SESSION)
+
+    path = os.path.join(tmp_path, 'user_sessions.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"628002": LEGACY_SESSION}, f)
+    assert database.migrate_sessions_from_json(path) == 1
+    assert database.get_session("628002")["order_data"] == {"product_id": 3, "quantity": 2}
+
+def test_compact_session_file_rewrites_sessions_and_debug_logs(tmp_path):
+    """File session dan log debug (JSON / JSONL) ditulis ulang ke format ringkas"""
+    sessions_path = os.path.join(tmp_path, 'user_sessions.json')
+    debug_path = os.path.join(tmp_path, 'session_debug.000001.jsonl')
+    with open(sessions_path, 'w', encoding='utf-8') as f:
+        json.dump({"628001": LEGACY_SESSION}, f)
+    with open(debug_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"phone_number": "628001", "current_step": "waiting_name",
+                            "order_data": LEGACY_SESSION["order_data"]}) + "\n")
+
+    assert compact_session_file(sessions_path) == 1
+    assert compact_session_file(debug_path) == 1
+    with open(sessions_path, 'r', encoding='utf-8') as f:
+        assert json.load(f)["628001"]["order_data"] == {"product_id": 3, "quantity": 2}
+    with open(debug_path, 'r', encoding='utf-8') as f:
+        entry = json.loads(f.readline())
+    assert entry["order_data"] == {"product_id": 3, "quantity": 2}
+    assert entry["current_step"] == "waiting_name"
+
+def test_order_uses_current_product_details(temp_db):
+    """Harga dibaca ulang dari katalog saat pesanan dibuat; produk terhapus ditangani"""
+    bot = OrderBot()
+    for message in ['halo', '2', 'kerupuk', '2', 'Sari']:
+        bot.process_message(message, '628001')
+    product_id = bot.user_sessions['628001'].product_id
+
+    conn = database.get_connection()
+    with conn:
+        conn.execute("UPDATE products SET price = 3500 WHERE id = ?", (product_id,))
+    response = bot.process_message('Jl. Mawar No. 1', '628001')
+    assert "Rp 7,000" in response
+    assert database.get_orders()[0][5] == 3500
+
+    for message in ['halo', '2', 'kerupuk']:
+        bot.process_message(message, '628002')
+    with conn:
+        conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+    response = bot.process_message('2', '628002')
+    assert "sudah tidak tersedia" in response
+    assert bot.user_sessions['628002'] == ChatSession('waiting_product')
+
+if __name__ == "__main__":
+    print("💾 TESTING SESSION STORE")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
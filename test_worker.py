@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test untuk mode worker process_message.py (protokol JSON per baris via stdio dan Unix socket)
+"""
+
+import io
+import json
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+import process_message
+from interaction_log import JsonlLogSink
+
+@pytest.fixture
+def worker(temp_db, tmp_path, monkeypatch):
+    """process_message dengan database, log, dan session sementara"""
+    message_log = JsonlLogSink(os.path.join(tmp_path, 'messages'))
+    session_log = JsonlLogSink(os.path.join(tmp_path, 'sessions'))
+    monkeypatch.setattr(process_message, 'message_log', message_log)
+    monkeypatch.setattr(process_message, 'session_log', session_log)
+    monkeypatch.setattr(process_message, '_sessions_migrated', True)  # jangan sentuh user_sessions.json repo
+    yield process_message
+    message_log.close()
+    session_log.close()
+
+def test_stdio_round_trip(worker):
+    """Setiap baris request dibalas satu baris JSON; request rusak tidak menghentikan worker"""
+    requests = [
+        json.dumps({"id": 1, "message": "halo", "phone_number": "628001"}),
+        "",
+        "bukan json",
+        "[1, 2]",
+        json.dumps({"id": 3, "message": 5, "phone_number": "628001"}),
+        json.dumps({"id": 4, "message": "1", "phone_number": "628001"}),
+    ]
+    stdout = io.StringIO()
+    original_stdout = sys.stdout
+    worker.serve_stdio(io.StringIO("\n".join(requests) + "\n"), stdout)
+    assert sys.stdout is original_stdout
+
+    replies = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [reply['id'] for reply in replies] == [1, None, None, 3, 4]
+    assert "Selamat datang" in replies[0]['response']
+    assert all('error' in reply for reply in replies[1:4])
+    assert "MENU PRODUK" in replies[4]['response']
+
+def test_socket_round_trip_uses_one_processing_thread(worker, tmp_path, monkeypatch):
+    """Banyak koneksi client dilayani, tetapi pesan diproses di satu thread (satu koneksi SQLite)"""
+    threads = set()
+    handle_message = worker.handle_message
+
+    def recording_handle_message(message, phone_number):
+        threads.add(threading.current_thread().name)
+        return handle_message(message, phone_number)
+
+    monkeypatch.setattr(worker, 'handle_message', recording_handle_message)
+    path = str(tmp_path / 'worker.sock')
+    server = worker.make_socket_server(path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        replies = {}
+
+        def client(phone_number):
+            replies[phone_number] = [worker.request_worker(message, phone_number, path)
+                                     for message in ("halo", "1")]
+
+        clients = [threading.Thread(target=client, args=(f"62800{i}",)) for i in range(4)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join(timeout=10)
+
+        assert len(replies) == 4
+        for greeting, catalog in replies.values():
+            assert "Selamat datang" in greeting and "MENU PRODUK" in catalog
+        assert len(threads) == 1
+
+        # Request rusak dibalas error dan koneksi tetap bisa dipakai
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(10)
+            sock.connect(path)
+            with sock.makefile('rwb') as stream:
+                stream.write(b"bukan json\n")
+                stream.write(json.dumps({"id": 7, "message": "halo", "phone_number": "628009"}).encode() + b"\n")
+                stream.flush()
+                error = json.loads(stream.readline())
+                reply = json.loads(stream.readline())
+        assert error['id'] is None and 'error' in error
+        assert reply['id'] == 7 and "Selamat datang" in reply['response']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    print("🔌 TESTING MESSAGE WORKER")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q"]))
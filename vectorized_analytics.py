@@ -0,0 +1,144 @@
+"""
+Analitik log berbasis kolom (NumPy/pandas) untuk log interaksi berukuran besar
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from analytics_engine import AnalyticsEngine, classify_message
+
+# Kode kecil (int8) untuk jenis pesan dan jenis error
+MESSAGE_TYPES = ('greeting', 'menu_selection', 'product_query', 'quantity', 'other')
+ERROR_TYPES = ('Invalid Input', 'Timeout', 'Database Error', 'Other')
+NO_ERROR = -1
+
+def classify_error(error):
+    """Jenis error log (aturan yang sama dengan ErrorStats)"""
+    if 'Invalid input' in error:
+        return 'Invalid Input'
+    if 'timeout' in error.lower():
+        return 'Timeout'
+    if 'database' in error.lower():
+        return 'Database Error'
+    return 'Other'
+
+def _factorize_codes(values, classify, labels, missing=None):
+    # Klasifikasi cukup sekali per nilai unik, lalu disebar lewat kode
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    table = np.array([
+        labels.index(classify(value)) if value or missing is None else missing
+        for value in uniques
+    ], dtype=np.int8)
+    result = np.full(len(codes), missing if missing is not None else 0, dtype=np.int8)
+    present = codes >= 0
+    result[present] = table[codes[present]]
+    return result, codes, uniques
+
+def load_log_columns(entries):
+    """Membaca entri log ke DataFrame kolom: timestamp, phone, message_type, order_start, error_type"""
+    timestamps = []
+    phones = []
+    messages = []
+    errors = []
+    for entry in entries:
+        timestamps.append(entry.get('timestamp'))
+        phones.append(entry['phone_number'])
+        messages.append(entry.get('user_message'))
+        errors.append(entry.get('error'))
+    return _build_columns(timestamps, phones, messages, errors)
+
+def frame_to_log_columns(frame):
+    """Seperti load_log_columns, dari DataFrame arsip (log_archive.load_log_frame)"""
+    def column(name):
+        values = frame[name] if name in frame else pd.Series([None] * len(frame))
+        return values.astype(object).where(values.notna(), None).tolist()
+
+    return _build_columns(frame['timestamp'], column('phone_number'),
+                          column('user_message'), column('error'))
+
+def _build_columns(timestamps, phones, messages, errors):
+    # Pesan kosong / None menjadi 'other' dan bukan awal pesanan
+    message_types, message_codes, message_uniques = _factorize_codes(
+        messages, lambda message: classify_message(message.lower()), MESSAGE_TYPES,
+        missing=MESSAGE_TYPES.index('other'))
+    order_start = np.zeros(len(message_codes), dtype=bool)
+    present = message_codes >= 0
+    order_start[present] = np.asarray(message_uniques == '2', dtype=bool)[message_codes[present]]
+    error_types, _, _ = _factorize_codes(errors, classify_error, ERROR_TYPES, missing=NO_ERROR)
+
+    # Kode telepon mengikuti urutan kemunculan (sama dengan urutan Counter)
+    phone_codes, phone_uniques = pd.factorize(pd.Series(phones, dtype=object))
+
+    return pd.DataFrame({
+        'timestamp': _to_datetime(timestamps),
+        'phone': pd.Categorical.from_codes(phone_codes, categories=phone_uniques),
+        'message_type': message_types,
+        'order_start': order_start,
+        'error_type': error_types,
+    })
+
+def _to_datetime(timestamps):
+    if isinstance(timestamps, pd.Series) and pd.api.types.is_datetime64_any_dtype(timestamps):
+        return timestamps.reset_index(drop=True)
+    return pd.to_datetime(pd.Series(timestamps, dtype=object), format='ISO8601', errors='coerce')
+
+def _counter_by_first_seen(codes, labels):
+    # Counter dengan urutan key = kemunculan pertama (tie most_common sama)
+    if not len(codes):
+        return Counter()
+    counts = np.bincount(codes, minlength=len(labels))
+    seen, first_index = np.unique(codes, return_index=True)
+    order = seen[np.argsort(first_index)]
+    return Counter({labels[code]: int(counts[code]) for code in order})
+
+def _phones_where(columns, mask):
+    codes = columns['phone'].cat.codes.to_numpy()[mask]
+    categories = columns['phone'].cat.categories
+    return set(categories[np.unique(codes)])
+
+def build_engine(columns, today=None):
+    """AnalyticsEngine yang akumulator lognya dihitung secara vektor dari kolom.
+
+    Hasilnya sama dengan memproses log satu per satu; pesanan bisa
+    ditambahkan setelahnya lewat ``engine.run([], orders)``.
+    """
+    engine = AnalyticsEngine(today=today)
+    total = len(columns)
+    phone_codes = columns['phone'].cat.codes.to_numpy()
+    phone_labels = list(columns['phone'].cat.categories)
+    message_types = columns['message_type'].to_numpy()
+    error_types = columns['error_type'].to_numpy()
+    timestamps = columns['timestamp']
+    valid = timestamps.notna().to_numpy()
+    hours = timestamps.dt.hour.to_numpy()[valid].astype(np.int64)
+    days = timestamps.to_numpy()[valid].astype('datetime64[D]')
+
+    patterns = engine.patterns
+    patterns.total_messages = total
+    patterns.user_activity = _counter_by_first_seen(phone_codes, phone_labels)
+    patterns.message_types = _counter_by_first_seen(message_types, MESSAGE_TYPES)
+    patterns.hourly_activity = _counter_by_first_seen(hours, list(range(24)))
+    day_codes, day_labels = pd.factorize(days)
+    patterns.daily_activity = _counter_by_first_seen(day_codes, [str(day) for day in day_labels])
+
+    is_greeting = message_types == MESSAGE_TYPES.index('greeting')
+    is_order_start = ~is_greeting & columns['order_start'].to_numpy()
+    is_product = ~is_greeting & ~is_order_start & (message_types == MESSAGE_TYPES.index('product_query'))
+    engine.funnel.greeted = _phones_where(columns, is_greeting)
+    engine.funnel.started_order = _phones_where(columns, is_order_start)
+    engine.funnel.selected_product = _phones_where(columns, is_product)
+
+    has_error = error_types != NO_ERROR
+    engine.errors.total_messages = total
+    engine.errors.total_errors = int(has_error.sum())
+    engine.errors.error_types = _counter_by_first_seen(error_types[has_error], ERROR_TYPES)
+
+    is_today = np.zeros(total, dtype=bool)
+    is_today[valid] = days == np.datetime64(engine.daily.day)
+    engine.daily.users = _phones_where(columns, is_today)
+    engine.daily.messages = int(is_today.sum())
+
+    engine.logs_processed = total
+    return engine
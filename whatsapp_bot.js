@@ -24,6 +24,12 @@ class WhatsAppBot {
             }
         });
         
+        // Worker Python persisten dan request yang menunggu respon (id -> {resolve, reject, timer})
+        this.worker = null;
+        this.pendingRequests = new Map();
+        this.nextRequestId = 1;
+        this.requestTimeoutMs = parseInt(process.env.WORKER_TIMEOUT_MS || '15000', 10);
+        
         this.setupEventHandlers();
     }
     
@@ -105,44 +111,116 @@ class WhatsAppBot {
         }
     }
     
-    async processWithChatbot(message, phoneNumber) {
-        // Use proper Python environment for processing
+    startWorker() {
+        // Satu proses Python persisten (mode --serve) untuk semua pesan
         const { spawn } = require('child_process');
+        const readline = require('readline');
 
-        return new Promise((resolve, reject) => {
-            // Use Windows-style Python path for local dev
-            const path = require('path');
-            const pythonPath = path.join(__dirname, 'venv', 'Scripts', 'python.exe');
-            const python = spawn(pythonPath, ['process_message.py', message, phoneNumber], {
-                cwd: __dirname,
-                env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
-            });
-
-            let response = '';
-            let errorOutput = '';
-
-            python.stdout.on('data', (data) => {
-                response += data.toString();
-            });
-
-            python.stderr.on('data', (data) => {
-                errorOutput += data.toString();
-            });
-
-            python.on('close', (code) => {
-                if (code === 0) {
-                    resolve(response.trim());
-                } else {
-                    console.error('Python process error:', errorOutput);
-                    resolve("Maaf, terjadi kesalahan sistem. Silakan coba lagi.");
+        // Use Windows-style Python path for local dev
+        const path = require('path');
+        const pythonPath = path.join(__dirname, 'venv', 'Scripts', 'python.exe');
+        const worker = spawn(pythonPath, ['process_message.py', '--serve'], {
+            cwd: __dirname,
+            env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+        });
+
+        const lines = readline.createInterface({ input: worker.stdout });
+        lines.on('line', (line) => {
+            let reply;
+            try {
+                reply = JSON.parse(line);
+            } catch (error) {
+                console.error('Invalid worker reply:', line);
+                return;
+            }
+
+            // Balasan tanpa id yang dikenal (mis. request rusak) diselesaikan oleh timeout
+            const pending = this.pendingRequests.get(reply.id);
+            if (!pending) {
+                console.error('Unmatched worker reply:', line);
+                return;
+            }
+            this.settleRequest(reply.id);
+            if (typeof reply.response === 'string') {
+                pending.resolve(reply.response);
+            } else {
+                pending.reject(new Error(reply.error || 'Invalid worker reply'));
+            }
+        });
+
+        worker.stderr.on('data', (data) => {
+            console.error('Python worker:', data.toString());
+        });
+
+        // Worker berhenti: semua request yang masih menunggu ditolak
+        const failPending = (error) => {
+            if (this.worker === worker) {
+                this.worker = null;
+            }
+            for (const id of [...this.pendingRequests.keys()]) {
+                if (this.pendingRequests.get(id).worker === worker) {
+                    this.settleRequest(id).reject(error);
                 }
-            });
+            }
+        };
+
+        worker.on('exit', (code, signal) => {
+            console.error('Python worker exited with', signal || `code ${code}`);
+            failPending(new Error(`Python worker exited (${signal || code})`));
+        });
 
-            python.on('error', (error) => {
-                console.error('Failed to start Python process:', error);
-                resolve("Maaf, sistem sedang bermasalah. Silakan coba lagi nanti.");
-            });
+        worker.on('error', (error) => {
+            console.error('Failed to start Python worker:', error);
+            failPending(error);
         });
+
+        worker.stdin.on('error', (error) => {
+            console.error('Python worker stdin error:', error);
+            failPending(error);
+        });
+
+        this.worker = worker;
+    }
+
+    settleRequest(id) {
+        const pending = this.pendingRequests.get(id);
+        this.pendingRequests.delete(id);
+        clearTimeout(pending.timer);
+        return pending;
+    }
+
+    requestWorker(message, phoneNumber) {
+        // Worker dijalankan sekali dan di-restart otomatis jika berhenti
+        if (!this.worker) {
+            this.startWorker();
+        }
+        const worker = this.worker;
+
+        return new Promise((resolve, reject) => {
+            const id = this.nextRequestId++;
+            const timer = setTimeout(() => {
+                if (!this.pendingRequests.has(id)) {
+                    return;
+                }
+                this.settleRequest(id).reject(new Error(`Python worker timed out after ${this.requestTimeoutMs} ms`));
+                // Worker yang macet dimatikan; request lain ikut ditolak dan worker baru dibuat
+                if (this.worker === worker) {
+                    this.worker = null;
+                    worker.kill();
+                }
+            }, this.requestTimeoutMs);
+            this.pendingRequests.set(id, { resolve, reject, timer, worker });
+            worker.stdin.write(JSON.stringify({ id, message, phone_number: phoneNumber }) + '\n');
+        });
+    }
+
+    async processWithChatbot(message, phoneNumber) {
+        try {
+            return await this.requestWorker(message, phoneNumber);
+        } catch (error) {
+            console.error('Error processing message with Python worker:', error.message);
+            return "Maaf, terjadi kesalahan sistem. Silakan coba lagi.";
+        }
     }
     
     async start() {
@@ -1,8 +1,13 @@
+import math
 import os
 import re
-from flask import Flask, request
-from twilio.rest import Client
-from database import add_order, get_product_by_name, get_all_products
+import time
+from flask import Flask, Response, request
+from database import add_order, find_product, get_all_products, get_table_cache_key, get_broadcast_job
+from outbound import FakeTwilioClient, OutboundQueue
+from broadcast import BroadcastManager
+import metrics
+from profiling import MessageProfiler
 import json
 
 app = Flask(__name__)
@@ -12,11 +17,19 @@ TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', 'your_account_sid')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN', 'your_auth_token')
 TWILIO_WHATSAPP_NUMBER = os.getenv('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')
 
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+# WHATSAPP_FAKE_CLIENT=1: pakai client palsu (tanpa request ke Twilio) untuk uji offline
+if os.getenv('WHATSAPP_FAKE_CLIENT') == '1':
+    client = FakeTwilioClient()
+else:
+    from twilio.rest import Client
+    client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 
 # State management untuk percakapan
 user_sessions = {}
 
+# Cache teks katalog: (lokasi database, versi tabel products) -> teks katalog
+_catalog_cache = {}
+
 class OrderSession:
     def __init__(self):
         self.step = 'greeting'
@@ -26,39 +39,74 @@ class OrderSession:
         self.delivery_address = ''
         self.product_info = None
 
-def send_whatsapp_message(to_number, message):
-    """Mengirim pesan WhatsApp menggunakan Twilio"""
+def deliver_whatsapp_message(to_number, message):
+    """Mengirim pesan WhatsApp menggunakan Twilio (exception diteruskan ke pemanggil)"""
+    started = time.perf_counter()
+    result = 'error'
     try:
         message = client.messages.create(
             body=message,
             from_=TWILIO_WHATSAPP_NUMBER,
             to=f'whatsapp:{to_number}'
         )
+        result = 'ok'
         return message.sid
-    except Exception as e:
-        print(f"Error sending message: {e}")
-        return None
+    finally:
+        metrics.OUTBOUND_SEND_SECONDS.observe(time.perf_counter() - started, result)
+
+# Balasan webhook dikirim di background dengan retry dan backoff, sehingga
+# respon HTTP ke Twilio tidak menunggu round trip API pengiriman
+outbound_queue = OutboundQueue(
+    deliver_whatsapp_message,
+    workers=int(os.getenv('OUTBOUND_WORKERS', '4')),
+    max_retries=int(os.getenv('OUTBOUND_MAX_RETRIES', '3')),
+)
+
+# Broadcast berjalan sebagai job background dengan rate limit (pesan/detik)
+broadcasts = BroadcastManager(
+    deliver_whatsapp_message,
+    concurrency=int(os.getenv('BROADCAST_CONCURRENCY', '4')),
+    rate=float(os.getenv('BROADCAST_RATE', '10')),
+)
+
+# Profiling sebagian pesan webhook (PROFILE_SAMPLE_RATE), file profil per langkah FSM
+webhook_profiler = MessageProfiler.from_env('flask')
 
 def get_product_catalog():
-    """Mendapatkan katalog produk dalam format string"""
-    products = get_all_products()
+    """Mendapatkan katalog produk dalam format string (di-cache per database dan versi katalog)"""
+    global _catalog_cache
+    
+    key = get_table_cache_key('products')
+    catalog = _catalog_cache.get(key)
+    if catalog is None:
+        catalog = render_product_catalog(get_all_products())
+        _catalog_cache = {key: catalog}
+    return catalog
+
+def render_product_catalog(products):
+    """Menyusun teks katalog produk"""
     if not products:
         return "Maaf, katalog produk sedang kosong."
     
-    catalog = "📋 *KATALOG PRODUK KAMI:*\n\n"
+    parts = ["📋 *KATALOG PRODUK KAMI:*\n\n"]
     for product in products:
-        catalog += f"🛍️ *{product[1]}*\n"
-        catalog += f"💰 Harga: Rp {product[2]:,.0f}\n"
-        catalog += f"📦 Stok: {product[3]} unit\n"
+        parts.append(f"🛍️ *{product[1]}*\n")
+        parts.append(f"💰 Harga: Rp {product[2]:,.0f}\n")
+        parts.append(f"📦 Stok: {product[3]} unit\n")
         if product[4]:  # description
-            catalog += f"📝 {product[4]}\n"
-        catalog += "━━━━━━━━━━━━━━━━━━━━\n"
+            parts.append(f"📝 {product[4]}\n")
+        parts.append("━━━━━━━━━━━━━━━━━━━━\n")
     
-    catalog += "\n💬 Ketik nama produk yang ingin dipesan!"
-    return catalog
+    parts.append("\n💬 Ketik nama produk yang ingin dipesan!")
+    return "".join(parts)
 
 def process_order_flow(phone_number, message_body):
-    """Memproses alur pemesanan"""
+    """Memproses alur pemesanan (durasi dicatat per langkah untuk /metrics)"""
+    session = user_sessions.get(phone_number)
+    with metrics.BOT_STEP_SECONDS.time('flask', session.step if session else 'greeting'):
+        return _process_order_flow(phone_number, message_body)
+
+def _process_order_flow(phone_number, message_body):
     if phone_number not in user_sessions:
         user_sessions[phone_number] = OrderSession()
     
@@ -105,7 +153,7 @@ Ketik 'mulai' untuk memulai pemesanan."""
             response = "❌ Pilihan tidak valid. Ketik 1, 2, atau 3."
     
     elif session.step == 'product_selection':
-        product = get_product_by_name(message_body)
+        product = find_product(message_body)
         if product:
             session.product_info = product
             session.product_name = product[1]
@@ -208,11 +256,13 @@ def whatsapp_webhook():
             return 'OK', 200
         
         # Proses pesan dan dapatkan response
-        response_message = process_order_flow(from_number, message_body)
+        session = user_sessions.get(from_number)
+        with webhook_profiler.sample(session.step if session else 'greeting'):
+            response_message = process_order_flow(from_number, message_body)
         
-        # Kirim response
+        # Masukkan response ke antrian kirim (tidak menunggu Twilio)
         if response_message:
-            send_whatsapp_message(from_number, response_message)
+            outbound_queue.enqueue(from_number, response_message)
         
         return 'OK', 200
         
@@ -222,22 +272,56 @@ def whatsapp_webhook():
 
 @app.route('/send-broadcast', methods=['POST'])
 def send_broadcast():
-    """Endpoint untuk mengirim broadcast message"""
+    """Endpoint untuk mengirim broadcast message (dijalankan di background)"""
     try:
         data = request.get_json()
         message = data.get('message', '')
         phone_numbers = data.get('phone_numbers', [])
         
-        results = []
-        for phone in phone_numbers:
-            result = send_whatsapp_message(phone, message)
-            results.append({'phone': phone, 'status': 'sent' if result else 'failed'})
+        if not message or not phone_numbers:
+            return {'status': 'error', 'message': 'message dan phone_numbers wajib diisi'}, 400
+        if not isinstance(phone_numbers, list) or not all(
+                isinstance(phone, str) and phone.strip() for phone in phone_numbers):
+            return {'status': 'error', 'message': 'phone_numbers harus list nomor berupa string'}, 400
+        
+        rate = None
+        if 'rate' in data:
+            try:
+                rate = float(data['rate'])
+            except (TypeError, ValueError, OverflowError):
+                rate = 0
+            if not (math.isfinite(rate) and 0 < rate <= broadcasts.MAX_RATE):
+                return {'status': 'error',
+                        'message': f'rate harus angka lebih dari 0 dan maksimal {broadcasts.MAX_RATE}'}, 400
         
-        return {'status': 'success', 'results': results}, 200
+        job_id = broadcasts.start(message, phone_numbers, rate=rate)
+        return {'status': 'accepted', 'job_id': job_id,
+                'status_url': f'/send-broadcast/{job_id}'}, 202
         
     except Exception as e:
         return {'status': 'error', 'message': str(e)}, 500
 
+@app.route('/send-broadcast/<int:job_id>', methods=['GET'])
+def broadcast_status(job_id):
+    """Progress job broadcast: jumlah sent / failed / pending"""
+    job = get_broadcast_job(job_id)
+    if job is None:
+        return {'status': 'error', 'message': 'job tidak ditemukan'}, 404
+    return job, 200
+
+@app.route('/outbound-stats', methods=['GET'])
+def outbound_stats():
+    """Kedalaman antrian kirim dan latensi pengiriman"""
+    return outbound_queue.stats(), 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Metrik dalam format teks Prometheus"""
+    stats = outbound_queue.stats()
+    for state in ('queue_depth', 'in_flight', 'waiting_retry', 'pending'):
+        metrics.OUTBOUND_QUEUE.set(stats[state], state)
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -247,4 +331,9 @@ if __name__ == '__main__':
     print("🤖 WhatsApp Bot Server starting...")
     print("📱 Webhook URL: http://localhost:5001/webhook")
     print("🌐 Konfigurasi webhook ini di Twilio Console")
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    debug = True
+    # Lanjutkan broadcast yang terputus di background, bukan di jalur request.
+    # Dengan reloader (debug) modul ini jalan di dua proses; timer hanya di proses server.
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        broadcasts.start_resume_timer()
+    app.run(debug=debug, host='0.0.0.0', port=5001)